@@ -0,0 +1,149 @@
+"""
+Benchmark JSON encoding and decoding of realistic large Garmin Connect responses.
+
+Compares the standard library with the orjson backend used by
+`garmin_workouts_mcp.serialization` (if installed) and FastMCP's default
+pydantic-core tool result serializer. Reports the mean time per operation
+and the peak memory allocated while encoding or decoding. The raw activity
+list is also parsed incrementally in chunks, as `list_activities` does for
+large limits.
+
+Usage:
+    python -m benchmarks.bench_serialization [--activities 1000] [--repeat 20]
+"""
+import argparse
+import json
+import time
+import tracemalloc
+
+import pydantic_core
+
+from garmin_workouts_mcp.fit import CHUNK_SIZE
+from garmin_workouts_mcp.garmin_workout import make_payload
+from garmin_workouts_mcp.serialization import iter_json_array
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def make_activity(index: int) -> dict:
+    """An activity summary shaped like an entry of the activity list endpoint."""
+    return {
+        "activityId": 15000000000 + index,
+        "activityName": f"Morning Run {index}",
+        "description": None,
+        "startTimeLocal": "2024-05-01 07:00:00",
+        "startTimeGMT": "2024-05-01 05:00:00",
+        "activityType": {"typeId": 1, "typeKey": "running", "parentTypeId": 17, "isHidden": False,
+                         "restricted": False, "trimmable": True},
+        "eventType": {"typeId": 9, "typeKey": "uncategorized", "sortOrder": 10},
+        "distance": 10234.56, "duration": 3012.345, "elapsedDuration": 3100.2, "movingDuration": 2990.1,
+        "elevationGain": 87.0, "elevationLoss": 85.0, "averageSpeed": 3.398, "maxSpeed": 4.87,
+        "startLatitude": 52.520008, "startLongitude": 13.404954, "hasPolyline": True,
+        "ownerId": 12345678, "ownerDisplayName": "athlete", "ownerFullName": "Some Athlete",
+        "calories": 712.0, "bmrCalories": 61.0, "averageHR": 148.0, "maxHR": 171.0,
+        "averageRunningCadenceInStepsPerMinute": 172.4, "maxRunningCadenceInStepsPerMinute": 186.0,
+        "steps": 8612, "userRoles": ["SCOPE_GOLF_API_READ", "SCOPE_ATP_READ", "SCOPE_DIVE_API_WRITE"],
+        "privacy": {"typeId": 2, "typeKey": "private"}, "userPro": False, "hasVideo": False,
+        "timeZoneId": 124, "beginTimestamp": 1714539600000, "sportTypeId": 1,
+        "aerobicTrainingEffect": 3.2, "anaerobicTrainingEffect": 1.1,
+        "aerobicTrainingEffectMessage": "IMPROVING_AEROBIC_BASE_8",
+        "anaerobicTrainingEffectMessage": "NO_ANAEROBIC_BENEFIT_0",
+        "splitSummaries": [
+            {"noOfSplits": 1, "totalAscent": 87.0, "duration": 3012.3, "splitType": "INTERVAL_ACTIVE",
+             "numClimbSends": 0, "maxElevationGain": 87.0, "averageElevationGain": 87.0,
+             "maxDistance": 10234, "distance": 10234.56, "averageSpeed": 3.398, "maxSpeed": 4.87}
+        ],
+        "hasSplits": True, "vO2MaxValue": 52.0, "deviceId": 3442978423, "manufacturer": "GARMIN",
+        "lapCount": 11, "waterEstimated": 812.0, "activityTrainingLoad": 98.4,
+        "minTemperature": 12.0, "maxTemperature": 24.0, "minElevation": 32.4, "maxElevation": 61.2,
+        "summarizedDiveInfo": {"summarizedDiveGases": []}, "maxDoubleCadence": 186.0,
+        "locationName": "Berlin", "purposeful": False, "manualActivity": False, "pr": False,
+        "autoCalcCalories": False, "elevationCorrected": False, "atpActivity": False, "favorite": False,
+        "decoDive": False, "parent": False,
+    }
+
+
+def make_workout(steps: int) -> dict:
+    """A compiled Garmin workout with many interval repeats."""
+    return make_payload({
+        "name": "Long Intervals",
+        "type": "running",
+        "steps": [
+            {"stepType": "repeat", "numberOfIterations": 3, "steps": [
+                {"stepType": "interval", "endConditionType": "distance", "stepDistance": 1, "distanceUnit": "km",
+                 "target": {"type": "pace", "value": [4.4, 4.6], "unit": "min_per_km"}},
+                {"stepType": "recovery", "stepDuration": 90},
+            ]}
+            for _ in range(steps)
+        ],
+    })
+
+
+def measure(fn, data, repeat: int):
+    """Returns the mean time in milliseconds and the peak allocation in KiB."""
+    fn(data)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(data)
+    elapsed = (time.perf_counter() - start) / repeat * 1000
+
+    tracemalloc.start()
+    fn(data)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--activities", type=int, default=1000, help="number of activities in the list response")
+    parser.add_argument("--repeat", type=int, default=20, help="number of timed repetitions")
+    args = parser.parse_args()
+
+    documents = {
+        f"list_activities ({args.activities})": {"activities": [make_activity(i) for i in range(args.activities)]},
+        "make_payload (200 repeats)": make_workout(200),
+    }
+
+    encoders = {
+        "json.dumps": lambda data: json.dumps(data).encode(),
+        "pydantic_core.to_json": lambda data: pydantic_core.to_json(data, fallback=str),
+    }
+    decoders = {"json.loads": json.loads}
+    if orjson is not None:
+        encoders["orjson.dumps"] = orjson.dumps
+        decoders["orjson.loads"] = orjson.loads
+    else:
+        print("orjson is not installed, install it with: pip install 'garmin-workouts-mcp[fast]'\n")
+
+    print(f"{'document':<28} {'operation':<22} {'size KiB':>9} {'mean ms':>9} {'peak KiB':>9}")
+    for name, data in documents.items():
+        encoded = json.dumps(data).encode()
+        for operation, fn in encoders.items():
+            elapsed, peak = measure(fn, data, args.repeat)
+            print(f"{name:<28} {operation:<22} {len(encoded) / 1024:>9.1f} {elapsed:>9.2f} {peak:>9.1f}")
+        for operation, fn in decoders.items():
+            elapsed, peak = measure(fn, encoded, args.repeat)
+            print(f"{name:<28} {operation:<22} {len(encoded) / 1024:>9.1f} {elapsed:>9.2f} {peak:>9.1f}")
+
+    # The activity list endpoint returns a bare array, which is parsed one activity at a time
+    name = f"activity list ({args.activities})"
+    raw = json.dumps([make_activity(i) for i in range(args.activities)]).encode()
+
+    def chunks(data):
+        return (data[i:i + CHUNK_SIZE] for i in range(0, len(data), CHUNK_SIZE))
+
+    streaming = {
+        "json.loads": json.loads,
+        "iter_json_array": lambda data: sum(1 for _ in iter_json_array(chunks(data))),
+    }
+    for operation, fn in streaming.items():
+        elapsed, peak = measure(fn, raw, args.repeat)
+        print(f"{name:<28} {operation:<22} {len(raw) / 1024:>9.1f} {elapsed:>9.2f} {peak:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
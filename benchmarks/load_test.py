@@ -0,0 +1,183 @@
+"""
+Load test of the streamable HTTP transport with multiple worker processes.
+
+Starts a local fake Garmin Connect backend that answers with a fixed latency, runs the
+server with each worker count against it and measures the throughput and latency of
+`get_workout` calls sent by concurrent MCP clients.
+
+The workers resume the session from a shared token store, exactly like in a deployment,
+and only the host of Garmin Connect requests is redirected to the fake backend.
+
+Usage:
+    python -m benchmarks.load_test [--workers 1 2 4] [--clients 16] [--calls 400] [--latency 0.05]
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from multiprocessing import Process
+
+from fastmcp import Client
+from requests.adapters import HTTPAdapter
+
+from garmin_workouts_mcp.garmin_workout import make_payload
+
+
+def make_workout(workout_id: str) -> dict:
+    return {"workoutId": workout_id, **make_payload({
+        "name": f"Workout {workout_id}",
+        "type": "running",
+        "steps": [
+            {"stepType": "warmup", "stepDuration": 600},
+            {"stepType": "repeat", "numberOfIterations": 6, "steps": [
+                {"stepType": "interval", "endConditionType": "distance", "stepDistance": 800, "distanceUnit": "m",
+                 "target": {"type": "pace", "value": [3.9, 4.1], "unit": "min_per_km"}},
+                {"stepType": "recovery", "stepDuration": 120},
+            ]},
+            {"stepType": "cooldown", "stepDuration": 600},
+        ],
+    })}
+
+
+def serve_fake_garmin(port: int, latency: float):
+    """Serves workouts like Garmin Connect after a fixed latency."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            time.sleep(latency)
+            body = json.dumps(make_workout(self.path.rsplit("/", 1)[-1])).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+    server.daemon_threads = True
+    server.serve_forever()
+
+
+class RedirectAdapter(HTTPAdapter):
+    """Sends requests to the fake backend instead of Garmin Connect."""
+
+    def __init__(self, base_url: str):
+        super().__init__(pool_maxsize=64)
+        self.base_url = base_url
+
+    def send(self, request, **kwargs):
+        request.url = self.base_url + request.path_url
+        return super().send(request, **kwargs)
+
+
+def create_app():
+    """Worker app factory: the server's app factory with requests redirected to the fake backend."""
+    import garth
+    from garmin_workouts_mcp.main import create_app as create_server_app
+
+    app = create_server_app()
+    garth.client.sess.mount("https://connectapi.garmin.com", RedirectAdapter(os.environ["FAKE_GARMIN_URL"]))
+    return app
+
+
+def write_tokens(directory: str):
+    """Writes never-expiring fake tokens to the shared token store."""
+    now = int(time.time())
+    with open(os.path.join(directory, "oauth1_token.json"), "w") as f:
+        json.dump({"oauth_token": "token", "oauth_token_secret": "secret", "domain": "garmin.com"}, f)
+    with open(os.path.join(directory, "oauth2_token.json"), "w") as f:
+        json.dump({"scope": "", "jti": "jti", "token_type": "Bearer", "access_token": "access",
+                   "refresh_token": "refresh", "expires_in": 10 ** 8, "expires_at": now + 10 ** 8,
+                   "refresh_token_expires_in": 10 ** 8, "refresh_token_expires_at": now + 10 ** 8}, f)
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_for_port(port: int, timeout: float = 30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise TimeoutError(f"Port {port} did not open within {timeout}s")
+
+
+async def run_clients(url: str, clients: int, calls: int):
+    """Sends the calls from concurrent clients and returns the elapsed time and per-call latencies."""
+    latencies = []
+
+    async def client(index: int):
+        async with Client(url) as mcp_client:
+            for call in range(index, calls, clients):
+                start = time.perf_counter()
+                await mcp_client.call_tool("get_workout", {"workout_id": str(call)})
+                latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client(i) for i in range(clients)))
+    return time.perf_counter() - start, sorted(latencies)
+
+
+def run(workers: int, args, backend_url: str, garth_home: str) -> str:
+    port = free_port()
+    env = {**os.environ, "FAKE_GARMIN_URL": backend_url, "GARTH_HOME": garth_home}
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "benchmarks.load_test:create_app", "--factory",
+         "--host", "127.0.0.1", "--port", str(port), "--workers", str(workers), "--log-level", "warning"],
+        env=env, stderr=subprocess.DEVNULL,
+    )
+    try:
+        wait_for_port(port)
+        url = f"http://127.0.0.1:{port}/mcp"
+        asyncio.run(run_clients(url, args.clients, args.clients))  # warm up every worker
+        elapsed, latencies = asyncio.run(run_clients(url, args.clients, args.calls))
+    finally:
+        server.terminate()
+        server.wait()
+
+    p50 = latencies[len(latencies) // 2] * 1000
+    p95 = latencies[int(len(latencies) * 0.95)] * 1000
+    return f"{workers:>7} {args.calls / elapsed:>10.1f} {p50:>9.1f} {p95:>9.1f}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4], help="worker counts to test")
+    parser.add_argument("--clients", type=int, default=16, help="number of concurrent MCP clients")
+    parser.add_argument("--calls", type=int, default=400, help="number of tool calls per run")
+    parser.add_argument("--latency", type=float, default=0.05, help="fake Garmin Connect latency in seconds")
+    args = parser.parse_args()
+
+    backend_port = free_port()
+    backend = Process(target=serve_fake_garmin, args=(backend_port, args.latency), daemon=True)
+    backend.start()
+    wait_for_port(backend_port)
+
+    print(f"{args.clients} clients, {args.calls} calls, {args.latency * 1000:.0f} ms backend latency, "
+          f"{os.cpu_count()} CPUs")
+    print(f"{'workers':>7} {'calls/s':>10} {'p50 ms':>9} {'p95 ms':>9}")
+    try:
+        with tempfile.TemporaryDirectory() as garth_home:
+            write_tokens(garth_home)
+            for workers in args.workers:
+                print(run(workers, args, f"http://127.0.0.1:{backend_port}", garth_home), flush=True)
+    finally:
+        backend.terminate()
+
+
+if __name__ == "__main__":
+    main()
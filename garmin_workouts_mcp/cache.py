@@ -0,0 +1,185 @@
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional, Union
+
+from .serialization import dumps_bytes, loads
+
+
+# Maximum number of responses kept by a cache before the least recently used are evicted
+DEFAULT_MAX_ENTRIES = 1024
+
+
+def cache_ttl() -> float:
+    """
+    Returns the time in seconds Garmin Connect responses are cached.
+
+    Returns:
+        The value of GARMIN_CACHE_TTL, or 0 (caching disabled) if unset
+    """
+    return max(0.0, float(os.environ.get("GARMIN_CACHE_TTL", 0)))
+
+
+def create_cache() -> Union["ResponseCache", "DiskCache"]:
+    """
+    Creates the response cache configured by the environment.
+
+    Returns:
+        A DiskCache in GARMIN_CACHE_DIR if it is set, so that it is shared by all worker
+        processes, and an in-memory ResponseCache otherwise
+    """
+    directory = os.environ.get("GARMIN_CACHE_DIR")
+    if directory:
+        return DiskCache(os.path.expanduser(directory), cache_ttl())
+    return ResponseCache(cache_ttl())
+
+
+class ResponseCache:
+    """
+    Thread-safe in-memory cache of Garmin Connect responses with a time to live and LRU eviction.
+
+    A cache with a time to live of 0 is disabled and never stores anything.
+    """
+
+    def __init__(self, ttl: float = 0, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """
+        Returns the cached value for a key, or the default if it is missing or expired.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return default
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any) -> None:
+        """
+        Stores a value, evicting the least recently used entries if the cache is full.
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key: Optional[str] = None) -> None:
+        """
+        Removes a key from the cache, or every key if no key is given.
+        """
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+class DiskCache:
+    """
+    Cache of JSON-serializable Garmin Connect responses stored as files in a directory.
+
+    The directory can be shared by several processes. Entries are written atomically and
+    expire based on their modification time. Has the same interface as ResponseCache.
+    """
+
+    def __init__(self, directory: str, ttl: float = 0, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, hashlib.sha256(key.encode()).hexdigest() + ".json")
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """
+        Returns the cached value for a key, or the default if it is missing or expired.
+        """
+        path = self._path(key)
+        try:
+            if os.path.getmtime(path) + self.ttl <= time.time():
+                os.remove(path)
+                return default
+            with open(path, "rb") as f:
+                return loads(f.read())
+        except (OSError, ValueError):
+            return default
+
+    def set(self, key: str, value: Any) -> None:
+        """
+        Stores a value, removing the oldest entries if the cache is full.
+        """
+        if not self.enabled:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(dumps_bytes(value))
+            os.replace(temp_path, self._path(key))
+        except BaseException:
+            os.remove(temp_path)
+            raise
+        self._prune()
+
+    def invalidate(self, key: Optional[str] = None) -> None:
+        """
+        Removes a key from the cache, or every key if no key is given.
+        """
+        paths = [self._path(key)] if key is not None else self._entries()
+        for path in paths:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _entries(self) -> list:
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return []
+        return [os.path.join(self.directory, name) for name in names if name.endswith(".json")]
+
+    def _prune(self) -> None:
+        entries = self._entries()
+        if len(entries) <= self.max_entries:
+            return
+        mtimes = {}
+        for path in entries:
+            try:
+                mtimes[path] = os.path.getmtime(path)
+            except OSError:
+                pass
+        for path in sorted(mtimes, key=mtimes.get)[:len(mtimes) - self.max_entries]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def __len__(self) -> int:
+        return len(self._entries())
@@ -0,0 +1,78 @@
+import contextvars
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Any, Callable, Iterable, List, Optional, Tuple
+
+from .deadlines import DeadlineExceeded, remaining, track_writes
+from .progress import current_progress
+
+
+# Default number of concurrent requests sent to Garmin Connect by batch tools
+DEFAULT_MAX_CONCURRENCY = 8
+
+
+def max_concurrency() -> int:
+    """
+    Returns the maximum number of concurrent Garmin Connect requests.
+
+    Returns:
+        The value of GARMIN_MAX_CONCURRENCY, or the default if unset
+    """
+    return max(1, int(os.environ.get("GARMIN_MAX_CONCURRENCY", DEFAULT_MAX_CONCURRENCY)))
+
+
+def run_concurrently(fn: Callable[[Any], Any], items: Iterable[Any],
+                     max_workers: Optional[int] = None) -> List[Tuple[Any, Optional[Exception]]]:
+    """
+    Calls a function for every item using a bounded thread pool.
+
+    Args:
+        fn: The function to call with each item
+        items: The items to process
+        max_workers: Maximum number of concurrent calls (default: GARMIN_MAX_CONCURRENCY)
+
+    Returns:
+        A list of (result, error) tuples in the order of the items. Exactly one of
+        result and error is set for every item. If the deadline of the tool call passes,
+        calls that have not started are cancelled and every unfinished item has a
+        DeadlineExceeded error, except calls that have sent a write request: these are waited
+        for, so that a write that succeeds late is not reported as failed and repeated. Finished
+        items are counted in the tracked progress, if any.
+    """
+    items = list(items)
+    if not items:
+        return []
+
+    progress = current_progress()
+    if progress is not None:
+        progress.add_total(len(items))
+
+    workers = min(max_workers or max_concurrency(), len(items))
+    executor = ThreadPoolExecutor(max_workers=workers)
+    writes = [threading.Event() for _ in items]
+    # Each call runs in a copy of the caller's context, e.g. to keep the selected athlete and deadline
+    futures = [executor.submit(contextvars.copy_context().run, _call, fn, item, sent)
+               for item, sent in zip(items, writes)]
+    if progress is not None:
+        for future in futures:
+            future.add_done_callback(lambda f: progress.advance(not f.cancelled() and f.exception() is None))
+    timeout = remaining()
+    wait(futures, timeout=None if timeout is None else max(0.0, timeout))
+    # Writes that were sent complete on their own, other calls give up at the deadline
+    wait([future for future, sent in zip(futures, writes) if sent.is_set()])
+    executor.shutdown(wait=False, cancel_futures=True)
+
+    results = []
+    for future in futures:
+        if not future.done() or future.cancelled():
+            results.append((None, DeadlineExceeded("Deadline of the tool call exceeded before the request completed")))
+            continue
+        error = future.exception()
+        results.append((None, error) if error else (future.result(), None))
+    return results
+
+
+def _call(fn: Callable[[Any], Any], item: Any, sent: threading.Event) -> Any:
+    with track_writes(sent):
+        return fn(item)
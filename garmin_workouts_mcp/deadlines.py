@@ -0,0 +1,200 @@
+import contextvars
+import functools
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from typing import Any, Callable, Iterable, Iterator, Optional
+
+
+# Default time budget in seconds of a tool call, including all its Garmin Connect requests
+DEFAULT_TOOL_TIMEOUT = 30
+
+# Tools sending many requests get larger budgets by default
+TOOL_TIMEOUTS = {
+    "get_activities": 60,
+    "get_activity_fit": 120,
+    "get_activity_track": 120,
+    "get_training_summary": 120,
+    "create_training_plan": 120,
+    "sync_plan": 120,
+    "export_workouts": 300,
+    "import_workouts": 300,
+}
+
+# Maximum number of upstream requests waited for with a deadline at the same time
+MAX_REQUEST_THREADS = 64
+
+_deadline = contextvars.ContextVar("deadline", default=None)
+_cancelled = contextvars.ContextVar("cancelled", default=None)
+_write_sent = contextvars.ContextVar("write_sent", default=None)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when the time budget of a tool call expires before a request has completed."""
+
+
+class Cancelled(DeadlineExceeded):
+    """Raised instead of sending a request after the job it belongs to has been cancelled."""
+
+
+def tool_timeout(tool: str) -> Optional[float]:
+    """
+    Returns the time budget of a tool call.
+
+    Returns:
+        The value of GARMIN_TOOL_TIMEOUT_<TOOL> (e.g. GARMIN_TOOL_TIMEOUT_SYNC_PLAN), the tool's
+        default, or GARMIN_TOOL_TIMEOUT, or None if the value is 0 (no deadline). GARMIN_TOOL_TIMEOUT=0
+        disables the deadlines of all tools without their own variable, including those with a default.
+    """
+    value = os.environ.get(f"GARMIN_TOOL_TIMEOUT_{tool.upper()}")
+    if value is None:
+        default = os.environ.get("GARMIN_TOOL_TIMEOUT")
+        if default is not None and float(default) <= 0:
+            return None
+        value = TOOL_TIMEOUTS.get(tool) or default or DEFAULT_TOOL_TIMEOUT
+    seconds = float(value)
+    return seconds if seconds > 0 else None
+
+
+def remaining() -> Optional[float]:
+    """
+    Returns the seconds left until the deadline of the current tool call, or None without a deadline.
+    """
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+def check() -> None:
+    """
+    Raises:
+        DeadlineExceeded: If the deadline of the current tool call has passed
+        Cancelled: If the current job has been cancelled
+    """
+    left = remaining()
+    if left is not None and left <= 0:
+        raise DeadlineExceeded("Deadline of the tool call exceeded")
+    event = _cancelled.get()
+    if event is not None and event.is_set():
+        raise Cancelled("The job was cancelled")
+
+
+@contextmanager
+def use_cancellation(event: threading.Event):
+    """
+    Stops the requests of the block once the event is set, like an expired deadline.
+    """
+    token = _cancelled.set(event)
+    try:
+        yield
+    finally:
+        _cancelled.reset(token)
+
+
+@contextmanager
+def use_deadline(seconds: Optional[float]):
+    """
+    Sets a deadline for the block. An earlier deadline that is already set is kept.
+    """
+    deadline = _deadline.get()
+    if seconds is not None:
+        candidate = time.monotonic() + seconds
+        deadline = candidate if deadline is None else min(deadline, candidate)
+    token = _deadline.set(deadline)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+@contextmanager
+def track_writes(event: threading.Event):
+    """
+    Sets the event once the block sends a write request, see `write_sent`.
+    """
+    token = _write_sent.set(event)
+    try:
+        yield
+    finally:
+        _write_sent.reset(token)
+
+
+def write_sent() -> None:
+    """
+    Records that the current call is sending a write request, whose outcome is waited for even after
+    the deadline.
+    """
+    event = _write_sent.get()
+    if event is not None:
+        event.set()
+
+
+@contextmanager
+def detached():
+    """
+    Runs the block without the deadline and cancellation of the current tool call, e.g. background work
+    that outlives the call.
+    """
+    deadline_token = _deadline.set(None)
+    cancelled_token = _cancelled.set(None)
+    try:
+        yield
+    finally:
+        _cancelled.reset(cancelled_token)
+        _deadline.reset(deadline_token)
+
+
+def with_deadline(fn: Callable) -> Callable:
+    """
+    Bounds a tool call by the time budget of the tool, see `tool_timeout`.
+    """
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        with use_deadline(tool_timeout(fn.__name__)):
+            return fn(*args, **kwargs)
+    return wrapper
+
+
+def iter_until_deadline(iterable: Iterable) -> Iterator:
+    """
+    Yields the items of an iterable, e.g. the chunks of a streamed download, until the deadline passes.
+
+    Raises:
+        DeadlineExceeded: If the deadline passes before the iterable is exhausted
+    """
+    for item in iterable:
+        check()
+        yield item
+
+
+def call_with_deadline(fn: Callable[[], Any]) -> Any:
+    """
+    Calls a blocking function, giving up waiting for it when the deadline passes.
+
+    Without a deadline the function is called directly. Otherwise it runs in a worker thread
+    with a copy of the caller's context. A call that is given up keeps running in the background
+    until it completes on its own, so the function always runs and can release what it holds.
+
+    Raises:
+        DeadlineExceeded: If the deadline passes before the function returns
+    """
+    left = remaining()
+    if left is None:
+        return fn()
+
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=MAX_REQUEST_THREADS, thread_name_prefix="request")
+
+    future = _executor.submit(contextvars.copy_context().run, fn)
+    done, _ = wait([future], timeout=max(0.0, left))
+    if not done:
+        raise DeadlineExceeded(f"Deadline of the tool call exceeded after waiting {left:.1f}s for Garmin Connect")
+    return future.result()
@@ -0,0 +1,382 @@
+import math
+import mmap
+import os
+import shutil
+import struct
+import zipfile
+from array import array
+from typing import Dict, Iterable, List, Optional
+
+
+# Seconds between the Unix epoch and the FIT epoch (1989-12-31T00:00:00Z)
+FIT_EPOCH_OFFSET = 631065600
+
+# Degrees per semicircle, as used by FIT position fields
+SEMICIRCLES = 2 ** 31 / 180
+
+# Base type number -> (struct format, invalid value)
+BASE_TYPE_MAPPING = {
+    0x00: ("B", 0xFF),                  # enum
+    0x01: ("b", 0x7F),                  # sint8
+    0x02: ("B", 0xFF),                  # uint8
+    0x03: ("h", 0x7FFF),                # sint16
+    0x04: ("H", 0xFFFF),                # uint16
+    0x05: ("i", 0x7FFFFFFF),            # sint32
+    0x06: ("I", 0xFFFFFFFF),            # uint32
+    0x08: ("f", None),                  # float32
+    0x09: ("d", None),                  # float64
+    0x0A: ("B", 0x00),                  # uint8z
+    0x0B: ("H", 0x0000),                # uint16z
+    0x0C: ("I", 0x00000000),            # uint32z
+    0x0D: ("B", 0xFF),                  # byte
+    0x0E: ("q", 0x7FFFFFFFFFFFFFFF),    # sint64
+    0x0F: ("Q", 0xFFFFFFFFFFFFFFFF),    # uint64
+    0x10: ("Q", 0x0000000000000000),    # uint64z
+}
+
+# Global message number -> (message name, {field number: (field name, scale, offset)})
+# Values are decoded as `raw / scale - offset`.
+MESSAGE_MAPPING = {
+    18: ("session", {
+        253: ("timestamp", 1, -FIT_EPOCH_OFFSET),
+        2: ("start_time", 1, -FIT_EPOCH_OFFSET),
+        7: ("total_elapsed_time", 1000, 0),
+        8: ("total_timer_time", 1000, 0),
+        9: ("total_distance", 100, 0),
+        11: ("total_calories", 1, 0),
+        14: ("avg_speed", 1000, 0),
+        15: ("max_speed", 1000, 0),
+        16: ("avg_heart_rate", 1, 0),
+        17: ("max_heart_rate", 1, 0),
+        18: ("avg_cadence", 1, 0),
+        20: ("avg_power", 1, 0),
+        22: ("total_ascent", 1, 0),
+        23: ("total_descent", 1, 0),
+        124: ("enhanced_avg_speed", 1000, 0),
+    }),
+    19: ("lap", {
+        253: ("timestamp", 1, -FIT_EPOCH_OFFSET),
+        2: ("start_time", 1, -FIT_EPOCH_OFFSET),
+        7: ("total_elapsed_time", 1000, 0),
+        8: ("total_timer_time", 1000, 0),
+        9: ("total_distance", 100, 0),
+        11: ("total_calories", 1, 0),
+        13: ("avg_speed", 1000, 0),
+        14: ("max_speed", 1000, 0),
+        15: ("avg_heart_rate", 1, 0),
+        16: ("max_heart_rate", 1, 0),
+        17: ("avg_cadence", 1, 0),
+        19: ("avg_power", 1, 0),
+        21: ("total_ascent", 1, 0),
+        22: ("total_descent", 1, 0),
+        110: ("enhanced_avg_speed", 1000, 0),
+    }),
+    20: ("record", {
+        253: ("timestamp", 1, -FIT_EPOCH_OFFSET),
+        0: ("position_lat", SEMICIRCLES, 0),
+        1: ("position_long", SEMICIRCLES, 0),
+        2: ("altitude", 5, 500),
+        3: ("heart_rate", 1, 0),
+        4: ("cadence", 1, 0),
+        5: ("distance", 100, 0),
+        6: ("speed", 1000, 0),
+        7: ("power", 1, 0),
+        13: ("temperature", 1, 0),
+        73: ("enhanced_speed", 1000, 0),
+        78: ("enhanced_altitude", 5, 500),
+    }),
+}
+
+TIMESTAMP_FIELD = 253
+
+# Chunk size used when streaming downloads and extracting archives
+CHUNK_SIZE = 64 * 1024
+
+
+class FitMessages:
+    """
+    Columnar storage for all decoded messages of one type.
+
+    Every column is an `array('d')` of equal length; fields missing from a
+    message or carrying the FIT invalid value are stored as NaN.
+    """
+
+    def __init__(self, name: str, field_names: Iterable[str]):
+        self.name = name
+        self.columns: Dict[str, array] = {field: array("d") for field in field_names}
+
+    def __len__(self) -> int:
+        return len(next(iter(self.columns.values()), ()))
+
+    def summary(self, fields: Optional[List[str]] = None) -> dict:
+        """
+        Summarizes the columns of this message type.
+
+        Args:
+            fields: Names of the fields to summarize (default: all fields with data)
+
+        Returns:
+            A dictionary mapping field names to count, min, max and mean
+        """
+        summary = {}
+        for field in self._select(fields):
+            count, total = 0, 0.0
+            minimum, maximum = math.inf, -math.inf
+            for value in self.columns[field]:
+                if value == value:  # skip NaN
+                    count += 1
+                    total += value
+                    if value < minimum:
+                        minimum = value
+                    if value > maximum:
+                        maximum = value
+            if count:
+                summary[field] = {"count": count, "min": minimum, "max": maximum, "mean": total / count}
+        return summary
+
+    def slice(self, start: Optional[int] = None, stop: Optional[int] = None, step: int = 1,
+              fields: Optional[List[str]] = None) -> dict:
+        """
+        Returns a slice of the columns of this message type.
+
+        Args:
+            start: Index of the first row
+            stop: Index after the last row
+            step: Step between rows
+            fields: Names of the fields to include (default: all fields with data)
+
+        Returns:
+            A dictionary mapping field names to lists of values (None for missing values)
+        """
+        rows = slice(start, stop, step)
+        return {
+            field: [value if value == value else None for value in self.columns[field][rows]]
+            for field in self._select(fields)
+        }
+
+    def _select(self, fields: Optional[List[str]]) -> List[str]:
+        if fields is None:
+            return [field for field, column in self.columns.items()
+                    if any(value == value for value in column)]
+        unknown = [field for field in fields if field not in self.columns]
+        if unknown:
+            raise ValueError(f"Unknown {self.name} fields: {', '.join(unknown)}")
+        return list(fields)
+
+
+def parse_fit(buffer) -> Dict[str, FitMessages]:
+    """
+    Parses session, lap and record messages from a FIT buffer into columns.
+
+    The buffer is only ever read through `struct.unpack_from`, so a `memoryview`
+    or memory-mapped file can be parsed without copying it.
+
+    Args:
+        buffer: The raw FIT data (bytes, memoryview or mmap)
+
+    Returns:
+        A dictionary mapping message names to their columnar messages
+
+    Raises:
+        ValueError: If the buffer is not a valid FIT file
+    """
+    if len(buffer) < 12:
+        raise ValueError("Invalid FIT file: too short")
+
+    header_size = buffer[0]
+    data_size = struct.unpack_from("<I", buffer, 4)[0]
+    if bytes(buffer[8:12]) != b".FIT":
+        raise ValueError("Invalid FIT file: missing .FIT signature")
+
+    messages = {
+        name: FitMessages(name, [field[0] for field in fields.values()])
+        for name, fields in MESSAGE_MAPPING.values()
+    }
+
+    definitions = {}
+    last_timestamp = 0
+    position = header_size
+    end = min(header_size + data_size, len(buffer))
+
+    while position < end:
+        header = buffer[position]
+        position += 1
+
+        if header & 0x80:
+            # Compressed timestamp header
+            local_type = (header >> 5) & 0x03
+            time_offset = header & 0x1F
+            timestamp = (last_timestamp & ~0x1F) + time_offset
+            if time_offset < (last_timestamp & 0x1F):
+                timestamp += 0x20
+            last_timestamp = timestamp
+        elif header & 0x40:
+            local_type = header & 0x0F
+            try:
+                definition, position = _read_definition(buffer, position, bool(header & 0x20))
+            except (IndexError, struct.error):
+                raise ValueError("Invalid FIT file: truncated definition message")
+            definitions[local_type] = definition
+            continue
+        else:
+            local_type = header & 0x0F
+            timestamp = None
+
+        definition = definitions.get(local_type)
+        if definition is None:
+            raise ValueError(f"Invalid FIT file: data message for undefined local type {local_type}")
+
+        record_struct, message_num, layout = definition
+        if position + record_struct.size > end:
+            raise ValueError("Invalid FIT file: truncated data message")
+        if message_num in MESSAGE_MAPPING:
+            values = record_struct.unpack_from(buffer, position)
+            last_timestamp = _append_row(messages[MESSAGE_MAPPING[message_num][0]], values, layout,
+                                         timestamp, last_timestamp)
+        elif layout is not None:
+            # Only the timestamp of messages we don't store is decoded
+            raw = layout.unpack_from(buffer, position)[0]
+            if raw != 0xFFFFFFFF:
+                last_timestamp = raw
+        position += record_struct.size
+
+    return messages
+
+
+def _read_definition(buffer, position: int, has_developer_data: bool):
+    """
+    Reads a definition message and compiles the struct used to decode its data messages.
+
+    Returns:
+        A tuple of the compiled definition and the position after the definition
+    """
+    architecture = buffer[position + 1]
+    endian = ">" if architecture == 1 else "<"
+    message_num = struct.unpack_from(endian + "H", buffer, position + 2)[0]
+    field_count = buffer[position + 4]
+    position += 5
+
+    wanted = MESSAGE_MAPPING.get(message_num, (None, {}))[1]
+    fmt = [endian]
+    decoded = {}
+    timestamp_fmt = None
+    skipped = 0
+    index = 0
+
+    for _ in range(field_count):
+        field_num, size, base_type = buffer[position], buffer[position + 1], buffer[position + 2]
+        position += 3
+        base = BASE_TYPE_MAPPING.get(base_type & 0x1F)
+        if base and struct.calcsize(endian + base[0]) == size and (field_num in wanted or
+                                                           (field_num == TIMESTAMP_FIELD and not wanted)):
+            if wanted:
+                fmt.append(base[0])
+                decoded[field_num] = (index, base[1])
+                index += 1
+            else:
+                timestamp_fmt = f"{endian}{skipped}x{base[0]}"
+                skipped += size
+        else:
+            if wanted:
+                fmt.append(f"{size}x")
+            else:
+                skipped += size
+
+    if has_developer_data:
+        developer_count = buffer[position]
+        position += 1
+        developer_size = sum(buffer[position + 3 * i + 1] for i in range(developer_count))
+        position += 3 * developer_count
+        if wanted:
+            fmt.append(f"{developer_size}x")
+        else:
+            skipped += developer_size
+
+    if wanted:
+        record_struct = struct.Struct("".join(fmt))
+        layout = [
+            (field[0], decoded.get(field_num), field[1], field[2])
+            for field_num, field in wanted.items()
+        ]
+        return (record_struct, message_num, layout), position
+
+    record_struct = struct.Struct(f"{skipped}x")
+    layout = struct.Struct(timestamp_fmt) if timestamp_fmt else None
+    return (record_struct, message_num, layout), position
+
+
+def _append_row(messages: FitMessages, values: tuple, layout: list, timestamp: Optional[int],
+                last_timestamp: int) -> int:
+    """
+    Appends one decoded data message to its columns and returns the latest timestamp.
+    """
+    columns = messages.columns
+    for name, decoded, scale, offset in layout:
+        value = math.nan
+        if decoded is not None:
+            raw = values[decoded[0]]
+            if raw != decoded[1]:
+                value = raw / scale - offset
+                if name == "timestamp":
+                    last_timestamp = raw
+        if value != value and name == "timestamp" and timestamp is not None:
+            value = timestamp + FIT_EPOCH_OFFSET
+        columns[name].append(value)
+    return last_timestamp
+
+
+def parse_fit_file(path: str) -> Dict[str, FitMessages]:
+    """
+    Parses a FIT file through a read-only memory map.
+
+    Args:
+        path: Path to the FIT file
+
+    Returns:
+        A dictionary mapping message names to their columnar messages
+    """
+    with open(path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            view = memoryview(mapped)
+            try:
+                return parse_fit(view)
+            finally:
+                view.release()
+
+
+def save_fit_stream(chunks: Iterable[bytes], path: str) -> str:
+    """
+    Writes a streamed activity download to disk, extracting the FIT file if it is zipped.
+
+    Args:
+        chunks: Iterable of downloaded byte chunks
+        path: Destination path of the FIT file
+
+    Returns:
+        The path of the saved FIT file
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    partial_path = path + ".part"
+
+    with open(partial_path, "wb") as f:
+        for chunk in chunks:
+            if chunk:
+                f.write(chunk)
+
+    try:
+        if zipfile.is_zipfile(partial_path):
+            with zipfile.ZipFile(partial_path) as archive:
+                members = [name for name in archive.namelist() if name.lower().endswith(".fit")]
+                if not members:
+                    raise ValueError("Downloaded archive does not contain a FIT file")
+                with archive.open(members[0]) as source, open(path, "wb") as target:
+                    shutil.copyfileobj(source, target, CHUNK_SIZE)
+            os.remove(partial_path)
+        else:
+            os.replace(partial_path, path)
+    except Exception:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+        raise
+
+    return path
@@ -1,3 +1,4 @@
+from numbers import Real
 from typing import List, Tuple
 
 
@@ -55,6 +56,155 @@ DEFAULT_PACE = {
     "cardio": 0.36,       # Same as running
 }
 
+# Accepted keys derived from the mappings above, used by validate_workout_data
+VALID_SPORT_TYPES = frozenset(SPORT_TYPE_MAPPING)
+VALID_STEP_TYPES = frozenset(STEP_TYPE_MAPPING)
+VALID_TARGET_TYPES = frozenset(TARGET_TYPE_MAPPING)
+VALID_DISTANCE_UNITS = frozenset(DISTANCE_UNIT_MAPPING)
+
+
+def validate_workout_data(workout: dict) -> dict:
+    """
+    Validates workout data in a single pass, without stopping at the first error.
+
+    Reports every problem that would make `make_payload` raise, prefixed with the path of
+    the offending step (e.g. "steps[1].steps[0]"). Runs locally without any network call.
+
+    Args:
+        workout: The workout object containing workout details and steps
+
+    Returns:
+        An object containing `valid`, the list of `errors` and the list of `warnings`
+        for input that is accepted but probably not intended
+    """
+    errors = []
+    warnings = []
+
+    if not isinstance(workout, dict):
+        return {"valid": False, "errors": ["Workout must be an object"], "warnings": warnings}
+
+    if not isinstance(workout.get("name"), str) or not workout["name"]:
+        errors.append("Missing workout name")
+
+    sport_type = workout.get("type")
+    if not isinstance(sport_type, str) or sport_type.lower() not in VALID_SPORT_TYPES:
+        errors.append(f"Unsupported sport type: {sport_type}")
+
+    if not isinstance(workout.get("steps"), list):
+        errors.append("Missing steps for workout")
+        return {"valid": False, "errors": errors, "warnings": warnings}
+
+    pending = [("steps", workout["steps"])]
+    while pending:
+        path, steps = pending.pop()
+        for index, step in enumerate(steps):
+            step_path = f"{path}[{index}]"
+            if not isinstance(step, dict):
+                errors.append(f"{step_path}: Step must be an object")
+                continue
+
+            step_name = step.get("stepName", "Unnamed Step")
+            step_type = step.get("stepType")
+
+            if (step.get("numberOfIterations") and step.get("steps") and
+                (step_type == "repeat" or step.get("endConditionType") == "repeat")):
+                if not isinstance(step["numberOfIterations"], int) or step["numberOfIterations"] <= 0:
+                    errors.append(f"{step_path}: Invalid or missing numberOfIterations for repeat step.")
+                if not isinstance(step["steps"], list):
+                    errors.append(f"{step_path}: Steps of repeat step must be a list")
+                else:
+                    pending.append((f"{step_path}.steps", step["steps"]))
+                continue
+
+            if step_type == "repeat":
+                errors.append(f"{step_path}: Repeat step requires numberOfIterations and steps: {step_name}")
+                continue
+
+            if not step_type:
+                errors.append(f"{step_path}: Missing stepType for step: {step_name}")
+                continue
+
+            if not isinstance(step_type, str):
+                errors.append(f"{step_path}: Invalid stepType for step: {step_name}")
+                continue
+
+            if step_type.lower() not in VALID_STEP_TYPES:
+                warnings.append(f"{step_path}: Unknown stepType '{step_type}' for step: {step_name}, using interval")
+
+            _validate_end_condition(step, step_path, step_name, errors, warnings)
+
+            if step.get("target"):
+                _validate_target(step["target"], step_path, errors, warnings)
+
+    return {"valid": not errors, "errors": errors, "warnings": warnings}
+
+
+def _validate_end_condition(step: dict, step_path: str, step_name: str, errors: list, warnings: list) -> None:
+    """
+    Validates the end condition of a regular step the way `process_regular_step` interprets it.
+    """
+    if step.get("endConditionType") == "lap.button":
+        return
+
+    if step.get("endConditionType") == "distance":
+        if step.get("stepDistance") and step.get("distanceUnit"):
+            unit = step["distanceUnit"]
+            if not isinstance(unit, str) or unit.lower() not in VALID_DISTANCE_UNITS:
+                errors.append(f"{step_path}: Unsupported distance unit: {unit}")
+            if not _is_number(step["stepDistance"]) or step["stepDistance"] <= 0:
+                errors.append(f"{step_path}: Invalid stepDistance for step: {step_name}")
+            return
+        if _is_number(step.get("stepDuration")) and step["stepDuration"] > 0:
+            warnings.append(f"{step_path}: Missing stepDistance or distanceUnit for step: {step_name}, using stepDuration")
+            return
+        errors.append(f"{step_path}: Missing stepDistance or distanceUnit for distance step: {step_name}")
+        return
+
+    if not _is_number(step.get("stepDuration")) or step["stepDuration"] <= 0:
+        errors.append(f"{step_path}: Invalid or missing stepDuration for step: {step_name}")
+
+
+def _validate_target(target, step_path: str, errors: list, warnings: list) -> None:
+    """
+    Validates the target of a regular step the way `process_target` interprets it.
+    """
+    if not isinstance(target, dict):
+        errors.append(f"{step_path}: Target must be an object")
+        return
+
+    target_type = target.get("type")
+    if not isinstance(target_type, str) or target_type.lower() not in VALID_TARGET_TYPES:
+        errors.append(f"{step_path}: Unsupported target type: {target_type}")
+        return
+
+    zone = target.get("zone")
+    if zone is not None and (not isinstance(zone, int) or isinstance(zone, bool) or zone <= 0):
+        errors.append(f"{step_path}: Target zone must be a positive integer")
+
+    value = target.get("value")
+    if not value:
+        return
+
+    if isinstance(value, list):
+        if len(value) != 2 or not all(_is_number(v) for v in value):
+            errors.append(f"{step_path}: Target value must be a number or a list of two numbers")
+            return
+        values = value
+    elif _is_number(value):
+        values = [value]
+    else:
+        errors.append(f"{step_path}: Target value must be a number or a list of two numbers")
+        return
+
+    if target.get("unit") == "min_per_km" and any(v <= 0 for v in values):
+        errors.append(f"{step_path}: Pace values must be positive")
+    elif target_type.lower() == "pace" and target.get("unit") != "min_per_km":
+        warnings.append(f"{step_path}: Pace target without unit min_per_km is interpreted as m/s")
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, Real) and not isinstance(value, bool)
+
 
 def make_payload(workout: dict) -> dict:
     """
@@ -181,8 +331,11 @@ def process_regular_step(step: dict, step_order: int) -> dict:
         "stepAudioNote": None
     }
 
-    # Process end condition (time or distance)
-    if (step.get("endConditionType") == "distance" and
+    # Process end condition (lap button, time or distance)
+    if step.get("endConditionType") == "lap.button":
+        workout_step["endCondition"] = END_CONDITION_TYPE_MAPPING["lap.button"]
+        workout_step["endConditionValue"] = None
+    elif (step.get("endConditionType") == "distance" and
         step.get("stepDistance") and step.get("distanceUnit")):
         distance_unit = DISTANCE_UNIT_MAPPING.get(step["distanceUnit"].lower())
         if not distance_unit:
@@ -279,6 +432,9 @@ def process_target(workout_step: dict, step: dict) -> None:
         target_values = convert_target_values(step, target_type_key)
         workout_step["targetValueOne"] = target_values["targetValueOne"]
         workout_step["targetValueTwo"] = target_values["targetValueTwo"]
+    elif step["target"].get("zone"):
+        # Zones of the athlete's settings, e.g. heart rate zone 2
+        workout_step["zoneNumber"] = step["target"]["zone"]
 
 
 def convert_target_values(step: dict, target_type_key: str) -> dict:
@@ -388,8 +544,8 @@ def calculate_estimated_duration(workout_segments: List[dict]) -> int:
                     # For distance-based steps, estimate duration based on pace
                     duration += estimate_step_duration(step, sport_type)
                 else:
-                    # For time-based steps, use the step duration directly
-                    duration += step["endConditionValue"]
+                    # For time-based steps, use the step duration directly, lap button steps count as 0
+                    duration += step["endConditionValue"] or 0
             elif step["type"] == "RepeatGroupDTO":
                 # Create a fake segment containing just the child steps of the repeat
                 child_steps_duration = calculate_steps_duration(step["workoutSteps"], sport_type)
@@ -416,7 +572,7 @@ def calculate_steps_duration(steps: List[dict], sport_type: str) -> int:
             if step["endCondition"]["conditionTypeKey"] == "distance":
                 duration += estimate_step_duration(step, sport_type)
             else:
-                duration += step["endConditionValue"]
+                duration += step["endConditionValue"] or 0
         elif step["type"] == "RepeatGroupDTO":
             child_steps_duration = calculate_steps_duration(step["workoutSteps"], sport_type)
             duration += step["numberOfIterations"] * child_steps_duration
@@ -455,4 +611,163 @@ def estimate_step_duration(step: dict, sport_type: str) -> int:
         pace_per_meter = DEFAULT_PACE.get(sport_type.lower(), DEFAULT_PACE["running"])
 
     # Calculate estimated duration
-    return int(distance * pace_per_meter)
\ No newline at end of file
+    return int(distance * pace_per_meter)
+
+# Reverse mappings from Garmin keys to workout data keys, used by make_workout_data
+SPORT_TYPE_KEYS = {value["sportTypeKey"]: key for key, value in SPORT_TYPE_MAPPING.items()}
+STEP_TYPE_KEYS = {value["stepTypeKey"]: key for key, value in STEP_TYPE_MAPPING.items()}
+TARGET_TYPE_KEYS = {value["workoutTargetTypeKey"]: key for key, value in TARGET_TYPE_MAPPING.items()}
+
+# Garmin's preferred end condition unit keys mapped to distance units
+PREFERRED_DISTANCE_UNITS = {"meter": "m", "m": "m", "kilometer": "km", "km": "km", "mile": "mile"}
+
+# Units of target values in workout data, pace values are converted from m/s
+TARGET_UNITS = {"pace": "min_per_km", "heart rate": "bpm", "power": "watts"}
+
+
+def make_workout_data(payload: dict) -> dict:
+    """
+    Converts a Garmin workout back into the compact workout data accepted by `make_payload`.
+
+    Distances are expressed in the step's preferred unit if Garmin provides one, otherwise
+    in km or miles if the distance is a whole multiple, and in meters otherwise. Pace targets
+    are converted from m/s to min/km.
+
+    Args:
+        payload: The workout as returned by Garmin Connect
+
+    Returns:
+        The workout data
+    """
+    sport_type_key = (payload.get("sportType") or {}).get("sportTypeKey")
+    steps = []
+    for segment in payload.get("workoutSegments") or []:
+        steps.extend(decompile_steps(segment.get("workoutSteps") or []))
+
+    return {
+        "name": payload.get("workoutName"),
+        "type": SPORT_TYPE_KEYS.get(sport_type_key, sport_type_key),
+        "steps": steps,
+    }
+
+
+def decompile_steps(workout_steps: List[dict]) -> List[dict]:
+    """
+    Recursively converts Garmin workout steps into workout data steps.
+
+    Args:
+        workout_steps: The Garmin workout steps
+
+    Returns:
+        The workout data steps
+    """
+    steps = []
+
+    for workout_step in sorted(workout_steps, key=lambda s: s.get("stepOrder") or 0):
+        if workout_step.get("type") == "RepeatGroupDTO":
+            steps.append({
+                "stepType": "repeat",
+                "numberOfIterations": workout_step.get("numberOfIterations"),
+                "steps": decompile_steps(workout_step.get("workoutSteps") or []),
+            })
+        else:
+            steps.append(decompile_regular_step(workout_step))
+
+    return steps
+
+
+def decompile_regular_step(workout_step: dict) -> dict:
+    """
+    Converts an executable Garmin workout step into a workout data step.
+
+    Args:
+        workout_step: The Garmin executable step
+
+    Returns:
+        The workout data step
+    """
+    step_type_key = (workout_step.get("stepType") or {}).get("stepTypeKey")
+    step = {"stepType": STEP_TYPE_KEYS.get(step_type_key, step_type_key)}
+
+    if workout_step.get("description"):
+        step["stepDescription"] = workout_step["description"]
+
+    condition = (workout_step.get("endCondition") or {}).get("conditionTypeKey")
+    value = workout_step.get("endConditionValue")
+    if condition == "distance" and value:
+        unit = (PREFERRED_DISTANCE_UNITS.get((workout_step.get("preferredEndConditionUnit") or {}).get("unitKey"))
+                or infer_distance_unit(value))
+        step["endConditionType"] = "distance"
+        step["stepDistance"] = _compact_number(value / DISTANCE_UNIT_MAPPING[unit]["factor"], 2)
+        step["distanceUnit"] = unit
+    elif condition in (None, "time"):
+        step["endConditionType"] = "time"
+        if value:
+            step["stepDuration"] = _compact_number(value, 0)
+    else:
+        # Not expressible in workout data (e.g. calories or heart rate), kept for information.
+        # Such steps are rejected by validate_workout_data and cannot be uploaded again.
+        step["endConditionType"] = condition
+
+    target = decompile_target(workout_step)
+    if target:
+        step["target"] = target
+
+    return step
+
+
+def decompile_target(workout_step: dict) -> dict:
+    """
+    Converts the target of a Garmin workout step into a workout data target.
+
+    Args:
+        workout_step: The Garmin executable step
+
+    Returns:
+        The workout data target, or None for steps without a target
+    """
+    target_type_key = (workout_step.get("targetType") or {}).get("workoutTargetTypeKey")
+    target_type = TARGET_TYPE_KEYS.get(target_type_key, target_type_key)
+    if not target_type or target_type == "no target":
+        return None
+
+    target = {"type": target_type}
+    values = [workout_step.get("targetValueOne"), workout_step.get("targetValueTwo")]
+    if all(values):
+        if target_type == "pace":
+            values = sorted(1000 / (value * 60) for value in values)
+            target["value"] = [_compact_number(value, 2) for value in values]
+        else:
+            target["value"] = [_compact_number(value, 2) for value in sorted(values)]
+        if target_type in TARGET_UNITS:
+            target["unit"] = TARGET_UNITS[target_type]
+    elif workout_step.get("zoneNumber"):
+        target["zone"] = workout_step["zoneNumber"]
+
+    return target
+
+
+def infer_distance_unit(meters: float) -> str:
+    """
+    Infers the unit a distance in meters was most likely entered in.
+
+    Args:
+        meters: The distance in meters
+
+    Returns:
+        "km" or "mile" if the distance is a whole multiple of 1 km or 0.01 miles, "m" otherwise
+    """
+    if meters >= 1000 and abs(meters - round(meters / 1000) * 1000) < 0.01:
+        return "km"
+    miles = meters / DISTANCE_UNIT_MAPPING["mile"]["factor"]
+    if abs(miles * 100 - round(miles * 100)) < 1e-6 and abs(meters - round(meters)) > 0.01:
+        return "mile"
+    return "m"
+
+
+def _compact_number(value: float, digits: int):
+    """
+    Rounds a number and returns it as int if it is whole.
+    """
+    value = round(value, digits)
+    return int(value) if value == int(value) else value
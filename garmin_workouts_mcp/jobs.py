@@ -0,0 +1,213 @@
+import contextvars
+import logging
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, List, Optional
+
+from .deadlines import use_cancellation, use_deadline
+from .progress import Progress, use_progress
+from .sessions import use_athlete
+from .tracing import span
+
+
+logger = logging.getLogger(__name__)
+
+# Default number of jobs run concurrently by each process, further jobs wait
+DEFAULT_MAX_JOBS = 2
+
+# Default time budget in seconds of a job, including all its Garmin Connect requests
+DEFAULT_JOB_TIMEOUT = 3600
+
+# Number of finished jobs kept for their status
+MAX_FINISHED_JOBS = 100
+
+
+def max_jobs() -> int:
+    """
+    Returns the number of jobs run concurrently.
+
+    Returns:
+        The value of GARMIN_MAX_JOBS, or the default if unset
+    """
+    return max(1, int(os.environ.get("GARMIN_MAX_JOBS", DEFAULT_MAX_JOBS)))
+
+
+def job_timeout() -> Optional[float]:
+    """
+    Returns the time budget of a job.
+
+    Returns:
+        The value of GARMIN_JOB_TIMEOUT, or the default if unset, or None if the value is 0 (no deadline)
+    """
+    seconds = float(os.environ.get("GARMIN_JOB_TIMEOUT", DEFAULT_JOB_TIMEOUT))
+    return seconds if seconds > 0 else None
+
+
+class Job:
+    """
+    A tool call running in the background, with its progress and partial results.
+    """
+
+    def __init__(self, tool: str, arguments: dict, athlete: Optional[str] = None):
+        self.id = "job-" + secrets.token_hex(8)
+        self.tool = tool
+        self.arguments = arguments
+        self.athlete = athlete
+        self.status = "pending"
+        self.progress = Progress()
+        self.result = None
+        self.error = None
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.cancel_event = threading.Event()
+        self.future: Optional[Future] = None
+        self._lock = threading.Lock()
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("done", "failed", "cancelled")
+
+    def to_dict(self, offset: int = 0) -> dict:
+        """
+        Args:
+            offset: Index of the first partial result returned, e.g. the number already seen
+
+        Returns:
+            The status ("pending", "running", "done", "failed" or "cancelled"), the progress, the
+            partial results from the offset and, once finished, the result or error
+        """
+        progress = self.progress.snapshot(offset)
+        with self._lock:
+            status = {
+                "jobId": self.id,
+                "tool": self.tool,
+                "status": self.status,
+                "progress": {key: progress[key] for key in ("completed", "failed", "total")},
+                "partialResults": progress["results"],
+                "createdAt": self.created,
+                "startedAt": self.started,
+                "finishedAt": self.finished,
+            }
+            if self.done:
+                status["result"] = self.result
+                status["error"] = self.error
+        return status
+
+
+class JobManager:
+    """
+    Runs tool functions as background jobs in a bounded thread pool.
+
+    Jobs run with the selected athlete and their own time budget instead of the tool's. Cancelling
+    a job stops it before its next Garmin Connect request; batch tools then return the results of
+    the finished requests, as when their deadline passes. Jobs are kept in the memory of the
+    process that started them.
+    """
+
+    def __init__(self, max_workers: int = DEFAULT_MAX_JOBS, timeout: Optional[float] = DEFAULT_JOB_TIMEOUT):
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def start(self, tool: str, fn: Callable[..., Any], arguments: dict, athlete: Optional[str] = None) -> Job:
+        """
+        Starts a job calling a function with keyword arguments.
+
+        Returns:
+            The pending job
+        """
+        job = Job(tool, arguments, athlete)
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="job")
+            self._jobs[job.id] = job
+            # Jobs start without the context of the starting tool call, e.g. its deadline
+            job.future = self._executor.submit(contextvars.Context().run, self._run, job, fn)
+        logger.info("Started %s running %s", job.id, tool)
+        return job
+
+    def _run(self, job: Job, fn: Callable[..., Any]) -> None:
+        with job._lock:
+            if job.status != "pending":
+                return
+            job.status = "running"
+            job.started = time.time()
+        try:
+            with use_athlete(job.athlete), use_deadline(self.timeout), use_cancellation(job.cancel_event), \
+                    use_progress(job.progress), span("job", tool=job.tool, job=job.id):
+                result = fn(**job.arguments)
+        except Exception as e:
+            logger.info("%s running %s failed: %s", job.id, job.tool, e)
+            self._finish(job, "cancelled" if job.cancel_event.is_set() else "failed", error=str(e))
+        else:
+            self._finish(job, "cancelled" if job.cancel_event.is_set() else "done", result=result)
+
+    def _finish(self, job: Job, status: str, result: Any = None, error: Optional[str] = None) -> None:
+        with job._lock:
+            job.status = status
+            job.result = result
+            job.error = error
+            job.finished = time.time()
+        with self._lock:
+            finished = [job_id for job_id, other in self._jobs.items() if other.done]
+            for job_id in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+                del self._jobs[job_id]
+
+    def get(self, job_id: str, athlete: Optional[str] = None) -> Optional[Job]:
+        """
+        Returns a job of an athlete, or None if it is unknown.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+        return job if job is not None and job.athlete == athlete else None
+
+    def list(self, athlete: Optional[str] = None) -> List[Job]:
+        """
+        Returns the jobs of an athlete, oldest first.
+        """
+        with self._lock:
+            return [job for job in self._jobs.values() if job.athlete == athlete]
+
+    def cancel(self, job_id: str, athlete: Optional[str] = None) -> Optional[Job]:
+        """
+        Cancels a job. A pending job does not start, a running job stops before its next request.
+
+        Returns:
+            The job, or None if it is unknown
+        """
+        job = self.get(job_id, athlete)
+        if job is None or job.done:
+            return job
+        job.cancel_event.set()
+        with job._lock:
+            pending = job.status == "pending"
+        if pending and job.future.cancel():
+            self._finish(job, "cancelled", error="The job was cancelled before it started")
+        logger.info("Cancelled %s", job.id)
+        return job
+
+    def join(self, timeout: Optional[float] = None) -> None:
+        """
+        Waits until all jobs that have started have finished.
+        """
+        with self._lock:
+            futures = [job.future for job in self._jobs.values()]
+        for future in futures:
+            try:
+                future.result(timeout)
+            except Exception:
+                pass
+
+
+def create_job_manager() -> JobManager:
+    """
+    Creates the job manager configured by GARMIN_MAX_JOBS and GARMIN_JOB_TIMEOUT.
+    """
+    return JobManager(max_jobs(), job_timeout())
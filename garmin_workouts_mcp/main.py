@@ -1,10 +1,41 @@
 from fastmcp import FastMCP
 import garth
 import os
+import uvicorn
 import sys
 import logging
-from datetime import datetime
-from .garmin_workout import make_payload
+import inspect
+from urllib.parse import urlencode
+from datetime import datetime, timedelta
+from functools import partial
+from typing import List
+from pydantic import validate_call
+from .garmin_workout import make_payload, make_workout_data, validate_workout_data
+from .fit import CHUNK_SIZE, parse_fit_file, save_fit_stream
+from .cache import create_cache
+from .concurrency import run_concurrently
+from .jobs import create_job_manager
+from .pagination import paged, response_budget, result_pager
+from .deadlines import DeadlineExceeded, call_with_deadline, iter_until_deadline, remaining, with_deadline
+from .prefetch import Prefetcher, prefetch_concurrency, prefetch_enabled
+from .progress import report_result
+from .resilience import create_getter
+from .sessions import (
+    athletes_dir, cache_key, connectapi, current_athlete, current_client, max_sessions, open_stream, with_athlete,
+)
+from .serialization import JSON_HEADERS, dumps, dumps_bytes, iter_json_array
+from .training_load import CHRONIC_LOAD_DAYS, activities_to_columns, aggregate_training
+from .training_plan import diff_schedule, expand_plan, parse_date
+from .tracing import TracingMiddleware, span
+from .profiling import ProfilingMiddleware
+from .search_index import KINDS, SearchIndex, SearchIndexPool, activity_document, workout_document
+from .token_store import TokenStore, token_lock_timeout
+from .track import simplify_track
+from .write_queue import TICKET_PREFIX, create_write_queue
+from .workout_library import (
+    export_dir, is_garmin_workout, iter_jsonl, open_jsonl_writer, to_upload_payload, validate_garmin_workout,
+    workout_fingerprint,
+)
 
 LIST_WORKOUTS_ENDPOINT = "/workout-service/workouts"
 GET_WORKOUT_ENDPOINT = "/workout-service/workout/{workout_id}"
@@ -13,8 +44,28 @@ GET_ACTIVITY_WEATHER_ENDPOINT = "/activity-service/activity/{activity_id}/weathe
 LIST_ACTIVITIES_ENDPOINT = "/activitylist-service/activities/search/activities"
 CREATE_WORKOUT_ENDPOINT = "/workout-service/workout"
 SCHEDULE_WORKOUT_ENDPOINT = "/workout-service/schedule/{workout_id}"
+UNSCHEDULE_WORKOUT_ENDPOINT = "/workout-service/schedule/{schedule_id}"
 CALENDAR_WEEK_ENDPOINT = "/calendar-service/year/{year}/month/{month}/day/{day}/start/{start}"
 CALENDAR_MONTH_ENDPOINT = "/calendar-service/year/{year}/month/{month}"
+DOWNLOAD_ACTIVITY_ENDPOINT = "/download-service/files/activity/{activity_id}"
+
+# Number of activities requested per page when paging through the activity list
+ACTIVITY_PAGE_SIZE = 100
+
+# Activity lists with at least this many activities are parsed incrementally from the response stream
+DEFAULT_STREAM_THRESHOLD = 100
+
+# Maximum number of rows returned by a single FIT slice
+MAX_FIT_SLICE_ROWS = 5000
+
+# Maximum number of points of a simplified activity track
+MAX_TRACK_POINTS = 5000
+
+# Number of workouts fetched concurrently before they are written to an export file
+EXPORT_BATCH_SIZE = 100
+
+# Transports selectable with GARMIN_MCP_TRANSPORT
+TRANSPORTS = ("stdio", "http", "sse")
 
 # Set up logging
 logging.basicConfig(
@@ -24,35 +75,149 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-mcp = FastMCP(name="GarminConnectWorkoutsServer")
+mcp = FastMCP(name="GarminConnectWorkoutsServer", tool_serializer=dumps)
+
+# Root span of every tool call, recorded if GARMIN_TRACE_FILE is set
+mcp.add_middleware(TracingMiddleware())
+
+# cProfile and tracemalloc profiles of tool calls, written if GARMIN_PROFILE_DIR is set
+mcp.add_middleware(ProfilingMiddleware())
+
+# Cache of Garmin Connect responses, disabled unless GARMIN_CACHE_TTL is set
+response_cache = create_cache()
+
+# Background fetches into the response cache, used if GARMIN_PREFETCH is set
+prefetcher = Prefetcher(response_cache, prefetch_concurrency())
+
+# Local full-text index per athlete of the activities and workouts in Garmin Connect responses,
+# bounded like the athlete sessions by GARMIN_MAX_SESSIONS
+search_indexes = SearchIndexPool(max_sessions())
+
+# Hedging and circuit breakers of GET requests, disabled unless GARMIN_HEDGING or GARMIN_CIRCUIT_BREAKER is set
+getter = create_getter()
+
+# Persistent queue of uploads and schedules flushed in the background, disabled unless GARMIN_WRITE_QUEUE is set
+write_queue = create_write_queue()
+
+# Tool calls running in the background, see start_job
+job_manager = create_job_manager()
 
 @mcp.tool
+@with_athlete
+@with_deadline
+@paged("workouts")
 def list_workouts() -> dict:
     """
     List all workouts available on Garmin Connect.
 
     Returns:
-        A dictionary containing a list of workouts.
+        A dictionary containing a list of workouts. If the list exceeds the response size budget
+        (GARMIN_RESPONSE_BUDGET), only the first workouts are returned with a `nextCursor` for the rest.
     """
-    workouts = garth.connectapi(LIST_WORKOUTS_ENDPOINT)
+    workouts = _cached_get(LIST_WORKOUTS_ENDPOINT)
     return {"workouts": workouts}
 
 @mcp.tool
-def get_workout(workout_id: str) -> dict:
+@with_athlete
+@with_deadline
+def get_workout(workout_id: str, compact: bool = False) -> dict:
     """
     Get details of a specific workout by its ID.
 
     Args:
         workout_id: ID of the workout to retrieve.
+        compact: Return the workout in the compact workout data format accepted by `upload_workout`
+            instead of Garmin's full workout representation (default=False). Much smaller, and can be
+            edited and uploaded again, except steps ending on conditions other than time, distance or
+            the lap button (e.g. calories), which keep their endConditionType for information.
 
     Returns:
         Workout details as a dictionary.
     """
-    endpoint = GET_WORKOUT_ENDPOINT.format(workout_id=workout_id)
-    workout = garth.connectapi(endpoint)
+    workout = _get_workout(workout_id)
+    if compact and workout:
+        workout = make_workout_data(workout)
     return {"workout": workout}
 
+def _get_workout(workout_id: str):
+    """
+    Get a workout from the response cache, or from Garmin Connect if it is not cached.
+    """
+    return _cached_get(GET_WORKOUT_ENDPOINT.format(workout_id=workout_id))
+
+def _cached_get(endpoint: str, params: dict = None):
+    """
+    Get a response from the response cache, from an in-flight prefetch of it, or from Garmin Connect.
+    """
+    key = _request_key(endpoint, params)
+    with span("cache", endpoint=endpoint) as cache_span:
+        value = response_cache.get(key)
+        cache_span.set("cache_hit", value is not None)
+        if value is not None:
+            # Responses cached by other worker processes have not been indexed by this one
+            _index_response(endpoint, value)
+        if value is None:
+            value = prefetcher.wait(key, remaining())
+            cache_span.set("prefetched", value is not None)
+        if value is None:
+            value = _get(endpoint, params)
+            if value:
+                response_cache.set(key, value)
+        return value
+
+def _get(endpoint: str, params: dict = None):
+    """
+    Send an idempotent GET request to Garmin Connect, hedged and guarded by a circuit breaker if enabled.
+    """
+    if params is None:
+        fetch = partial(connectapi, endpoint)
+    else:
+        fetch = partial(connectapi, endpoint, "GET", params=params)
+    value = getter.get(endpoint, _request_key(endpoint, params), fetch)
+    _index_response(endpoint, value)
+    return value
+
+def _search_index() -> SearchIndex:
+    """
+    Get the search index of the selected athlete.
+    """
+    return search_indexes.get(current_athlete())
+
+def _index_response(endpoint: str, value) -> None:
+    """
+    Add the activities and workouts of a Garmin Connect response to the search index.
+    """
+    if not value:
+        return
+    if endpoint == LIST_WORKOUTS_ENDPOINT and isinstance(value, list):
+        _search_index().add_workouts(value)
+    elif endpoint == LIST_ACTIVITIES_ENDPOINT and isinstance(value, list):
+        _search_index().add_activities(value)
+    elif endpoint.startswith(GET_WORKOUT_ENDPOINT.split("{")[0]) and isinstance(value, dict):
+        _search_index().add("workout", workout_document(value))
+    elif (endpoint.startswith(GET_ACTIVITY_ENDPOINT.split("{")[0]) and not endpoint.endswith("/weather")
+          and isinstance(value, dict)):
+        _search_index().add("activity", activity_document(value))
+
+def _invalidate(key: str):
+    """
+    Remove a changed response from the response cache and from the stale responses of the circuit breaker.
+    """
+    response_cache.invalidate(key)
+    getter.stale.invalidate(key)
+
+def _request_key(endpoint: str, params: dict = None) -> str:
+    """
+    Build the cache key of a GET request for the selected athlete.
+    """
+    if params:
+        endpoint += "?" + urlencode(sorted(params.items()))
+    return cache_key(endpoint)
+
 @mcp.tool
+@with_athlete
+@with_deadline
+@paged()
 def get_activity(activity_id: str) -> dict:
     """
     Get details of a specific activity by its ID. An activity represents a completed run, ride, swim, etc.
@@ -61,17 +226,25 @@ def get_activity(activity_id: str) -> dict:
         activity_id: ID of the activity to retrieve. As returned by the `get_calendar` tool.
 
     Returns:
-        Activity details as a dictionary.
+        Activity details as a dictionary. If they exceed the response size budget (GARMIN_RESPONSE_BUDGET),
+        only the first fields are returned with a `nextCursor` for the rest.
     """
     endpoint = GET_ACTIVITY_ENDPOINT.format(activity_id=activity_id)
-    activity = garth.connectapi(endpoint)
+    activity = _cached_get(endpoint)
     return activity
 
 @mcp.tool
-def list_activities(limit: int = 20, start: int = 0, activityType: str = None, search: str = None) -> dict:
+@with_athlete
+@with_deadline
+@paged("activities")
+def list_activities(limit: int = 20, start: int = 0, activityType: str = None, search: str = None,
+                    fields: List[str] = None, min_distance: float = None, min_duration: float = None) -> dict:
     """
     List activities (completed runs, rides, swims, etc.) from Garmin Connect.
 
+    Large lists (GARMIN_STREAM_THRESHOLD or more activities, default 100) are parsed one activity at a time
+    from the response stream, with the projection and filters applied on the fly.
+
     Args:
         limit: Number of activities to return (default=20)
         start: Starting position for pagination (default=0)
@@ -83,9 +256,15 @@ def list_activities(limit: int = 20, start: int = 0, activityType: str = None, s
             - "safety", "skate_skiing_ws", "surfing", "swimming", "walking"
             - "windsurfing", "winter_sports", "yoga"
         search: Search for activities containing this string in their name
+        fields: Activity fields to return (default: all fields), e.g. ["activityId", "activityName",
+            "startTimeLocal", "distance", "duration"]. Nested fields can be selected with dots.
+        min_distance: Only return activities of at least this distance in meters. Applied to the
+            `limit` activities fetched, so fewer activities may be returned.
+        min_duration: Only return activities of at least this duration in seconds. Applied like min_distance.
 
     Returns:
-        A dictionary containing a list of activities and pagination info.
+        A dictionary containing a list of activities and pagination info. If the list exceeds the response
+        size budget (GARMIN_RESPONSE_BUDGET), only the first activities are returned with a `nextCursor`.
     """
     params = {
         "limit": limit,
@@ -98,10 +277,146 @@ def list_activities(limit: int = 20, start: int = 0, activityType: str = None, s
     if search is not None:
         params["search"] = search
 
-    activities = garth.connectapi(LIST_ACTIVITIES_ENDPOINT, "GET", params=params)
+    select = partial(_select_activities, fields=fields, min_distance=min_distance, min_duration=min_duration)
+
+    if limit >= int(os.environ.get("GARMIN_STREAM_THRESHOLD", DEFAULT_STREAM_THRESHOLD)):
+        with open_stream(LIST_ACTIVITIES_ENDPOINT, params=params) as response:
+            chunks = iter_until_deadline(response.iter_content(chunk_size=CHUNK_SIZE))
+            return {"activities": list(select(_indexed_activities(iter_json_array(chunks))))}
+
+    activities = _cached_get(LIST_ACTIVITIES_ENDPOINT, params)
+    if activities and (fields or min_distance is not None or min_duration is not None):
+        activities = list(select(activities))
     return {"activities": activities}
 
+def _indexed_activities(activities):
+    """
+    Add activities to the search index one at a time as they are parsed.
+    """
+    index = _search_index()
+    for activity in activities:
+        if isinstance(activity, dict):
+            index.add("activity", activity_document(activity))
+        yield activity
+
+def _select_activities(activities, fields: List[str] = None, min_distance: float = None,
+                       min_duration: float = None):
+    """
+    Filter and project activity summaries one at a time.
+    """
+    for activity in activities:
+        if min_distance is not None and (activity.get("distance") or 0) < min_distance:
+            continue
+        if min_duration is not None and (activity.get("duration") or 0) < min_duration:
+            continue
+        yield _project(activity, fields) if fields else activity
+
+@mcp.tool
+@with_athlete
+def search(query: str, kind: str = None, activityType: str = None, limit: int = 20) -> dict:
+    """
+    Search activities and workouts by name, description and type in a local index, without contacting Garmin Connect.
+
+    The index contains the activities and workouts returned by `list_activities`, `list_workouts`,
+    `get_activity` and `get_workout`, and is updated with every response. Calendar items are not indexed. Words match
+    whole words and word beginnings, e.g. "tempo 10k" finds "Tempo Run 10km". Names weigh more than
+    types and descriptions.
+
+    Args:
+        query: The words to search for. All words must match.
+        kind: Only return "activity" or "workout" results (default: both)
+        activityType: Only return results of this activity or sport type, e.g. "running"
+        limit: Maximum number of results (default=20)
+
+    Returns:
+        The results with kind, id, name, type, date and score, best matches and newest first, and the
+        number of indexed activities and workouts. Call `list_activities` or `list_workouts` to index
+        more of them.
+
+    Raises:
+        ValueError: If the kind is invalid.
+    """
+    if kind is not None and kind not in KINDS:
+        raise ValueError(f"Kind must be one of {', '.join(KINDS)}, got {kind}")
+
+    index = _search_index()
+    return {
+        "results": index.search(query, kind=kind, activity_type=activityType, limit=limit),
+        "indexed": index.counts(),
+    }
+
 @mcp.tool
+@with_athlete
+@with_deadline
+def get_training_summary(start_date: str, end_date: str = None, activityType: str = None,
+                         period: str = "week") -> dict:
+    """
+    Get aggregated training volume and load over a date range, e.g. weekly volume by sport
+    over the last two years. Only the aggregates are returned, not the activities.
+
+    Args:
+        start_date: First day of the range in ISO format (YYYY-MM-DD).
+        end_date: Last day of the range in ISO format (YYYY-MM-DD). Defaults to today.
+        activityType: Only include activities of this type (see `list_activities`).
+        period: Group totals by "week" (starting on Monday, default) or "month".
+
+    Returns:
+        Totals per period (count, hours, km, load, hours by sport, acute and chronic load at the
+        end of the period), totals per sport, and the acute/chronic load at the end of the range.
+        Load is Garmin's training load, or minutes of activity where no training load is available.
+
+    Raises:
+        ValueError: If the dates or period are invalid.
+    """
+    try:
+        first = datetime.strptime(start_date, "%Y-%m-%d").date()
+        last = datetime.strptime(end_date, "%Y-%m-%d").date() if end_date else datetime.now().date()
+    except ValueError:
+        raise ValueError("Dates must be in ISO format (YYYY-MM-DD)")
+
+    if first > last:
+        raise ValueError(f"start_date must not be after end_date, got {start_date} > {last}")
+
+    if period not in ("week", "month"):
+        raise ValueError(f"Period must be 'week' or 'month', got {period}")
+
+    # Fetch the weeks before start_date as well to warm up the chronic load
+    activities = _list_all_activities(first - timedelta(days=CHRONIC_LOAD_DAYS - 1), last, activityType)
+    return aggregate_training(activities_to_columns(activities), first, last, period)
+
+def _list_all_activities(start_date, end_date, activityType: str = None) -> list:
+    """
+    Page through all activities between two dates, from the response cache or from Garmin Connect.
+
+    Args:
+        start_date: First day of the range.
+        end_date: Last day of the range.
+        activityType: Optional activity type filter.
+
+    Returns:
+        The list of activity summaries.
+    """
+    activities = []
+    params = {
+        "startDate": start_date.isoformat(),
+        "endDate": end_date.isoformat(),
+        "limit": ACTIVITY_PAGE_SIZE,
+        "start": 0,
+    }
+
+    if activityType is not None:
+        params["activityType"] = activityType
+
+    while True:
+        page = _cached_get(LIST_ACTIVITIES_ENDPOINT, dict(params)) or []
+        activities.extend(page)
+        if len(page) < ACTIVITY_PAGE_SIZE:
+            return activities
+        params["start"] += ACTIVITY_PAGE_SIZE
+
+@mcp.tool
+@with_athlete
+@with_deadline
 def get_activity_weather(activity_id: str) -> dict:
     """
     Get weather information for a specific activity.
@@ -113,20 +428,228 @@ def get_activity_weather(activity_id: str) -> dict:
         Weather details as a dictionary containing temperature, conditions, etc.
     """
     endpoint = GET_ACTIVITY_WEATHER_ENDPOINT.format(activity_id=activity_id)
-    weather = garth.connectapi(endpoint)
+    weather = _get(endpoint)
     return weather
 
 @mcp.tool
-def schedule_workout(workout_id: str, date: str) -> dict:
+@with_athlete
+@with_deadline
+def get_activities(activity_ids: List[str], fields: List[str] = None, include_weather: bool = True) -> dict:
+    """
+    Get details and weather for multiple activities at once. Requests are sent concurrently.
+
+    Args:
+        activity_ids: IDs of the activities to retrieve. As returned by the `list_activities` or `get_calendar` tools.
+        fields: Activity fields to return (default: all fields). Nested fields can be selected with dots,
+            e.g. ["activityName", "summaryDTO.distance", "summaryDTO.averageHR"]
+        include_weather: Whether to include the weather for each activity (default=True)
+
+    Returns:
+        A dictionary containing one entry per activity ID, in the requested order. Entries for
+        which a request failed contain an `errors` dictionary instead of the failed part. If the
+        time budget of the call ran out, `incomplete` is true and the unfinished parts have errors.
+    """
+    parts = ["activity", "weather"] if include_weather else ["activity"]
+    requests = [(activity_id, part) for activity_id in activity_ids for part in parts]
+
+    def fetch(request):
+        activity_id, part = request
+        if part == "weather":
+            return _get(GET_ACTIVITY_WEATHER_ENDPOINT.format(activity_id=activity_id))
+        return _get(GET_ACTIVITY_ENDPOINT.format(activity_id=activity_id))
+
+    entries = {activity_id: {"activityId": activity_id} for activity_id in activity_ids}
+    results = run_concurrently(fetch, requests)
+    for (activity_id, part), (result, error) in zip(requests, results):
+        entry = entries[activity_id]
+        if error is not None:
+            entry.setdefault("errors", {})[part] = str(error)
+        elif part == "activity" and fields:
+            entry[part] = _project(result, fields)
+        else:
+            entry[part] = result
+
+    return _mark_incomplete({"activities": list(entries.values())}, results)
+
+def _mark_incomplete(response: dict, results: list) -> dict:
+    """
+    Mark a batch response as incomplete if any of its requests ran out of the time budget.
+    """
+    if any(isinstance(error, DeadlineExceeded) for _, error in results):
+        response["incomplete"] = True
+    return response
+
+def _project(data, fields: List[str]):
+    """
+    Keep only the given fields of a dictionary. Nested fields are selected with dots.
+
+    Args:
+        data: The dictionary to project.
+        fields: The field paths to keep, e.g. "summaryDTO.distance".
+
+    Returns:
+        A new dictionary containing only the selected fields that exist in data.
+    """
+    if not isinstance(data, dict):
+        return data
+
+    projected = {}
+    for field in fields:
+        source, target = data, projected
+        *parents, leaf = field.split(".")
+        for parent in parents:
+            if not isinstance(source, dict) or not isinstance(source.get(parent), dict):
+                break
+            source = source[parent]
+            target = target.setdefault(parent, {})
+        else:
+            if isinstance(source, dict) and leaf in source:
+                target[leaf] = source[leaf]
+    return projected
+
+@mcp.tool
+@with_athlete
+@with_deadline
+def get_activity_fit(activity_id: str, message: str = "record", fields: List[str] = None,
+                     start: int = None, stop: int = None, step: int = 1) -> dict:
+    """
+    Get lap and record data from the original FIT file of an activity.
+
+    The FIT file is downloaded once into the local archive (GARMIN_ARCHIVE_DIR) and
+    parsed from a memory map on every call.
+
+    Args:
+        activity_id: ID of the activity to retrieve the FIT file for.
+        message: FIT message type to return, one of "record", "lap" or "session" (default="record")
+        fields: Names of the fields to return (default: all fields with data), e.g.
+            "timestamp", "heart_rate", "speed", "distance", "power", "cadence", "altitude"
+        start: Index of the first row to return. If neither start nor stop is given, only
+               a summary (count, min, max, mean per field) is returned.
+        stop: Index after the last row to return
+        step: Step between returned rows (default=1), e.g. 10 for every 10th record
+
+    Returns:
+        Message counts, a per-field summary and, if requested, a slice of the columns.
+
+    Raises:
+        ValueError: If the message type, fields or slice are invalid.
+    """
+    if step < 1:
+        raise ValueError(f"Step must be at least 1, got {step}")
+
+    path = download_activity_fit(activity_id)
+    messages = parse_fit_file(path)
+
+    if message not in messages:
+        raise ValueError(f"Unsupported FIT message: {message}")
+
+    selected = messages[message]
+    result = {
+        "activityId": activity_id,
+        "file": path,
+        "counts": {name: len(values) for name, values in messages.items()},
+        "summary": selected.summary(fields),
+    }
+
+    if start is not None or stop is not None:
+        rows = len(range(*slice(start, stop, step).indices(len(selected))))
+        if rows > MAX_FIT_SLICE_ROWS:
+            raise ValueError(f"Slice returns {rows} rows, maximum is {MAX_FIT_SLICE_ROWS}. Use a larger step.")
+        result["slice"] = selected.slice(start, stop, step, fields)
+
+    return result
+
+@mcp.tool
+@with_athlete
+@with_deadline
+def get_activity_track(activity_id: str, tolerance: float = None, max_points: int = 500) -> dict:
+    """
+    Get the GPS track of an activity as a simplified encoded polyline.
+
+    The track is read from the original FIT file (see get_activity_fit) and simplified with the
+    Douglas-Peucker algorithm until no dropped point is farther than the tolerance from the
+    simplified track or the point budget is used up, whichever comes first.
+
+    Args:
+        activity_id: ID of the activity to retrieve the track for.
+        tolerance: Maximum distance in meters of a dropped point from the simplified track, e.g. 5
+        max_points: Maximum number of points returned (default=500, maximum 5000)
+
+    Returns:
+        The track as a Google encoded polyline (precision 5), the number of returned and
+        original points, the maximum distance in meters of a dropped point and the bounds
+        of the track. Activities without GPS data return an empty polyline.
+
+    Raises:
+        ValueError: If the tolerance or point budget is invalid.
+    """
+    if tolerance is not None and tolerance < 0:
+        raise ValueError(f"Tolerance must not be negative, got {tolerance}")
+    if max_points is None:
+        max_points = MAX_TRACK_POINTS
+    if not 2 <= max_points <= MAX_TRACK_POINTS:
+        raise ValueError(f"Point budget must be between 2 and {MAX_TRACK_POINTS}, got {max_points}")
+
+    path = download_activity_fit(activity_id)
+    records = parse_fit_file(path)["record"].columns
+
+    with span("simplify", activityId=activity_id) as simplify_span:
+        track = simplify_track(records["position_lat"], records["position_long"], tolerance, max_points)
+        simplify_span.set("points", track["originalPoints"])
+
+    return {"activityId": activity_id, **track}
+
+def download_activity_fit(activity_id: str) -> str:
+    """
+    Stream the original FIT file of an activity into the local archive.
+
+    Args:
+        activity_id: ID of the activity to download.
+
+    Returns:
+        Path of the archived FIT file.
+
+    Raises:
+        ValueError: If the activity ID is not numeric.
+    """
+    # The ID is used as a file name and in the endpoint, so it must not contain path separators
+    if not str(activity_id).isdigit():
+        raise ValueError(f"Invalid activity ID: {activity_id}")
+    archive_dir = os.path.expanduser(os.environ.get("GARMIN_ARCHIVE_DIR", "~/.garmin-workouts-mcp/activities"))
+    if current_athlete():
+        archive_dir = os.path.join(archive_dir, current_athlete())
+    path = os.path.join(archive_dir, f"{activity_id}.fit")
+    if os.path.exists(path):
+        return path
+
+    endpoint = DOWNLOAD_ACTIVITY_ENDPOINT.format(activity_id=activity_id)
+    response = call_with_deadline(partial(current_client().get, "connectapi", endpoint, api=True, stream=True))
+    try:
+        save_fit_stream(iter_until_deadline(response.iter_content(chunk_size=CHUNK_SIZE)), path)
+    finally:
+        response.close()
+
+    logger.info("Archived FIT file for activity %s at %s", activity_id, path)
+    return path
+
+@mcp.tool
+@with_athlete
+@with_deadline
+def schedule_workout(workout_id: str, date: str, idempotency_key: str = None) -> dict:
     """
     Schedule a workout on Garmin Connect.
 
+    If the write queue is enabled (GARMIN_WRITE_QUEUE), the schedule is queued and sent in the
+    background, and a ticket is returned immediately. Check it with `get_write_status`.
+
     Args:
-        workout_id: ID of the workout to schedule.
+        workout_id: ID of the workout to schedule, or the ticket of a queued upload of the workout.
         date: Date to schedule the workout in ISO format (YYYY-MM-DD).
+        idempotency_key: Identifies this schedule if the call is repeated, so that it is queued only once
+            (default: derived from the workout and date). Only used with the write queue.
 
     Returns:
-        workoutScheduleId: ID of the scheduled workout.
+        workoutScheduleId: ID of the scheduled workout, or the ticket and status of the queued schedule.
 
     Raises:
         ValueError: If the date format is incorrect.
@@ -139,19 +662,40 @@ def schedule_workout(workout_id: str, date: str) -> dict:
     except ValueError:
         raise ValueError("Date must be in ISO format (YYYY-MM-DD)")
 
+    if write_queue.enabled:
+        return write_queue.enqueue("schedule_workout", {"workout_id": str(workout_id), "date": date},
+                                   current_athlete(), idempotency_key)
+    if str(workout_id).startswith(TICKET_PREFIX):
+        raise ValueError("Tickets can only be scheduled with the write queue (GARMIN_WRITE_QUEUE)")
+
+    return {"workoutScheduleId": _schedule_workout(workout_id, date)}
+
+def _schedule_workout(workout_id: str, date: str) -> str:
+    """
+    Schedule a workout on a validated date.
+
+    Returns:
+        The ID of the scheduled workout.
+
+    Raises:
+        Exception: If scheduling the workout fails.
+    """
     payload = {
         "date": date,
     }
 
     endpoint = SCHEDULE_WORKOUT_ENDPOINT.format(workout_id=workout_id)
-    result = garth.connectapi(endpoint, method="POST", json=payload)
+    result = _send_json(endpoint, payload)
+    _invalidate_calendar(date)
     workout_scheduled_id = result.get("workoutScheduleId")
     if workout_scheduled_id is None:
         raise Exception(f"Scheduling workout failed: {result}")
 
-    return {"workoutScheduleId": str(workout_scheduled_id)}
+    return str(workout_scheduled_id)
 
 @mcp.tool
+@with_athlete
+@with_deadline
 def delete_workout(workout_id: str) -> bool:
     """
     Delete a workout from Garmin Connect.
@@ -163,9 +707,12 @@ def delete_workout(workout_id: str) -> bool:
         True if the deletion was successful, False otherwise.
     """
     endpoint = GET_WORKOUT_ENDPOINT.format(workout_id=workout_id)
+    _invalidate(cache_key(endpoint))
+    _invalidate(_request_key(LIST_WORKOUTS_ENDPOINT))
 
     try:
-        garth.connectapi(endpoint, method="DELETE")
+        connectapi(endpoint, method="DELETE")
+        _search_index().remove("workout", workout_id)
         logger.info("Workout %s deleted successfully", workout_id)
         return True
     except Exception as e:
@@ -173,46 +720,705 @@ def delete_workout(workout_id: str) -> bool:
         return False
 
 @mcp.tool
-def upload_workout(workout_data: dict) -> dict:
+@with_athlete
+@with_deadline
+def upload_workout(workout_data: dict, idempotency_key: str = None) -> dict:
     """
     Uploads a structured workout to Garmin Connect.
 
+    If the write queue is enabled (GARMIN_WRITE_QUEUE), the validated workout is queued and uploaded
+    in the background, and a ticket is returned immediately. Check it with `get_write_status`, or pass
+    it to `schedule_workout` in place of the workout ID.
+
     Args:
         workout_data: Workout data in JSON format to upload. Use the `generate_workout_data_prompt` tool to create a prompt for the LLM to generate this data.
+        idempotency_key: Identifies this upload if the call is repeated, so that it is queued only once
+            (default: derived from the workout data). Only used with the write queue.
 
     Returns:
-        The uploaded workout's ID on Garmin Connect.
+        The uploaded workout's ID on Garmin Connect, or the ticket and status of the queued upload.
 
     Raises:
         Exception: If the upload fails or the workout ID is not returned.
     """
 
-    logger.info("Workout data received from client: %s", workout_data)
+    with span("log"):
+        logger.info("Workout data received from client: %s", workout_data)
 
     try:
+        # Report all validation errors at once instead of the first one found by make_payload
+        with span("validate"):
+            validation = validate_workout_data(workout_data)
+        if not validation["valid"]:
+            raise ValueError("Invalid workout data: " + "; ".join(validation["errors"]))
+
         # Convert to Garmin payload format
-        payload = make_payload(workout_data)
+        with span("compile"):
+            payload = make_payload(workout_data)
 
         # logging the payload for debugging
-        logger.info("Payload to be sent to Garmin Connect: %s", payload)
+        with span("log"):
+            logger.info("Payload to be sent to Garmin Connect: %s", payload)
+
+        if write_queue.enabled:
+            return write_queue.enqueue("upload_workout", payload, current_athlete(), idempotency_key)
+
+        return {"workoutId": _create_workout(payload)}
+
+    except Exception as e:
+        raise Exception(f"Failed to upload workout to Garmin Connect: {str(e)}")
+
+@mcp.tool
+@with_athlete
+@with_deadline
+def update_workout(workout_id: str, workout_data: dict) -> dict:
+    """
+    Updates an existing workout on Garmin Connect in place, keeping its ID and scheduled calendar entries.
+
+    Args:
+        workout_id: ID of the workout to update.
+        workout_data: The complete new workout data in the same format as for `upload_workout`. Use
+            `get_workout` with `compact=True` to get the current workout data for editing.
+
+    Returns:
+        The workout ID and whether the workout was updated. Nothing is sent if the workout is unchanged.
+
+    Raises:
+        Exception: If the workout data is invalid, the workout does not exist or the update fails.
+    """
+    with span("log"):
+        logger.info("Workout data received from client for workout %s: %s", workout_id, workout_data)
+
+    try:
+        with span("validate"):
+            validation = validate_workout_data(workout_data)
+        if not validation["valid"]:
+            raise ValueError("Invalid workout data: " + "; ".join(validation["errors"]))
+
+        with span("compile"):
+            payload = make_payload(workout_data)
+
+        current = _get_workout(workout_id)
+        if not current:
+            raise ValueError(f"Workout {workout_id} not found")
+
+        # Compare in the compact format, which ignores server-assigned fields such as step IDs
+        if make_workout_data(current) == make_workout_data(payload):
+            logger.info("Workout %s is unchanged, skipping update", workout_id)
+            return {"workoutId": str(workout_id), "updated": False}
+
+        _put_workout(workout_id, current, payload)
+        logger.info("Workout %s updated successfully", workout_id)
+
+        return {"workoutId": str(workout_id), "updated": True}
+
+    except Exception as e:
+        raise Exception(f"Failed to update workout on Garmin Connect: {str(e)}")
+
+def _put_workout(workout_id: str, current: dict, payload: dict) -> None:
+    """
+    Replace the content of an existing workout with a compiled Garmin payload.
+
+    Args:
+        workout_id: ID of the workout to update.
+        current: The current workout as returned by Garmin Connect.
+        payload: The compiled workout payload.
+    """
+    endpoint = GET_WORKOUT_ENDPOINT.format(workout_id=workout_id)
+    workout = {**current, **payload, "workoutId": current.get("workoutId", workout_id)}
+    _send_json(endpoint, workout, method="PUT")
+    _search_index().add("workout", workout_document(workout))
+    _invalidate(cache_key(endpoint))
+    _invalidate(_request_key(LIST_WORKOUTS_ENDPOINT))
 
-        # Create workout on Garmin Connect
-        result = garth.connectapi("/workout-service/workout", method="POST", json=payload)
+def _create_workout(payload: dict) -> str:
+    """
+    Create a workout from a compiled Garmin payload.
+
+    Returns:
+        The ID of the created workout.
+
+    Raises:
+        Exception: If no workout ID is returned.
+    """
+    # Create workout on Garmin Connect
+    result = _send_json(CREATE_WORKOUT_ENDPOINT, payload)
+    _invalidate(_request_key(LIST_WORKOUTS_ENDPOINT))
 
-        # logging the result for debugging
+    # logging the result for debugging
+    with span("log"):
         logger.info("Response from Garmin Connect: %s", result)
 
-        workout_id = result.get("workoutId")
+    workout_id = result.get("workoutId")
+
+    if workout_id is None:
+        raise Exception("No workout ID returned")
+
+    _search_index().add("workout", workout_document({**payload, **result}))
+    return str(workout_id)
+
+def _send_json(endpoint: str, payload: dict, method: str = "POST"):
+    """
+    Send a JSON request body serialized with the fast JSON backend.
+
+    Args:
+        endpoint: The Garmin Connect API endpoint.
+        payload: The request body.
+        method: The HTTP method (default="POST").
+
+    Returns:
+        The decoded response.
+    """
+    with span("encode") as encode_span:
+        data = dumps_bytes(payload)
+        encode_span.set("bytes", len(data))
+    return connectapi(endpoint, method=method, data=data, headers=dict(JSON_HEADERS))
+
+@mcp.tool
+@with_athlete
+def get_write_status(ticket: str = None) -> dict:
+    """
+    Get the status of uploads and schedules queued with the write queue (GARMIN_WRITE_QUEUE).
+
+    Args:
+        ticket: Ticket returned by `upload_workout` or `schedule_workout`. If omitted, the number of
+                operations per status and the most recent unfinished operations are returned.
+
+    Returns:
+        The status ("queued", "running", "done" or "failed"), attempts, result and last error of the
+        operation, or a summary of the queue.
+
+    Raises:
+        ValueError: If the write queue is disabled or the ticket is unknown.
+    """
+    if not write_queue.enabled:
+        raise ValueError("The write queue requires GARMIN_WRITE_QUEUE to be set.")
+    if ticket is None:
+        return write_queue.summary(current_athlete())
+    status = write_queue.get(ticket, current_athlete())
+    if status is None:
+        raise ValueError(f"Unknown ticket: {ticket}")
+    return status
+
+def _flush_upload(payload: dict) -> dict:
+    return {"workoutId": _create_workout(payload)}
+
+def _reconcile_upload(payload: dict, queued_at: float):
+    """
+    Find a workout created by an earlier attempt of a queued upload.
+
+    Workouts with the name of the upload created since it was queued are compared by their steps,
+    and workouts already created by other queued uploads are skipped, so that an identical workout
+    uploaded separately is not mistaken for this upload.
+    """
+    _invalidate(_request_key(LIST_WORKOUTS_ENDPOINT))
+    resolved = {str(result.get("workoutId"))
+                for result in write_queue.completed_results("upload_workout", current_athlete())}
+    fingerprint = workout_fingerprint(payload)
+    # Creation dates are local to the account, allow for a day of time zone difference
+    since = (datetime.fromtimestamp(queued_at) - timedelta(days=1)).date().isoformat()
+    for workout in _get(LIST_WORKOUTS_ENDPOINT) or []:
+        workout_id = str(workout.get("workoutId"))
+        if (workout_id in resolved or workout.get("workoutName") != payload.get("workoutName")
+                or (workout.get("createdDate") or "") < since):
+            continue
+        # The workout list has no steps
+        created = _get(GET_WORKOUT_ENDPOINT.format(workout_id=workout_id))
+        if created and workout_fingerprint(created) == fingerprint:
+            return {"workoutId": workout_id}
+    return None
+
+def _flush_schedule(payload: dict) -> dict:
+    workout_id = write_queue.resolve(payload["workout_id"], "workoutId")
+    return {"workoutId": workout_id, "workoutScheduleId": _schedule_workout(workout_id, payload["date"])}
+
+def _reconcile_schedule(payload: dict, queued_at: float):
+    """
+    Find the calendar entry created by an earlier attempt of a queued schedule.
+    """
+    workout_id = write_queue.resolve(payload["workout_id"], "workoutId")
+    day = parse_date(payload["date"], "date")
+    for item in _scheduled_workouts(day, day):
+        if item["workoutId"] == workout_id:
+            return {"workoutId": workout_id, "workoutScheduleId": item["scheduleId"]}
+    return None
+
+write_queue.register("upload_workout", _flush_upload, _reconcile_upload)
+write_queue.register("schedule_workout", _flush_schedule, _reconcile_schedule)
+
+@mcp.tool
+def validate_workout(workout_data: dict) -> dict:
+    """
+    Check structured workout data before uploading it, without sending anything to Garmin Connect.
+    All errors are reported at once.
+
+    Args:
+        workout_data: Workout data in JSON format, as accepted by the `upload_workout` tool.
+
+    Returns:
+        valid: Whether the workout can be uploaded.
+        errors: All problems that prevent the upload, with the path of the affected step.
+        warnings: Input that is accepted but probably not intended, e.g. unknown step types.
+        estimatedDurationInSecs: The estimated duration of the workout, if it is valid.
+    """
+    result = validate_workout_data(workout_data)
+    if result["valid"]:
+        result["estimatedDurationInSecs"] = make_payload(workout_data)["estimatedDurationInSecs"]
+    return result
+
+@mcp.tool
+@with_athlete
+@with_deadline
+def create_training_plan(plan: dict, dry_run: bool = False) -> dict:
+    """
+    Generate, upload and schedule a complete training block in one call.
+
+    The plan template is expanded locally into one workout per week and template workout,
+    all workouts are compiled before anything is sent, and the uploads and schedules are then
+    sent with bounded concurrency.
+
+    Args:
+        plan: Plan template in JSON format:
+            {
+            "name": "Base",                      (optional prefix for workout names)
+            "startDate": "YYYY-MM-DD",           (first day of week 1)
+            "weeks": 8,
+            "deload": {"every": 4, "factor": 0.7},   (optional, shortens every 4th week to 70%)
+            "workouts": [
+                {
+                "day": "tuesday" | 0-6,          (weekday name or offset from the start date)
+                "workout": workout_data,         (same format as for `upload_workout`)
+                "progression": {                 (optional, applied per week)
+                    "stepDuration": {"percent": 5, "stepTypes": ["interval"], "max": 1800},
+                    "stepDistance": {"add": 0.5, "every": 2},
+                    "numberOfIterations": {"add": 1, "max": 10}
+                    }
+                }
+            ]
+            }
+        dry_run: If true, only expand and compile the plan without uploading anything (default=False)
+
+    Returns:
+        One entry per scheduled workout with date, workout name, estimated duration and, unless
+        dry_run is set, the workoutId and workoutScheduleId or the error of that workout. If the
+        time budget of the call ran out, `incomplete` is true and the unfinished workouts have errors.
+
+    Raises:
+        ValueError: If the plan template is invalid or any workout fails to compile.
+    """
+    entries = expand_plan(plan)
+    _compile_entries(entries)
+
+    results = [
+        {
+            "date": entry["date"],
+            "workoutName": entry["payload"]["workoutName"],
+            "estimatedDurationInSecs": entry["payload"]["estimatedDurationInSecs"],
+        }
+        for entry in entries
+    ]
+    if dry_run:
+        return {"workouts": results}
+
+    uploads = run_concurrently(_upload_and_schedule, entries)
+    for result, (ids, error) in zip(results, uploads):
+        if error is not None:
+            result["error"] = str(error)
+        else:
+            result.update(ids)
+
+    logger.info("Training plan with %d workouts created", len(entries))
+    return _mark_incomplete({"workouts": results}, uploads)
+
+@mcp.tool
+@with_athlete
+@with_deadline
+def sync_plan(plan: dict = None, entries: List[dict] = None, name_prefix: str = None, end_date: str = None,
+              check_content: bool = True, dry_run: bool = False) -> dict:
+    """
+    Bring the Garmin calendar in line with a changed training plan, sending only the necessary changes.
+
+    The calendar months covered by the plan are fetched and compared with the desired workouts by date
+    and workout name. Only the resulting operations are sent, concurrently:
+    - update: a scheduled workout whose content changed is updated in place
+    - schedule: a workout that moved to another date is scheduled there (its old date is unscheduled)
+    - upload: a new workout is uploaded and scheduled
+    - unschedule: a scheduled plan workout that is no longer part of the plan is removed from the calendar
+
+    Args:
+        plan: Plan template in the same format as for `create_training_plan`. Either plan or entries is required.
+        entries: The desired workouts as a list of {"date": "YYYY-MM-DD", "workout": workout_data}.
+        name_prefix: Scheduled workouts whose name starts with this prefix belong to the plan and are
+            unscheduled if they are not part of it anymore. Defaults to the plan name. Without a prefix
+            only scheduled workouts with the same name as a desired workout are considered.
+        end_date: Last day of the calendar range to sync in ISO format (YYYY-MM-DD). Defaults to the last
+            day of the plan or the last entry. Use a later date to remove workouts after the end of a
+            shortened plan.
+        check_content: Compare the content of already scheduled workouts and update changed ones. Costs
+            one request per scheduled workout (default=True).
+        dry_run: If true, only compute the operations without sending them (default=False)
+
+    Returns:
+        The operations with their date, workout name and IDs or error, and the number of
+        unchanged workouts. If the time budget of the call ran out, `incomplete` is true and the
+        unfinished operations have errors.
+
+    Raises:
+        ValueError: If the plan or entries are invalid or any workout fails to compile.
+    """
+    if (plan is None) == (entries is None):
+        raise ValueError("Either plan or entries must be provided.")
+
+    if plan is not None:
+        entries = expand_plan(plan)
+        first = parse_date(plan["startDate"], "startDate")
+        last = first + timedelta(weeks=plan["weeks"], days=-1)
+        if name_prefix is None:
+            name_prefix = plan.get("name")
+    else:
+        if not entries:
+            raise ValueError("Entries must contain at least one workout.")
+        entries = [dict(entry) for entry in entries]
+        dates = [parse_date(entry.get("date"), "date") for entry in entries]
+        first, last = min(dates), max(dates)
+    if end_date is not None:
+        last = max(last, parse_date(end_date, "end_date"))
+
+    _compile_entries(entries)
+    for entry in entries:
+        entry["name"] = entry["payload"]["workoutName"]
+
+    names = {entry["name"] for entry in entries}
+
+    def is_managed(item: dict) -> bool:
+        if name_prefix:
+            return (item["name"] or "").startswith(name_prefix)
+        return item["name"] in names
+
+    scheduled = [item for item in _scheduled_workouts(first, last) if is_managed(item)]
+
+    diff = diff_schedule(entries, scheduled)
+
+    updates = {}
+    if check_content:
+        candidates = {}
+        for entry, item in diff["keep"] + diff["move"]:
+            candidates.setdefault(item["workoutId"], entry)
+        for (workout_id, entry), (current, error) in zip(candidates.items(),
+                                                         run_concurrently(_get_workout, list(candidates))):
+            if error is not None:
+                raise Exception(f"Failed to get workout {workout_id}: {error}")
+            if current and make_workout_data(current) != make_workout_data(entry["payload"]):
+                updates[workout_id] = (entry, current)
+
+    tasks = []
+    for workout_id, (entry, current) in updates.items():
+        tasks.append(({"operation": "update", "date": entry["date"], "workoutName": entry["name"],
+                       "workoutId": workout_id},
+                      partial(_put_workout, workout_id, current, entry["payload"])))
+    for entry, item in diff["move"]:
+        tasks.append(({"operation": "schedule", "date": entry["date"], "workoutName": entry["name"],
+                       "workoutId": item["workoutId"]},
+                      partial(_reschedule_workout, item["workoutId"], entry["date"])))
+    for entry in diff["upload"]:
+        tasks.append(({"operation": "upload", "date": entry["date"], "workoutName": entry["name"]},
+                      partial(_upload_and_schedule, entry)))
+    for item in diff["unschedule"]:
+        tasks.append(({"operation": "unschedule", "date": item["date"], "workoutName": item["name"],
+                       "workoutId": item["workoutId"], "workoutScheduleId": item["scheduleId"]},
+                      partial(_unschedule_workout, item["scheduleId"], item["date"])))
+
+    operations = [operation for operation, _ in tasks]
+    unchanged = sum(1 for _, item in diff["keep"] if item["workoutId"] not in updates)
+    if dry_run:
+        return {"operations": operations, "unchanged": unchanged}
+
+    results = run_concurrently(lambda task: task[1](), tasks)
+    for operation, (result, error) in zip(operations, results):
+        if error is not None:
+            operation["error"] = str(error)
+        elif result:
+            operation.update(result)
+
+    logger.info("Training plan synced with %d operations, %d workouts unchanged", len(operations), unchanged)
+    return _mark_incomplete({"operations": operations, "unchanged": unchanged}, results)
+
+def _compile_entries(entries: List[dict], label: str = "date", title: str = "Invalid plan workouts") -> None:
+    """
+    Validate and compile the workout of every plan entry, storing the Garmin payload in the entry.
 
-        if workout_id is None:
-            raise Exception("No workout ID returned")
+    Entries that already have a Garmin payload, e.g. imported in Garmin's format, are only checked.
 
-        return {"workoutId": str(workout_id)}
+    Args:
+        entries: The entries with the workout data to compile.
+        label: The entry field identifying an entry in error messages (default="date").
+        title: The first line of the error message.
 
+    Raises:
+        ValueError: If any workout is invalid, listing the errors of all workouts.
+    """
+    errors = []
+    for entry in entries:
+        if "payload" in entry:
+            name = entry["payload"].get("workoutName")
+            errors.extend(f"{entry.get(label)} {name}: {error}" for error in validate_garmin_workout(entry["payload"]))
+            continue
+        workout = entry.get("workout")
+        with span("validate"):
+            validation = validate_workout_data(workout)
+        if validation["valid"]:
+            with span("compile"):
+                entry["payload"] = make_payload(workout)
+        else:
+            name = workout.get("name") if isinstance(workout, dict) else None
+            errors.extend(f"{entry.get(label)} {name}: {error}" for error in validation["errors"])
+    if errors:
+        raise ValueError(f"{title}:\n" + "\n".join(errors))
+
+def _upload_and_schedule(entry: dict) -> dict:
+    """
+    Upload the compiled workout of a plan entry and schedule it on the entry's date.
+
+    Returns:
+        The workoutId and workoutScheduleId.
+    """
+    workout_id = _create_workout(entry["payload"])
+    try:
+        ids = {"workoutId": workout_id, "workoutScheduleId": _schedule_workout(workout_id, entry["date"])}
     except Exception as e:
-        raise Exception(f"Failed to upload workout to Garmin Connect: {str(e)}")
+        raise Exception(f"Workout {workout_id} uploaded but scheduling failed: {e}")
+    report_result({"date": entry["date"], "workoutName": entry["payload"]["workoutName"], **ids})
+    return ids
+
+def _reschedule_workout(workout_id: str, date: str) -> dict:
+    """
+    Schedule an existing workout on another date.
+
+    Returns:
+        The workoutScheduleId.
+    """
+    return {"workoutScheduleId": _schedule_workout(workout_id, date)}
+
+def _unschedule_workout(schedule_id: str, date: str) -> None:
+    """
+    Remove a scheduled workout from the calendar. The workout itself is kept.
+    """
+    connectapi(UNSCHEDULE_WORKOUT_ENDPOINT.format(schedule_id=schedule_id), method="DELETE")
+    _invalidate_calendar(date)
+
+def _invalidate_calendar(date: str) -> None:
+    """
+    Remove the cached monthly calendar containing a date.
+    """
+    year, month = int(date[:4]), int(date[5:7])
+    _invalidate(_request_key(CALENDAR_MONTH_ENDPOINT.format(year=year, month=month - 1)))
+
+def _scheduled_workouts(first, last) -> List[dict]:
+    """
+    Fetch the scheduled workouts between two dates from the monthly calendars, concurrently.
+
+    Returns:
+        The scheduled workouts with date, name, workoutId and scheduleId.
+
+    Raises:
+        Exception: If any calendar month cannot be fetched.
+    """
+    months = []
+    month = first.replace(day=1)
+    while month <= last:
+        months.append(month)
+        month = (month + timedelta(days=32)).replace(day=1)
+
+    def fetch_month(month):
+        # Garmin API months are 0-based
+        return connectapi(CALENDAR_MONTH_ENDPOINT.format(year=month.year, month=month.month - 1))
+
+    scheduled = {}
+    for month, (calendar, error) in zip(months, run_concurrently(fetch_month, months)):
+        if error is not None:
+            raise Exception(f"Failed to get calendar for {month:%Y-%m}: {error}")
+        for item in (calendar or {}).get("calendarItems") or []:
+            if item.get("itemType") != "workout" or not item.get("workoutId"):
+                continue
+            if not first.isoformat() <= (item.get("date") or "") <= last.isoformat():
+                continue
+            scheduled[str(item["id"])] = {
+                "date": item["date"],
+                "name": item.get("title"),
+                "workoutId": str(item["workoutId"]),
+                "scheduleId": str(item["id"]),
+            }
+    return list(scheduled.values())
 
 @mcp.tool
+@with_athlete
+@with_deadline
+def export_workouts(path: str = "workouts.jsonl", compact: bool = False) -> dict:
+    """
+    Export the complete workout library to a local JSON lines file, one workout per line.
+
+    The details of all workouts are fetched concurrently and written to the file in batches. The file
+    is only replaced once the export has finished. Use `import_workouts` to upload the file again,
+    e.g. to restore a backup or migrate the library to another account.
+
+    Args:
+        path: Path of the file, relative to the export directory (GARMIN_EXPORT_DIR)
+            (default="workouts.jsonl").
+        compact: Write the workouts in the compact workout data format accepted by `upload_workout`
+            instead of Garmin's full workout representation (default=False).
+
+    Returns:
+        The path of the file, the number of exported workouts, the total number of workouts and the
+        workouts that could not be fetched. If the time budget of the call ran out, `incomplete` is
+        true, an existing file is kept, and the returned path is that of a `.part` file containing
+        only the workouts fetched until then.
+
+    Raises:
+        ValueError: If the path is outside the export directory.
+    """
+    path = _library_path(path)
+    workout_ids = [str(workout["workoutId"]) for workout in _cached_get(LIST_WORKOUTS_ENDPOINT) or []
+                   if workout.get("workoutId")]
+
+    exported, errors, results = 0, [], []
+    with open_jsonl_writer(path) as write:
+        for start in range(0, len(workout_ids), EXPORT_BATCH_SIZE):
+            batch = workout_ids[start:start + EXPORT_BATCH_SIZE]
+            batch_results = run_concurrently(_get_workout, batch)
+            results.extend(batch_results)
+            for workout_id, (workout, error) in zip(batch, batch_results):
+                if error is not None:
+                    errors.append({"workoutId": workout_id, "error": str(error)})
+                elif workout:
+                    write(make_workout_data(workout) if compact else workout)
+                    exported += 1
+            if any(isinstance(error, DeadlineExceeded) for _, error in batch_results):
+                # Keep the previous export rather than replacing it with a partial one
+                write.abandon()
+                path = write.partial_path
+                break
+
+    logger.info("Exported %d of %d workouts to %s", exported, len(workout_ids), path)
+    response = {"path": path, "exported": exported, "total": len(workout_ids), "errors": errors}
+    return _mark_incomplete(response, results)
+
+@mcp.tool
+@with_athlete
+@with_deadline
+def import_workouts(path: str = "workouts.jsonl", skip_duplicates: bool = True, dry_run: bool = False) -> dict:
+    """
+    Upload the workouts of a JSON lines file, e.g. as written by `export_workouts`.
+
+    Every line contains one workout, either in the workout data format accepted by `upload_workout`
+    or in Garmin's full workout representation, which is uploaded as it is without its IDs, so that
+    fields the workout data format lacks, e.g. descriptions, are kept. The file is read one line at a
+    time, all workouts are compiled before anything is sent, and the uploads are then sent with
+    bounded concurrency.
+
+    Args:
+        path: Path of the file, relative to the export directory (GARMIN_EXPORT_DIR)
+            (default="workouts.jsonl").
+        skip_duplicates: Skip workouts that already exist with the same name, sport and steps, and repeated
+            workouts within the file (default=True). Costs one request per existing workout with the
+            name of an imported workout.
+        dry_run: If true, only compile the workouts and find duplicates without uploading anything (default=False)
+
+    Returns:
+        One entry per line with the line number, workout name and either the new workoutId, the
+        reason it was skipped ("existing" with the existing workoutId, or "duplicate") or the error
+        of that workout, and the number of imported and skipped workouts. If the time budget of the
+        call ran out, `incomplete` is true and the unfinished workouts have errors.
+
+    Raises:
+        ValueError: If the path is outside the export directory, the file contains invalid JSON or any
+            workout fails to compile.
+    """
+    path = _library_path(path)
+    entries = []
+    for line, record in iter_jsonl(path):
+        entry = {"line": line, "source": f"line {line}"}
+        if is_garmin_workout(record):
+            entry["payload"] = to_upload_payload(record)
+        else:
+            entry["workout"] = record
+        entries.append(entry)
+    if not entries:
+        raise ValueError(f"No workouts found in {path}")
+    _compile_entries(entries, "source", f"Invalid workouts in {path}")
+
+    existing = {}
+    if skip_duplicates:
+        names = {entry["payload"]["workoutName"] for entry in entries}
+        workout_ids = [str(workout["workoutId"]) for workout in _cached_get(LIST_WORKOUTS_ENDPOINT) or []
+                       if workout.get("workoutId") and workout.get("workoutName") in names]
+        for workout_id, (workout, error) in zip(workout_ids, run_concurrently(_get_workout, workout_ids)):
+            if error is not None:
+                raise Exception(f"Failed to get workout {workout_id}: {error}")
+            if workout:
+                existing.setdefault(workout_fingerprint(workout), workout_id)
+
+    results, uploads, seen = [], [], set()
+    for entry in entries:
+        result = {"line": entry["line"], "workoutName": entry["payload"]["workoutName"]}
+        results.append(result)
+        if skip_duplicates:
+            fingerprint = workout_fingerprint(entry["payload"])
+            if fingerprint in existing:
+                result.update({"skipped": "existing", "workoutId": existing[fingerprint]})
+                continue
+            if fingerprint in seen:
+                result["skipped"] = "duplicate"
+                continue
+            seen.add(fingerprint)
+        uploads.append((entry, result))
+
+    response = {"workouts": results, "imported": 0, "skipped": len(entries) - len(uploads)}
+    if dry_run:
+        return response
+
+    outcomes = run_concurrently(lambda upload: _import_workout(*upload), uploads)
+    for (_, result), (workout_id, error) in zip(uploads, outcomes):
+        if error is not None:
+            result["error"] = str(error)
+        else:
+            result["workoutId"] = workout_id
+            response["imported"] += 1
+
+    logger.info("Imported %d workouts from %s, %d skipped", response["imported"], path, response["skipped"])
+    return _mark_incomplete(response, outcomes)
+
+def _import_workout(entry: dict, result: dict) -> str:
+    """
+    Upload the compiled workout of an import entry.
+
+    Returns:
+        The ID of the created workout.
+    """
+    workout_id = _create_workout(entry["payload"])
+    report_result({**result, "workoutId": workout_id})
+    return workout_id
+
+def _library_path(path: str) -> str:
+    """
+    Resolve the path of an export file in the export directory of the current athlete.
+
+    Raises:
+        ValueError: If the path is absolute or leads outside the export directory.
+    """
+    root = export_dir()
+    directory = os.path.join(root, current_athlete()) if current_athlete() else root
+    if os.path.isabs(path) or ".." in os.path.normpath(path).split(os.sep):
+        raise ValueError(f"Path must be relative to the export directory, got {path}")
+    resolved = os.path.join(directory, path)
+    # Neither the athlete's directory nor symbolic links may lead outside the export directory
+    if not os.path.realpath(resolved).startswith(os.path.join(os.path.realpath(root), "")):
+        raise ValueError(f"Path must be inside the export directory, got {path}")
+    return resolved
+
+@mcp.tool
+@with_athlete
+@with_deadline
+@paged("calendar", "calendarItems")
 def get_calendar(year: int, month: int, day: int = None, start: int = 1) -> dict:
     """
     Get calendar data from Garmin Connect for different time periods.
@@ -233,7 +1439,9 @@ def get_calendar(year: int, month: int, day: int = None, start: int = 1) -> dict
                calendar items, useful for different training schedules and calendar preferences.
 
     Returns:
-        Calendar data with workouts and activities for the specified period.
+        Calendar data with workouts and activities for the specified period. If the calendar items exceed
+        the response size budget (GARMIN_RESPONSE_BUDGET), only the first items are returned with a
+        `nextCursor` for the rest.
 
     Raises:
         ValueError: If any of the date parameters are invalid.
@@ -265,7 +1473,11 @@ def get_calendar(year: int, month: int, day: int = None, start: int = 1) -> dict
         )
         view_type = "month"
 
-    calendar_data = garth.connectapi(endpoint)
+    # Monthly views are cached and invalidated when workouts are scheduled or unscheduled
+    calendar_data = _cached_get(endpoint) if view_type == "month" else _get(endpoint)
+
+    if prefetch_enabled() and response_cache.enabled:
+        _prefetch_calendar_items(calendar_data)
 
     return {
         "calendar": calendar_data,
@@ -278,6 +1490,138 @@ def get_calendar(year: int, month: int, day: int = None, start: int = 1) -> dict
         }
     }
 
+def _prefetch_calendar_items(calendar_data) -> None:
+    """
+    Fetch the workouts and activities of calendar items into the response cache in the background,
+    as they are usually requested next.
+    """
+    endpoints = []
+    for item in (calendar_data or {}).get("calendarItems") or []:
+        if item.get("itemType") == "workout" and item.get("workoutId"):
+            endpoints.append(GET_WORKOUT_ENDPOINT.format(workout_id=item["workoutId"]))
+        elif item.get("itemType") == "activity" and item.get("id"):
+            endpoints.append(GET_ACTIVITY_ENDPOINT.format(activity_id=item["id"]))
+
+    submitted = prefetcher.submit_all((_request_key(endpoint), partial(_get, endpoint)) for endpoint in endpoints)
+    logger.info("Prefetching %d of %d calendar items", submitted, len(endpoints))
+
+# Tools that can run as background jobs
+JOB_TOOLS = {
+    tool.name: tool
+    for tool in (list_activities, get_activities, get_training_summary, get_activity_fit, get_activity_track,
+                 get_calendar, create_training_plan, sync_plan, export_workouts, import_workouts)
+}
+
+@mcp.tool
+@with_athlete
+def start_job(tool: str, arguments: dict = None) -> dict:
+    """
+    Start a long-running tool call in the background and return its job ID immediately.
+
+    Use this for calls that would exceed the time budget of a tool call, e.g. a training plan covering a
+    whole season or the details of hundreds of activities. Jobs have their own time budget
+    (GARMIN_JOB_TIMEOUT). Check their progress and result with `job_status`, stop them with `cancel_job`.
+
+    Args:
+        tool: Name of the tool to run, one of "list_activities", "get_activities", "get_training_summary",
+              "get_activity_fit", "get_activity_track", "get_calendar", "create_training_plan", "sync_plan",
+              "export_workouts" or "import_workouts"
+        arguments: Arguments of the tool call, e.g. {"activity_ids": ["1", "2"]} for get_activities
+
+    Returns:
+        The job ID and status.
+
+    Raises:
+        ValueError: If the tool cannot run as a job, the arguments do not match the tool or the server
+            runs multiple worker processes.
+    """
+    if tool not in JOB_TOOLS:
+        raise ValueError(f"Tool must be one of {', '.join(JOB_TOOLS)}, got {tool}")
+    # Jobs are kept in the memory of this process, and the next request may reach another worker
+    if mcp_workers() > 1:
+        raise ValueError("Jobs require a single worker process, unset GARMIN_MCP_WORKERS to use them.")
+    arguments = dict(arguments or {})
+    arguments.pop("athlete", None)
+
+    # Jobs call the undecorated tool function, with their own athlete selection and time budget
+    fn = inspect.unwrap(JOB_TOOLS[tool].fn)
+    try:
+        inspect.signature(fn).bind(**arguments)
+    except TypeError as e:
+        raise ValueError(f"Invalid arguments for {tool}: {e}")
+
+    job = job_manager.start(tool, validate_call(fn), arguments, current_athlete())
+    return job.to_dict()
+
+@mcp.tool
+@with_athlete
+def job_status(job_id: str = None, offset: int = 0, cursor: str = None) -> dict:
+    """
+    Get the status, progress and partial results of a job started with `start_job`.
+
+    Results of `list_activities` and `get_calendar` jobs over the tool's response size budget
+    (GARMIN_RESPONSE_BUDGET) are truncated like those of the tool, with a `nextCursor` for the rest.
+
+    Args:
+        job_id: ID of the job. If omitted, the status of all jobs is returned without results.
+        offset: Index of the first partial result to return, e.g. the number of partial results
+                already received, to only get new ones (default=0)
+        cursor: Cursor returned as `nextCursor` by a previous call for the same job. Returns the
+                next part of its result; the offset is ignored.
+
+    Returns:
+        The status ("pending", "running", "done", "failed" or "cancelled"), the number of completed,
+        failed and total requests or items, the partial results (e.g. uploaded workouts) and, once
+        finished, the result or error of the tool call. Cancelled batch tools return the results of
+        their finished requests with `incomplete` set.
+
+    Raises:
+        ValueError: If the job is unknown.
+    """
+    if job_id is None:
+        jobs = []
+        for job in job_manager.list(current_athlete()):
+            status = job.to_dict()
+            for key in ("partialResults", "result"):
+                status.pop(key, None)
+            jobs.append(status)
+        return {"jobs": jobs}
+
+    job = job_manager.get(job_id, current_athlete())
+    if job is None:
+        raise ValueError(f"Unknown job: {job_id}. Jobs are kept in memory by the server process that started them.")
+
+    # Jobs run the undecorated tool function, so the tool's paging is applied to the job's result
+    path = getattr(JOB_TOOLS[job.tool].fn, "paged_path", None)
+    budget = response_budget(job.tool) if path is not None else None
+    scope = current_athlete() or ""
+    if cursor is not None:
+        return result_pager.resume(cursor, budget, scope)
+    return result_pager.page(job.to_dict(offset), ("result", *(path or ())), budget, scope)
+
+@mcp.tool
+@with_athlete
+def cancel_job(job_id: str) -> dict:
+    """
+    Cancel a job started with `start_job`. A pending job does not start, and a running job stops
+    before its next request to Garmin Connect.
+
+    Args:
+        job_id: ID of the job.
+
+    Returns:
+        The status of the job. A running job may take a moment to reach the "cancelled" status.
+
+    Raises:
+        ValueError: If the job is unknown.
+    """
+    job = job_manager.cancel(job_id, current_athlete())
+    if job is None:
+        raise ValueError(f"Unknown job: {job_id}")
+    status = job.to_dict()
+    status.pop("partialResults", None)
+    return status
+
 @mcp.tool
 def generate_workout_data_prompt(description: str) -> dict:
     """
@@ -295,6 +1639,7 @@ def generate_workout_data_prompt(description: str) -> dict:
     You are a fitness coach.
     Given the following workout description, create a structured JSON object that represents the workout.
     The generated JSON should be compatible with the `upload_workout` tool.
+    Use the `validate_workout` tool to check the JSON for errors before uploading it.
 
     Workout Description:
     {description}
@@ -304,6 +1649,7 @@ def generate_workout_data_prompt(description: str) -> dict:
     - For pace targets, use decimal minutes per km (e.g., 4:40 min/km = 4.67 minutes per km)
     - For time-based steps, use stepDuration in seconds
     - For distance-based steps, use stepDistance with appropriate distanceUnit
+    - For steps that end when the lap button is pressed, use endConditionType "lap.button" without duration
     - Use the following structure for the workout object:
     {{
     "name": "Workout Name",
@@ -312,7 +1658,7 @@ def generate_workout_data_prompt(description: str) -> dict:
         {{
         "stepName": "Step Name",
         "stepDescription": "Description",
-        "endConditionType": "time" | "distance",
+        "endConditionType": "time" | "distance" | "lap.button",
         "stepDuration": duration_in_seconds,
         "stepDistance": distance_value,
         "distanceUnit": "m" | "km" | "mile",
@@ -320,7 +1666,8 @@ def generate_workout_data_prompt(description: str) -> dict:
         "target": {{
             "type": "no target" | "pace" | "heart rate" | "power" | "cadence" | "speed",
             "value": [minValue, maxValue] | singleValue,
-            "unit": "min_per_km" | "bpm" | "watts"
+            "unit": "min_per_km" | "bpm" | "watts",
+            "zone": zoneNumber
         }},
         "numberOfIterations": number,
         "steps": []
@@ -331,34 +1678,136 @@ def generate_workout_data_prompt(description: str) -> dict:
     Examples:
     - For 4:40 min/km pace: "value": 4.67 or "value": [4.5, 4.8]
     - For 160 bpm heart rate: "value": 160 or "value": [150, 170]
+    - For heart rate zone 2 of the athlete's settings: "type": "heart rate", "zone": 2
     - For no target: "type": "no target", "value": null, "unit": null
     """}
 
 def login():
-    """Login to Garmin Connect."""
+    """
+    Login to Garmin Connect.
+
+    Processes sharing GARTH_HOME resume the saved session without waiting. If it cannot be resumed,
+    only one process logs in while holding the token lock, and the others resume its session.
+    """
     garth_home = os.environ.get("GARTH_HOME", "~/.garth")
+    store = TokenStore(garth_home, token_lock_timeout())
     try:
         garth.resume(garth_home)
     except Exception:
-        email = os.environ.get("GARMIN_EMAIL")
-        password = os.environ.get("GARMIN_PASSWORD")
+        with store.lock():
+            try:
+                # Another process may have logged in while this one waited for the lock
+                garth.resume(garth_home)
+            except Exception:
+                email = os.environ.get("GARMIN_EMAIL")
+                password = os.environ.get("GARMIN_PASSWORD")
+
+                if not email or not password:
+                    if athletes_dir():
+                        logger.info("No default Garmin Connect account, tools require the athlete argument")
+                        return
+                    raise ValueError("Garmin email and password must be provided via environment variables (GARMIN_EMAIL, GARMIN_PASSWORD).")
+
+                try:
+                    garth.login(email, password)
+                except Exception as e:
+                    logger.error("Login failed: %s", e)
+                    sys.exit(1)
+
+                # Save credentials for future use
+                store.save(garth.client)
+
+    store.attach(garth.client)
+
+def warm_up() -> int:
+    """
+    Prefetch the responses of the first calls of a session into the response cache in the background.
+
+    Fetches the workout library, the most recent activities (GARMIN_WARMUP_ACTIVITIES, as requested
+    by `list_activities` with this limit) and, if GARMIN_WARMUP_CALENDAR is set, the current month's
+    calendar. Does nothing unless GARMIN_WARMUP is set and the response cache is enabled.
+
+    Returns:
+        The number of submitted requests.
+    """
+    if os.environ.get("GARMIN_WARMUP", "").lower() not in ("1", "true", "yes") or not response_cache.enabled:
+        return 0
+
+    limit = int(os.environ.get("GARMIN_WARMUP_ACTIVITIES", 20))
+    requests = [(LIST_WORKOUTS_ENDPOINT, None), (LIST_ACTIVITIES_ENDPOINT, {"limit": limit, "start": 0})]
+    if os.environ.get("GARMIN_WARMUP_CALENDAR", "").lower() in ("1", "true", "yes"):
+        today = datetime.now()
+        requests.append((CALENDAR_MONTH_ENDPOINT.format(year=today.year, month=today.month - 1), None))
+
+    submitted = prefetcher.submit_all(
+        (_request_key(endpoint, params), partial(_get, endpoint, params)) for endpoint, params in requests
+    )
+    logger.info("Warming up the response cache with %d requests", submitted)
+    return submitted
+
+def create_app():
+    """
+    Create the ASGI application of a worker process for the network transports.
 
-        if not email or not password:
-            raise ValueError("Garmin email and password must be provided via environment variables (GARMIN_EMAIL, GARMIN_PASSWORD).")
+    Every worker resumes the session from the shared token store (GARTH_HOME) and uses the
+    shared cache directory (GARMIN_CACHE_DIR) if it is configured. Multiple workers use
+    stateless streamable HTTP, as consecutive requests of a client can reach different workers.
+    """
+    login()
+    warm_up()
+    write_queue.start()
+    return mcp.http_app(transport="http", stateless_http=True)
 
-        try:
-            garth.login(email, password)
-        except Exception as e:
-            logger.error("Login failed: %s", e)
-            sys.exit(1)
+def mcp_workers() -> int:
+    """
+    Get the number of worker processes serving the network transports.
 
-        # Save credentials for future use
-        garth.save(garth_home)
+    Returns:
+        The value of GARMIN_MCP_WORKERS, or 1 if unset or with the stdio transport
+    """
+    if os.environ.get("GARMIN_MCP_TRANSPORT", "stdio") == "stdio":
+        return 1
+    return max(1, int(os.environ.get("GARMIN_MCP_WORKERS", 1)))
+
+def run_http(transport: str):
+    """
+    Serve the MCP server over streamable HTTP or SSE with the configured number of worker processes.
+
+    Raises:
+        ValueError: If multiple workers are configured for the SSE transport.
+    """
+    host = os.environ.get("GARMIN_MCP_HOST", "127.0.0.1")
+    port = int(os.environ.get("GARMIN_MCP_PORT", 8000))
+    workers = mcp_workers()
+    if transport == "sse" and workers > 1:
+        raise ValueError("The SSE transport does not support multiple workers, use the http transport.")
+
+    # Log in once before starting the workers, so that new tokens are saved before the workers resume them
+    login()
+
+    if workers == 1:
+        warm_up()
+        write_queue.start()
+        uvicorn.run(mcp.http_app(transport=transport), host=host, port=port)
+        return
+
+    logger.info("Starting %d workers on %s:%d", workers, host, port)
+    uvicorn.run("garmin_workouts_mcp.main:create_app", factory=True, host=host, port=port, workers=workers)
 
 def main():
     """Main entry point for the console script."""
-    login()
-    mcp.run()
+    transport = os.environ.get("GARMIN_MCP_TRANSPORT", "stdio")
+    if transport not in TRANSPORTS:
+        raise ValueError(f"GARMIN_MCP_TRANSPORT must be one of {', '.join(TRANSPORTS)}, got {transport}")
+
+    if transport == "stdio":
+        login()
+        warm_up()
+        # Flush operations left in the queue by the previous run
+        write_queue.start()
+        mcp.run()
+    else:
+        run_http(transport)
 
 if __name__ == "__main__":
     main()
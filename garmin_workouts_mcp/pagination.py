@@ -0,0 +1,202 @@
+import functools
+import inspect
+import os
+import secrets
+from typing import Annotated, Any, Callable, Optional, Tuple
+
+from pydantic import Field
+
+from .cache import DiskCache, ResponseCache
+from .serialization import dumps_bytes
+from .sessions import current_athlete
+
+
+# Default time in seconds the rest of a truncated result is kept for follow-up calls
+DEFAULT_CURSOR_TTL = 300
+
+# Maximum number of truncated results kept
+MAX_PAGED_RESULTS = 256
+
+# Subdirectory of GARMIN_CACHE_DIR holding truncated results, apart from the cached responses
+CURSOR_DIR = "cursors"
+
+# Bytes reserved for the cursor and truncation info added to a page
+PAGE_OVERHEAD = 128
+
+CURSOR_DESCRIPTION = (
+    "Cursor returned as `nextCursor` by a previous call whose result exceeded the response size budget. "
+    "Returns the next part of that result; the other arguments are ignored."
+)
+
+
+def response_budget(tool: str) -> Optional[int]:
+    """
+    Returns the maximum size in bytes of a tool's serialized result.
+
+    Returns:
+        The value of GARMIN_RESPONSE_BUDGET_<TOOL> (e.g. GARMIN_RESPONSE_BUDGET_GET_CALENDAR) or
+        GARMIN_RESPONSE_BUDGET, or None if unset or 0 (no budget)
+    """
+    value = os.environ.get(f"GARMIN_RESPONSE_BUDGET_{tool.upper()}", os.environ.get("GARMIN_RESPONSE_BUDGET", 0))
+    budget = int(value)
+    return budget if budget > 0 else None
+
+
+def cursor_ttl() -> float:
+    """
+    Returns the time in seconds cursors of truncated results stay valid.
+
+    Returns:
+        The value of GARMIN_CURSOR_TTL, or the default if unset
+    """
+    return max(1.0, float(os.environ.get("GARMIN_CURSOR_TTL", DEFAULT_CURSOR_TTL)))
+
+
+def _get_path(data: Any, path: Tuple[str, ...]) -> Any:
+    for key in path:
+        if not isinstance(data, dict):
+            return None
+        data = data.get(key)
+    return data
+
+
+def _set_path(data: dict, path: Tuple[str, ...], value: Any) -> dict:
+    """
+    Returns a copy of the data with the value at the path replaced, copying only the dicts on the path.
+    """
+    if not path:
+        return value
+    return {**data, path[0]: _set_path(data[path[0]], path[1:], value)}
+
+
+class ResultPager:
+    """
+    Splits results over a size budget into pages at item boundaries.
+
+    The items of a result are the elements of a list, or the fields of a dict, at a path in the
+    result. A truncated result is kept for a short time, and an opaque cursor returned with each page
+    continues it without fetching it again. Truncated results are kept in memory, or in a directory
+    if one is given, so that the worker processes sharing it can continue each other's cursors.
+    """
+
+    def __init__(self, ttl: float = DEFAULT_CURSOR_TTL, max_entries: int = MAX_PAGED_RESULTS,
+                 directory: Optional[str] = None):
+        if directory:
+            self.results = DiskCache(directory, ttl, max_entries)
+        else:
+            self.results = ResponseCache(ttl, max_entries)
+
+    def page(self, result: Any, path: Tuple[str, ...], budget: Optional[int], scope: str = "") -> Any:
+        """
+        Returns the result, or its first page if it exceeds the budget.
+
+        Args:
+            result: The complete result
+            path: Keys of the list or dict whose items are split, () for the result itself
+            budget: Maximum serialized size in bytes, None for no budget
+            scope: Cursors can only be used in the same scope, e.g. by the same athlete
+
+        Returns:
+            The result, or a page of it with `nextCursor` and `truncated` (returned, offset and total items)
+        """
+        if budget is None or not isinstance(result, dict):
+            return result
+        container = _get_path(result, path)
+        if isinstance(container, list):
+            items, is_dict = container, False
+            sizes = [len(dumps_bytes(item)) + 1 for item in items]
+        elif isinstance(container, dict):
+            items, is_dict = list(container.items()), True
+            # The size of a field is that of a dict containing only the field, without its braces
+            sizes = [len(dumps_bytes({key: value})) - 1 for key, value in items]
+        else:
+            return result
+
+        template = _set_path(result, path, {} if is_dict else [])
+        template_size = len(dumps_bytes(template))
+        if template_size + sum(sizes) <= budget:
+            return result
+        base = template_size + PAGE_OVERHEAD
+
+        result_id = secrets.token_urlsafe(12)
+        # Stored as JSON-serializable lists, to be readable by other processes
+        entry = [template, list(path), [list(item) for item in items] if is_dict else items, is_dict, sizes, base]
+        self.results.set(f"{scope}:{result_id}", entry)
+        return self._page(result_id, 0, budget, entry)
+
+    def resume(self, cursor: str, budget: Optional[int], scope: str = "") -> Any:
+        """
+        Returns the page of a truncated result starting at a cursor.
+
+        Raises:
+            ValueError: If the cursor is invalid or has expired
+        """
+        result_id, _, offset = str(cursor).rpartition(".")
+        entry = self.results.get(f"{scope}:{result_id}") if offset.isdigit() else None
+        if entry is None:
+            raise ValueError("Cursor is invalid or has expired, repeat the call without a cursor")
+        return self._page(result_id, int(offset), budget, entry)
+
+    @staticmethod
+    def _page(result_id: str, offset: int, budget: Optional[int], entry: list) -> Any:
+        template, path, items, is_dict, sizes, base = entry
+        size, end = base, offset
+        while end < len(items):
+            # Every page returns at least one item, even if it exceeds the budget on its own
+            if budget is not None and end > offset and size + sizes[end] > budget:
+                break
+            size += sizes[end]
+            end += 1
+
+        selected = dict(items[offset:end]) if is_dict else items[offset:end]
+        page = dict(_set_path(template, path, selected))
+        if end < len(items):
+            page["nextCursor"] = f"{result_id}.{end}"
+        page["truncated"] = {"returned": end - offset, "offset": offset, "total": len(items)}
+        return page
+
+
+def create_result_pager() -> ResultPager:
+    """
+    Creates the pager of truncated results configured by the environment.
+
+    Returns:
+        A pager keeping truncated results below GARMIN_CACHE_DIR if it is set, so that cursors can
+        be continued by all worker processes, and in memory otherwise
+    """
+    directory = os.environ.get("GARMIN_CACHE_DIR")
+    return ResultPager(cursor_ttl(), directory=os.path.join(os.path.expanduser(directory), CURSOR_DIR)
+                       if directory else None)
+
+
+result_pager = create_result_pager()
+
+
+def paged(*path: str) -> Callable[[Callable], Callable]:
+    """
+    Splits the results of a tool that exceed its response budget into pages, see `ResultPager`.
+
+    Adds an optional `cursor` argument to the tool that returns the next page of a truncated result.
+
+    Args:
+        *path: Keys of the list or dict in the result whose items are split
+    """
+    def decorator(fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        def wrapper(*args, cursor: Optional[str] = None, **kwargs):
+            scope = current_athlete() or ""
+            if cursor is not None:
+                return result_pager.resume(cursor, response_budget(fn.__name__), scope)
+            return result_pager.page(fn(*args, **kwargs), path, response_budget(fn.__name__), scope)
+
+        # Copied to the tool's other wrappers, so that jobs running the tool can page its result
+        wrapper.paged_path = path
+        annotation = Annotated[Optional[str], Field(description=CURSOR_DESCRIPTION)]
+        signature = inspect.signature(fn)
+        wrapper.__signature__ = signature.replace(parameters=[
+            *signature.parameters.values(),
+            inspect.Parameter("cursor", inspect.Parameter.KEYWORD_ONLY, default=None, annotation=annotation),
+        ])
+        wrapper.__annotations__ = {**fn.__annotations__, "cursor": annotation}
+        return wrapper
+    return decorator
@@ -0,0 +1,130 @@
+import contextvars
+import logging
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from .deadlines import detached
+
+
+logger = logging.getLogger(__name__)
+
+# Default number of concurrent background requests of the prefetcher
+DEFAULT_PREFETCH_CONCURRENCY = 2
+
+
+def prefetch_enabled() -> bool:
+    """
+    Returns whether speculative prefetching is enabled.
+
+    Returns:
+        True if GARMIN_PREFETCH is set to 1, true or yes
+    """
+    return os.environ.get("GARMIN_PREFETCH", "").lower() in ("1", "true", "yes")
+
+
+def prefetch_concurrency() -> int:
+    """
+    Returns the number of concurrent background requests of the prefetcher.
+
+    Returns:
+        The value of GARMIN_PREFETCH_CONCURRENCY, or the default if unset
+    """
+    return max(1, int(os.environ.get("GARMIN_PREFETCH_CONCURRENCY", DEFAULT_PREFETCH_CONCURRENCY)))
+
+
+class Prefetcher:
+    """
+    Fetches responses in the background into a response cache with limited concurrency.
+
+    Requests that are cached or already in flight are not sent again, and callers can wait
+    for an in-flight request instead of sending the same request themselves.
+    """
+
+    def __init__(self, cache, max_workers: int = DEFAULT_PREFETCH_CONCURRENCY):
+        self.cache = cache
+        self.max_workers = max_workers
+        self._executor = None
+        self._pending: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, key: str, fetch: Callable[[], Any]) -> Optional[Future]:
+        """
+        Fetches a response in the background and stores it in the cache under the key.
+
+        The fetch runs in a copy of the caller's context, e.g. with the selected athlete, but without
+        the deadline of the caller's tool call.
+
+        Returns:
+            The future of the fetch, or None if the response is cached or already in flight
+        """
+        with self._lock:
+            if key in self._pending or self.cache.get(key) is not None:
+                return None
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="prefetch")
+            future = self._executor.submit(contextvars.copy_context().run, self._fetch, key, fetch)
+            self._pending[key] = future
+            return future
+
+    def submit_all(self, requests: Iterable) -> int:
+        """
+        Fetches (key, fetch) pairs in the background.
+
+        Returns:
+            The number of submitted fetches
+        """
+        return sum(1 for key, fetch in requests if self.submit(key, fetch) is not None)
+
+    def _fetch(self, key: str, fetch: Callable[[], Any]) -> Any:
+        try:
+            with detached():
+                value = fetch()
+            if value:
+                self.cache.set(key, value)
+            return value
+        except Exception as e:
+            logger.info("Prefetching %s failed: %s", key, e)
+            raise
+        finally:
+            with self._lock:
+                self._pending.pop(key, None)
+
+    def wait(self, key: str, timeout: Optional[float] = None) -> Any:
+        """
+        Waits for a running fetch of the key.
+
+        A fetch that is still queued behind other fetches is cancelled instead, so that the caller
+        sends the request itself rather than waiting for the queue.
+
+        Args:
+            key: The key of the fetch
+            timeout: Maximum time in seconds to wait, e.g. the time left of the caller's deadline
+
+        Returns:
+            The fetched value, or None if no fetch is running, it failed or the timeout passed
+        """
+        with self._lock:
+            future = self._pending.get(key)
+            if future is None:
+                return None
+            if not future.running() and future.cancel():
+                del self._pending[key]
+                return None
+        try:
+            return future.result(None if timeout is None else max(0.0, timeout))
+        except Exception:
+            return None
+
+    def join(self, timeout: Optional[float] = None) -> None:
+        """
+        Waits until all fetches that are in flight have completed.
+        """
+        with self._lock:
+            futures = list(self._pending.values())
+        for future in futures:
+            try:
+                future.result(timeout)
+            except Exception:
+                pass
@@ -0,0 +1,112 @@
+import cProfile
+import logging
+import os
+import random
+import threading
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Optional
+
+from fastmcp.server.middleware import Middleware
+
+
+logger = logging.getLogger(__name__)
+
+# Default number of allocation sites written per profiled call
+DEFAULT_PROFILE_TOP = 25
+
+# cProfile supports one active profiler per thread, concurrent calls are not profiled
+_profile_lock = threading.Lock()
+
+
+def profile_dir() -> Optional[str]:
+    """
+    Returns the directory profiles are written to.
+
+    Returns:
+        The expanded value of GARMIN_PROFILE_DIR, or None (profiling disabled) if unset
+    """
+    path = os.environ.get("GARMIN_PROFILE_DIR")
+    return os.path.expanduser(path) if path else None
+
+
+def should_profile(tool: str) -> bool:
+    """
+    Returns whether a call of a tool is profiled.
+
+    Calls of the tools in GARMIN_PROFILE_TOOLS (comma-separated) are always profiled, other calls
+    with the probability GARMIN_PROFILE_SAMPLE_RATE. Without either setting every call is profiled.
+    """
+    if profile_dir() is None:
+        return False
+    tools = {name.strip() for name in os.environ.get("GARMIN_PROFILE_TOOLS", "").split(",") if name.strip()}
+    if tool in tools:
+        return True
+    sample_rate = float(os.environ.get("GARMIN_PROFILE_SAMPLE_RATE", 0 if tools else 1))
+    return random.random() < sample_rate
+
+
+@contextmanager
+def profile_call(tool: str, directory: str, top: int = DEFAULT_PROFILE_TOP):
+    """
+    Runs the block under cProfile and tracemalloc and writes the results to the directory.
+
+    Writes `<tool>-<timestamp>.pstats`, readable with `pstats` or `snakeviz`, and
+    `<tool>-<timestamp>.allocations.txt` with the peak traced memory and the top allocation sites.
+    Only the calling thread is profiled, allocations are traced in all threads.
+    """
+    if not _profile_lock.acquire(blocking=False):
+        logger.info("Another call is being profiled, not profiling %s", tool)
+        yield
+        return
+
+    started_tracemalloc = not tracemalloc.is_tracing()
+    if started_tracemalloc:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            snapshot = tracemalloc.take_snapshot()
+            _, peak = tracemalloc.get_traced_memory()
+            if started_tracemalloc:
+                tracemalloc.stop()
+            _write_profile(tool, directory, profiler, snapshot, peak, top)
+    finally:
+        _profile_lock.release()
+
+
+def _write_profile(tool: str, directory: str, profiler: cProfile.Profile, snapshot, peak: int, top: int) -> None:
+    name = f"{tool}-{datetime.now():%Y%m%dT%H%M%S%f}-{os.getpid()}"
+    try:
+        os.makedirs(directory, exist_ok=True)
+        profiler.dump_stats(os.path.join(directory, name + ".pstats"))
+
+        snapshot = snapshot.filter_traces([tracemalloc.Filter(False, tracemalloc.__file__)])
+        with open(os.path.join(directory, name + ".allocations.txt"), "w") as f:
+            f.write(f"Peak traced memory: {peak / 1024:.1f} KiB\n")
+            f.write(f"Top {top} allocation sites by size:\n")
+            for statistic in snapshot.statistics("lineno")[:top]:
+                f.write(f"{statistic}\n")
+    except OSError as e:
+        logger.warning("Writing profile of %s to %s failed: %s", tool, directory, e)
+        return
+    logger.info("Profile of %s written to %s", tool, os.path.join(directory, name))
+
+
+class ProfilingMiddleware(Middleware):
+    """
+    Profiles the selected tool calls, see `should_profile`.
+    """
+
+    async def on_call_tool(self, context, call_next):
+        tool = context.message.name
+        if not should_profile(tool):
+            return await call_next(context)
+        with profile_call(tool, profile_dir(), int(os.environ.get("GARMIN_PROFILE_TOP", DEFAULT_PROFILE_TOP))):
+            return await call_next(context)
@@ -0,0 +1,83 @@
+import contextvars
+import threading
+from contextlib import contextmanager
+from typing import Any, List, Optional
+
+
+# Maximum number of partial results kept per tracked call
+MAX_PARTIAL_RESULTS = 1000
+
+_current_progress = contextvars.ContextVar("progress", default=None)
+
+
+class Progress:
+    """
+    Thread-safe progress of a long-running call: finished and total items, and partial results.
+    """
+
+    def __init__(self):
+        self.completed = 0
+        self.failed = 0
+        self.total = 0
+        self.results: List[Any] = []
+        self._lock = threading.Lock()
+
+    def add_total(self, count: int) -> None:
+        with self._lock:
+            self.total += count
+
+    def advance(self, ok: bool = True) -> None:
+        with self._lock:
+            if ok:
+                self.completed += 1
+            else:
+                self.failed += 1
+
+    def add_result(self, result: Any) -> None:
+        with self._lock:
+            if len(self.results) < MAX_PARTIAL_RESULTS:
+                self.results.append(result)
+
+    def snapshot(self, offset: int = 0) -> dict:
+        """
+        Args:
+            offset: Index of the first partial result returned, e.g. the number already seen
+
+        Returns:
+            The completed, failed and total items and the partial results from the offset
+        """
+        with self._lock:
+            return {
+                "completed": self.completed,
+                "failed": self.failed,
+                "total": self.total,
+                "results": self.results[offset:],
+            }
+
+
+def current_progress() -> Optional[Progress]:
+    """
+    Returns the progress tracked for the current call, or None if it is not tracked.
+    """
+    return _current_progress.get()
+
+
+@contextmanager
+def use_progress(progress: Progress):
+    """
+    Tracks the progress of the block, e.g. the items finished by `run_concurrently`.
+    """
+    token = _current_progress.set(progress)
+    try:
+        yield progress
+    finally:
+        _current_progress.reset(token)
+
+
+def report_result(result: Any) -> None:
+    """
+    Adds a partial result to the tracked progress, e.g. an uploaded workout. Does nothing if untracked.
+    """
+    progress = current_progress()
+    if progress is not None:
+        progress.add_result(result)
@@ -0,0 +1,270 @@
+import contextvars
+import logging
+import os
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Optional
+
+import requests
+
+from .cache import ResponseCache
+from .deadlines import DeadlineExceeded
+
+
+logger = logging.getLogger(__name__)
+
+# Number of recent latencies per endpoint used for the p95, and the minimum before hedging
+LATENCY_WINDOW = 200
+MIN_LATENCY_SAMPLES = 20
+
+# Hedges are never sent earlier than this many seconds after the first attempt
+MIN_HEDGE_DELAY = 0.05
+
+DEFAULT_BREAKER_FAILURES = 5
+DEFAULT_BREAKER_RESET = 30
+DEFAULT_STALE_TTL = 3600
+
+_ID_SEGMENT = re.compile(r"/\d+(?=/|$)")
+
+
+def _env_flag(name: str) -> bool:
+    return os.environ.get(name, "").lower() in ("1", "true", "yes")
+
+
+def hedging_enabled() -> bool:
+    """
+    Returns whether slow GET requests are hedged.
+
+    Returns:
+        True if GARMIN_HEDGING is set to 1, true or yes
+    """
+    return _env_flag("GARMIN_HEDGING")
+
+
+def breaker_enabled() -> bool:
+    """
+    Returns whether GET requests use per-endpoint circuit breakers.
+
+    Returns:
+        True if GARMIN_CIRCUIT_BREAKER is set to 1, true or yes
+    """
+    return _env_flag("GARMIN_CIRCUIT_BREAKER")
+
+
+def create_getter() -> "ResilientGetter":
+    """
+    Creates the GET request sender configured by the environment.
+
+    GARMIN_BREAKER_FAILURES and GARMIN_BREAKER_RESET set the consecutive failures that open a
+    circuit and the seconds until it is tried again, GARMIN_STALE_TTL how long responses are kept
+    for serving while their endpoint is degraded.
+    """
+    return ResilientGetter(
+        hedging=hedging_enabled(),
+        breaker=breaker_enabled(),
+        failure_threshold=max(1, int(os.environ.get("GARMIN_BREAKER_FAILURES", DEFAULT_BREAKER_FAILURES))),
+        reset_timeout=float(os.environ.get("GARMIN_BREAKER_RESET", DEFAULT_BREAKER_RESET)),
+        stale_ttl=float(os.environ.get("GARMIN_STALE_TTL", DEFAULT_STALE_TTL)),
+    )
+
+
+def endpoint_group(endpoint: str) -> str:
+    """
+    Returns the endpoint with IDs replaced, e.g. "/activity-service/activity/{id}".
+    """
+    return _ID_SEGMENT.sub("/{id}", endpoint.split("?", 1)[0])
+
+
+def is_degraded(error: Exception) -> bool:
+    """
+    Returns whether an error indicates that Garmin Connect is degraded rather than a bad request.
+    """
+    if isinstance(error, (requests.ConnectionError, requests.Timeout)):
+        return True
+    response = getattr(getattr(error, "error", error), "response", None)
+    status = getattr(response, "status_code", None)
+    return status is not None and (status >= 500 or status == 429)
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of sending a request while the circuit breaker of its endpoint is open."""
+
+
+class LatencyTracker:
+    """
+    Thread-safe record of recent request latencies per endpoint group.
+    """
+
+    def __init__(self, window: int = LATENCY_WINDOW, min_samples: int = MIN_LATENCY_SAMPLES):
+        self.window = window
+        self.min_samples = min_samples
+        self._latencies: Dict[str, deque] = {}
+        self._lock = threading.Lock()
+
+    def record(self, group: str, seconds: float) -> None:
+        with self._lock:
+            self._latencies.setdefault(group, deque(maxlen=self.window)).append(seconds)
+
+    def p95(self, group: str) -> Optional[float]:
+        """
+        Returns the 95th percentile latency in seconds, or None if there are too few samples.
+        """
+        with self._lock:
+            latencies = sorted(self._latencies.get(group, ()))
+        if len(latencies) < self.min_samples:
+            return None
+        return latencies[int(len(latencies) * 0.95)]
+
+
+class CircuitBreaker:
+    """
+    Opens after consecutive degraded failures, rejects requests while open and lets a single
+    trial request through after the reset timeout.
+    """
+
+    def __init__(self, failure_threshold: int = DEFAULT_BREAKER_FAILURES, reset_timeout: float = DEFAULT_BREAKER_RESET):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if not self._trial and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self._trial = True
+                return True
+            return False
+
+    def retry_after(self) -> float:
+        with self._lock:
+            if self.opened_at is None:
+                return 0.0
+            return max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at))
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self._trial or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self._trial = False
+
+
+class ResilientGetter:
+    """
+    Sends idempotent GET requests with optional hedging and per-endpoint circuit breakers.
+
+    With hedging, a second attempt is sent if the first has not answered within the p95 latency
+    of its endpoint, and the first successful answer is used. With the circuit breaker, the last
+    good response of a request is served while its endpoint is degraded.
+    """
+
+    def __init__(self, hedging: bool = False, breaker: bool = False,
+                 failure_threshold: int = DEFAULT_BREAKER_FAILURES, reset_timeout: float = DEFAULT_BREAKER_RESET,
+                 stale_ttl: float = DEFAULT_STALE_TTL):
+        self.hedging = hedging
+        self.breaker = breaker
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.latency = LatencyTracker()
+        self.stale = ResponseCache(stale_ttl if breaker else 0)
+        self.hedges = 0
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def circuit(self, group: str) -> CircuitBreaker:
+        with self._lock:
+            if group not in self._breakers:
+                self._breakers[group] = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+            return self._breakers[group]
+
+    def get(self, endpoint: str, key: str, fetch: Callable[[], Any]) -> Any:
+        """
+        Sends a GET request.
+
+        Args:
+            endpoint: The endpoint, used to group latencies and circuit breakers
+            key: The cache key of the request, used for stale responses
+            fetch: Sends the request and returns the response
+
+        Returns:
+            The response, or the last good response if the endpoint is degraded
+
+        Raises:
+            CircuitOpenError: If the circuit of the endpoint is open and no stale response exists
+        """
+        group = endpoint_group(endpoint)
+        circuit = self.circuit(group) if self.breaker else None
+
+        if circuit is not None and not circuit.allow():
+            stale = self.stale.get(key)
+            if stale is not None:
+                logger.info("Serving stale response for %s, circuit is open", endpoint)
+                return stale
+            raise CircuitOpenError(f"Garmin Connect is degraded for {group}, "
+                                   f"retry in {circuit.retry_after():.0f} seconds")
+
+        start = time.monotonic()
+        try:
+            value = self._hedged(group, fetch) if self.hedging else fetch()
+        except DeadlineExceeded:
+            # The caller ran out of time, which says nothing about the health of the endpoint
+            raise
+        except Exception as e:
+            if circuit is None or not is_degraded(e):
+                if circuit is not None:
+                    circuit.record_success()
+                raise
+            circuit.record_failure()
+            stale = self.stale.get(key)
+            if stale is None:
+                raise
+            logger.info("Serving stale response for %s after error: %s", endpoint, e)
+            return stale
+
+        self.latency.record(group, time.monotonic() - start)
+        if circuit is not None:
+            circuit.record_success()
+            if value:
+                self.stale.set(key, value)
+        return value
+
+    def _hedged(self, group: str, fetch: Callable[[], Any]) -> Any:
+        delay = self.latency.p95(group)
+        if delay is None:
+            return fetch()
+
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(thread_name_prefix="hedge")
+        executor = self._executor
+
+        first = executor.submit(contextvars.copy_context().run, fetch)
+        done, _ = wait([first], timeout=max(delay, MIN_HEDGE_DELAY))
+        if done:
+            return first.result()
+
+        self.hedges += 1
+        logger.info("Hedging request to %s after %.2fs", group, delay)
+        pending = {first, executor.submit(contextvars.copy_context().run, fetch)}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    return future.result()
+                error = future.exception()
+        raise error
@@ -0,0 +1,248 @@
+import heapq
+import re
+import threading
+import unicodedata
+from collections import OrderedDict, defaultdict
+from typing import Dict, Iterable, List, Optional
+
+
+# Weight of a query token matching a token of each field
+FIELD_WEIGHTS = {"name": 3.0, "type": 2.0, "description": 1.0}
+
+# Factor applied to the weight of a token that only starts with the query token
+PREFIX_FACTOR = 0.5
+
+KINDS = ("activity", "workout")
+
+_TOKEN = re.compile(r"\w+")
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """
+    Splits text into lowercase tokens without accents, e.g. "Lauf über 10km" into ["lauf", "uber", "10km"].
+    """
+    if not text:
+        return []
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return _TOKEN.findall(text.replace("_", " "))
+
+
+def _get_path(data: dict, *path: str):
+    for key in path:
+        if not isinstance(data, dict):
+            return None
+        data = data.get(key)
+    return data
+
+
+def activity_document(activity: dict) -> Optional[dict]:
+    """
+    Extracts the searchable fields of an activity, as returned by the activity list or activity endpoints.
+    """
+    activity_id = activity.get("activityId")
+    if activity_id is None:
+        return None
+    return {
+        "id": str(activity_id),
+        "name": activity.get("activityName"),
+        "type": _get_path(activity, "activityType", "typeKey") or _get_path(activity, "activityTypeDTO", "typeKey"),
+        "description": activity.get("description"),
+        "date": activity.get("startTimeLocal") or _get_path(activity, "summaryDTO", "startTimeLocal"),
+    }
+
+
+def workout_document(workout: dict) -> Optional[dict]:
+    """
+    Extracts the searchable fields of a workout, as returned by the workout list or workout endpoints.
+    """
+    workout_id = workout.get("workoutId")
+    if workout_id is None:
+        return None
+    return {
+        "id": str(workout_id),
+        "name": workout.get("workoutName"),
+        "type": _get_path(workout, "sportType", "sportTypeKey"),
+        "description": workout.get("description"),
+        "date": workout.get("updatedDate") or workout.get("createdDate"),
+    }
+
+
+class SearchIndex:
+    """
+    Thread-safe in-memory inverted index over the names, types and descriptions of activities and workouts.
+
+    Documents are added or replaced one at a time, so the index is updated incrementally as
+    responses pass through the server. Queries match whole tokens and token prefixes.
+    """
+
+    def __init__(self):
+        self._documents: Dict[tuple, dict] = {}
+        # token -> {document key -> weight}
+        self._postings: Dict[str, Dict[tuple, float]] = defaultdict(dict)
+        # prefix -> tokens starting with it
+        self._prefixes: Dict[str, set] = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def add(self, kind: str, document: Optional[dict]) -> bool:
+        """
+        Adds a document or replaces the document with the same kind and ID.
+
+        Returns:
+            True if the index changed
+        """
+        if document is None:
+            return False
+        key = (kind, document["id"])
+        with self._lock:
+            current = self._documents.get(key)
+            if current == document:
+                return False
+            if current is not None:
+                self._unindex(key, current)
+            self._documents[key] = document
+            for token, weight in self._weights(document).items():
+                if token not in self._postings:
+                    for end in range(1, len(token) + 1):
+                        self._prefixes[token[:end]].add(token)
+                self._postings[token][key] = weight
+            return True
+
+    def add_activities(self, activities: Iterable[dict]) -> int:
+        """
+        Returns:
+            The number of added or changed activities
+        """
+        return sum(self.add("activity", activity_document(activity)) for activity in activities
+                   if isinstance(activity, dict))
+
+    def add_workouts(self, workouts: Iterable[dict]) -> int:
+        """
+        Returns:
+            The number of added or changed workouts
+        """
+        return sum(self.add("workout", workout_document(workout)) for workout in workouts
+                   if isinstance(workout, dict))
+
+    def remove(self, kind: str, document_id: str) -> None:
+        key = (kind, str(document_id))
+        with self._lock:
+            document = self._documents.pop(key, None)
+            if document is not None:
+                self._unindex(key, document)
+
+    def _unindex(self, key: tuple, document: dict) -> None:
+        for token in self._weights(document):
+            postings = self._postings.get(token)
+            if postings is None:
+                continue
+            postings.pop(key, None)
+            if not postings:
+                del self._postings[token]
+                for end in range(1, len(token) + 1):
+                    tokens = self._prefixes[token[:end]]
+                    tokens.discard(token)
+                    if not tokens:
+                        del self._prefixes[token[:end]]
+
+    @staticmethod
+    def _weights(document: dict) -> Dict[str, float]:
+        weights = {}
+        for field, weight in FIELD_WEIGHTS.items():
+            for token in tokenize(document.get(field)):
+                weights[token] = max(weights.get(token, 0.0), weight)
+        return weights
+
+    def search(self, query: str, kind: Optional[str] = None, activity_type: Optional[str] = None,
+               limit: int = 20) -> List[dict]:
+        """
+        Finds the documents matching every token of the query, exactly or as a prefix.
+
+        Args:
+            query: The search text
+            kind: Only return documents of this kind, "activity" or "workout"
+            activity_type: Only return documents of this activity or sport type, e.g. "running"
+            limit: Maximum number of results
+
+        Returns:
+            The matching documents with their kind and score, best matches and newest first
+        """
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+
+        with self._lock:
+            scores = None
+            for token in tokens:
+                matches = {}
+                for candidate in self._prefixes.get(token, ()):
+                    factor = 1.0 if candidate == token else PREFIX_FACTOR
+                    postings = self._postings[candidate]
+                    if not matches:
+                        matches = {key: weight * factor for key, weight in postings.items()}
+                        continue
+                    for key, weight in postings.items():
+                        if weight * factor > matches.get(key, 0.0):
+                            matches[key] = weight * factor
+                if scores is None:
+                    scores = matches
+                else:
+                    scores = {key: score + matches[key] for key, score in scores.items() if key in matches}
+                if not scores:
+                    return []
+
+            if kind is not None:
+                scores = {key: score for key, score in scores.items() if key[0] == kind}
+            if activity_type is not None:
+                scores = {key: score for key, score in scores.items()
+                          if self._documents[key].get("type") == activity_type}
+
+            documents = self._documents
+            best = heapq.nlargest(limit, scores.items(),
+                                  key=lambda item: (item[1], documents[item[0]].get("date") or ""))
+            return [{"kind": key[0], **self._documents[key], "score": round(score, 2)} for key, score in best]
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            counts = {kind: 0 for kind in KINDS}
+            for kind, _ in self._documents:
+                counts[kind] += 1
+            return counts
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._documents)
+
+
+class SearchIndexPool:
+    """
+    Thread-safe LRU pool of per-athlete search indexes, like the session pool of the athletes.
+
+    Evicted indexes are rebuilt from the responses of later tool calls.
+    """
+
+    def __init__(self, max_indexes: int):
+        self.max_indexes = max_indexes
+        self._indexes = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, athlete: Optional[str]) -> SearchIndex:
+        """
+        Returns the search index of an athlete, creating an empty one if it is not in the pool.
+        """
+        with self._lock:
+            index = self._indexes.get(athlete)
+            if index is None:
+                index = self._indexes[athlete] = SearchIndex()
+            self._indexes.move_to_end(athlete)
+            while len(self._indexes) > self.max_indexes:
+                self._indexes.popitem(last=False)
+            return index
+
+    def __contains__(self, athlete: Optional[str]) -> bool:
+        with self._lock:
+            return athlete in self._indexes
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._indexes)
@@ -0,0 +1,133 @@
+import codecs
+import json
+from typing import Any, Iterable, Iterator
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the installed extras
+    orjson = None
+
+
+# Name of the JSON backend in use, "orjson" if the optional dependency is installed
+BACKEND = "orjson" if orjson is not None else "json"
+
+# Whitespace allowed between JSON tokens
+JSON_WHITESPACE = " \t\n\r"
+
+# Headers for request bodies serialized with `dumps_bytes`
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+
+def dumps_bytes(data: Any) -> bytes:
+    """
+    Serializes data to compact UTF-8 encoded JSON.
+
+    Uses orjson if it is installed and the standard library otherwise.
+
+    Args:
+        data: The data to serialize
+
+    Returns:
+        The JSON document as bytes
+    """
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+def dumps(data: Any) -> str:
+    """
+    Serializes data to a compact JSON string.
+
+    Args:
+        data: The data to serialize
+
+    Returns:
+        The JSON document as a string
+    """
+    return dumps_bytes(data).decode()
+
+
+def loads(data) -> Any:
+    """
+    Parses a JSON document.
+
+    Args:
+        data: The JSON document as str, bytes or memoryview
+
+    Returns:
+        The parsed data
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    if isinstance(data, memoryview):
+        data = data.tobytes()
+    return json.loads(data)
+
+
+def iter_json_array(chunks: Iterable[bytes]) -> Iterator[Any]:
+    """
+    Parses the elements of a JSON array incrementally from a stream of byte chunks.
+
+    Only the current element and the unparsed rest of the current chunk are held in memory,
+    never the whole document. An empty stream is parsed as an empty array.
+
+    Args:
+        chunks: The UTF-8 encoded JSON document in chunks of any size
+
+    Yields:
+        The parsed elements of the array, one at a time
+
+    Raises:
+        ValueError: If the document is not a JSON array or is truncated
+    """
+    decoder = json.JSONDecoder()
+    text = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+    # "start" expects "[", "first" the first element or "]", "value" an element, "separator" "," or "]"
+    state = "start"
+
+    def pieces():
+        for chunk in chunks:
+            if chunk:
+                yield text.decode(chunk), False
+        yield text.decode(b"", final=True), True
+
+    for piece, final in pieces():
+        buffer += piece
+        pos = 0
+        while True:
+            while pos < len(buffer) and buffer[pos] in JSON_WHITESPACE:
+                pos += 1
+            if pos == len(buffer):
+                break
+
+            if state == "start":
+                if buffer[pos] != "[":
+                    raise ValueError("Expected a JSON array")
+                pos += 1
+                state = "first"
+            elif state == "separator" or (state == "first" and buffer[pos] == "]"):
+                if buffer[pos] == "]":
+                    return
+                if buffer[pos] != ",":
+                    raise ValueError(f"Expected ',' or ']' in JSON array, got {buffer[pos]!r}")
+                pos += 1
+                state = "value"
+            else:
+                try:
+                    value, end = decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    if final:
+                        raise ValueError("Invalid or truncated JSON array")
+                    break
+                # A number is only complete when followed by a delimiter, it may continue in the next chunk
+                if not final and (end == len(buffer) or buffer[end] not in JSON_WHITESPACE + ",]"):
+                    break
+                yield value
+                pos = end
+                state = "separator"
+        buffer = buffer[pos:]
+
+    if state != "start":
+        raise ValueError("Truncated JSON array")
@@ -0,0 +1,314 @@
+import contextvars
+import functools
+import inspect
+import os
+import re
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Annotated, Any, Callable, Optional
+
+import garth
+from pydantic import Field
+
+from .concurrency import max_concurrency
+from .deadlines import DeadlineExceeded, call_with_deadline, check, remaining, write_sent
+from .token_store import TokenStore, token_lock_timeout
+from .tracing import instrument, span, trace_file
+
+
+# Maximum number of athlete sessions kept in memory before the least recently used are evicted
+DEFAULT_MAX_SESSIONS = 32
+
+# Athlete names are used as directory names below GARMIN_ATHLETES_DIR
+ATHLETE_NAME_PATTERN = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_.@-]*$")
+
+ATHLETE_DESCRIPTION = (
+    "Name of the athlete whose Garmin Connect account is used. "
+    "Omit to use the default account."
+)
+
+_current_athlete = contextvars.ContextVar("athlete", default=None)
+
+
+def athletes_dir() -> Optional[str]:
+    """
+    Returns the directory containing one garth token directory per athlete.
+
+    Returns:
+        The expanded value of GARMIN_ATHLETES_DIR, or None if unset
+    """
+    path = os.environ.get("GARMIN_ATHLETES_DIR")
+    return os.path.expanduser(path) if path else None
+
+
+def validate_athlete(athlete: str) -> None:
+    """
+    Checks that an athlete name is safe to use as a directory name, e.g. in token, archive and export paths.
+
+    Raises:
+        ValueError: If the name is invalid
+    """
+    if not isinstance(athlete, str) or not ATHLETE_NAME_PATTERN.match(athlete):
+        raise ValueError(f"Invalid athlete name: {athlete}")
+
+
+def max_sessions() -> int:
+    """
+    Returns the maximum number of athlete sessions kept in memory.
+
+    Returns:
+        The value of GARMIN_MAX_SESSIONS, or the default if unset
+    """
+    return max(1, int(os.environ.get("GARMIN_MAX_SESSIONS", DEFAULT_MAX_SESSIONS)))
+
+
+class Session:
+    """
+    A Garmin Connect account: its garth client and a semaphore bounding its concurrent requests.
+
+    The default account has no client of its own and uses the global garth client.
+    """
+
+    def __init__(self, client: Optional[garth.Client], max_requests: int):
+        self.client = client
+        self.semaphore = threading.BoundedSemaphore(max_requests)
+
+
+class SessionPool:
+    """
+    Thread-safe LRU pool of per-athlete sessions whose tokens are loaded lazily on first use.
+    """
+
+    def __init__(self, home_dir: Optional[str] = None, max_sessions: int = DEFAULT_MAX_SESSIONS,
+                 client_factory: Callable[[], garth.Client] = garth.Client):
+        self.home_dir = home_dir
+        self.max_sessions = max_sessions
+        self.client_factory = client_factory
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, athlete: str) -> Session:
+        """
+        Returns the session of an athlete, loading its tokens if it is not in the pool.
+
+        Raises:
+            ValueError: If multiple athletes are not configured or the athlete is unknown
+        """
+        with self._lock:
+            session = self._sessions.get(athlete)
+            if session is not None:
+                self._sessions.move_to_end(athlete)
+                return session
+
+        session = self._load(athlete)
+
+        with self._lock:
+            session = self._sessions.setdefault(athlete, session)
+            self._sessions.move_to_end(athlete)
+            # Evicted clients are not closed, requests still using them complete normally
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+            return session
+
+    def _load(self, athlete: str) -> Session:
+        if not self.home_dir:
+            raise ValueError("Selecting an athlete requires GARMIN_ATHLETES_DIR to be set.")
+        validate_athlete(athlete)
+
+        path = os.path.join(self.home_dir, athlete)
+        if not os.path.isdir(path):
+            raise ValueError(f"Unknown athlete: {athlete}")
+
+        client = self.client_factory()
+        client.load(path)
+        # Refreshed OAuth2 tokens are saved back to the athlete's directory, shared with other processes
+        TokenStore(path, token_lock_timeout()).attach(client)
+        return Session(client, max_concurrency())
+
+    def __contains__(self, athlete: str) -> bool:
+        with self._lock:
+            return athlete in self._sessions
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._sessions)
+
+
+session_pool = SessionPool(athletes_dir(), max_sessions())
+default_session = Session(None, max_concurrency())
+
+
+def current_athlete() -> Optional[str]:
+    """
+    Returns the athlete selected for the current tool call, or None for the default account.
+    """
+    return _current_athlete.get()
+
+
+@contextmanager
+def use_athlete(athlete: Optional[str]):
+    """
+    Selects the athlete whose account is used by Garmin Connect requests within the block.
+
+    Raises:
+        ValueError: If the athlete name is invalid
+    """
+    if athlete:
+        # Tools build paths from the athlete before any request loads its session
+        validate_athlete(athlete)
+    token = _current_athlete.set(athlete or None)
+    try:
+        yield
+    finally:
+        _current_athlete.reset(token)
+
+
+def current_session() -> Session:
+    athlete = current_athlete()
+    return default_session if athlete is None else session_pool.get(athlete)
+
+
+def current_client() -> garth.Client:
+    """
+    Returns the garth client of the selected athlete.
+    """
+    return current_session().client or garth.client
+
+
+def connectapi(path: str, *args, **kwargs) -> Any:
+    """
+    Sends a Garmin Connect API request with the account of the selected athlete.
+
+    Takes the same arguments as `garth.connectapi`. Concurrent requests are bounded per account,
+    and waiting for a slot and for the response is bounded by the deadline of the tool call.
+    Writes (POST, PUT, DELETE) that have been sent are waited for even after the deadline, since
+    they usually succeed and their outcome would otherwise be unknown.
+
+    Raises:
+        DeadlineExceeded: If the deadline passes before a read's response is received, or before a
+            request is sent
+    """
+    session = current_session()
+    check()
+    method = args[0] if args else kwargs.get("method", "GET")
+    with span("garmin.request", endpoint=path, method=method) as request_span:
+        if trace_file():
+            instrument(session.client or garth.client)
+        if "data" in kwargs:
+            request_span.set("request_bytes", len(kwargs["data"]))
+
+        timeout = remaining()
+        if not session.semaphore.acquire(timeout=None if timeout is None else max(0.0, timeout)):
+            raise DeadlineExceeded(f"Deadline of the tool call exceeded waiting to send {path}")
+
+        def send():
+            # The slot is released when the request completes, even if the caller gave up waiting
+            try:
+                # Requests that start after the deadline, e.g. queued behind slow ones, are not sent
+                check()
+                if session.client is None:
+                    return garth.connectapi(path, *args, **kwargs)
+                return session.client.connectapi(path, *args, **kwargs)
+            finally:
+                session.semaphore.release()
+
+        if method.upper() != "GET":
+            write_sent()
+            return send()
+        return call_with_deadline(send)
+
+
+@contextmanager
+def open_stream(path: str, **kwargs):
+    """
+    Sends a Garmin Connect API GET request with the account of the selected athlete and yields
+    the response without reading its body, e.g. to parse a large response incrementally.
+
+    The request occupies one of the account's concurrent request slots until the block exits.
+
+    Args:
+        path: The API endpoint
+        **kwargs: Further arguments of the request, e.g. params
+
+    Yields:
+        The streamed `requests.Response`
+
+    Raises:
+        DeadlineExceeded: If the deadline passes before the response headers are received
+    """
+    session = current_session()
+    client = session.client or garth.client
+    check()
+    with span("garmin.request", endpoint=path, method="GET", stream=True):
+        if trace_file():
+            instrument(client)
+
+        timeout = remaining()
+        if not session.semaphore.acquire(timeout=None if timeout is None else max(0.0, timeout)):
+            raise DeadlineExceeded(f"Deadline of the tool call exceeded waiting to send {path}")
+        lock = threading.Lock()
+        handoff = {"response": None, "abandoned": False}
+
+        def send():
+            # The slot is released here if the request fails or the caller gave up waiting for it,
+            # in which case a late response is closed to return its connection to the pool
+            try:
+                check()
+                response = client.get("connectapi", path, api=True, stream=True, **kwargs)
+            except BaseException:
+                session.semaphore.release()
+                raise
+            with lock:
+                abandoned = handoff["abandoned"]
+                if not abandoned:
+                    handoff["response"] = response
+            if abandoned:
+                response.close()
+                session.semaphore.release()
+            return response
+
+        try:
+            response = call_with_deadline(send)
+        except DeadlineExceeded:
+            with lock:
+                handoff["abandoned"] = True
+                response = handoff["response"]
+            # The response arrived just as the caller gave up
+            if response is not None:
+                response.close()
+                session.semaphore.release()
+            raise
+
+        try:
+            yield response
+        finally:
+            response.close()
+            session.semaphore.release()
+
+
+def cache_key(key: str) -> str:
+    """
+    Scopes a cache key to the selected athlete.
+    """
+    athlete = current_athlete()
+    return key if athlete is None else f"{athlete}:{key}"
+
+
+def with_athlete(fn: Callable) -> Callable:
+    """
+    Adds an optional `athlete` argument to a tool that selects the account for its requests.
+    """
+    @functools.wraps(fn)
+    def wrapper(*args, athlete: Optional[str] = None, **kwargs):
+        with use_athlete(athlete):
+            return fn(*args, **kwargs)
+
+    annotation = Annotated[Optional[str], Field(description=ATHLETE_DESCRIPTION)]
+    signature = inspect.signature(fn)
+    wrapper.__signature__ = signature.replace(parameters=[
+        *signature.parameters.values(),
+        inspect.Parameter("athlete", inspect.Parameter.KEYWORD_ONLY, default=None, annotation=annotation),
+    ])
+    wrapper.__annotations__ = {**fn.__annotations__, "athlete": annotation}
+    return wrapper
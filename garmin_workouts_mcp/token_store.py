@@ -0,0 +1,136 @@
+import logging
+import os
+import shutil
+import tempfile
+import time
+from contextlib import contextmanager
+
+import garth
+from garth.auth_tokens import OAuth2Token
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+
+logger = logging.getLogger(__name__)
+
+# Default time in seconds a process waits for another process logging in or refreshing tokens
+DEFAULT_LOCK_TIMEOUT = 120
+
+# Name of the lock file in the token directory
+LOCK_FILE = ".lock"
+
+# Interval in seconds between attempts to acquire the lock
+LOCK_POLL_INTERVAL = 0.05
+
+
+def token_lock_timeout() -> float:
+    """
+    Returns the time a process waits for the token lock.
+
+    Returns:
+        The value of GARMIN_TOKEN_LOCK_TIMEOUT, or the default if unset
+    """
+    return max(0.0, float(os.environ.get("GARMIN_TOKEN_LOCK_TIMEOUT", DEFAULT_LOCK_TIMEOUT)))
+
+
+class TokenStore:
+    """
+    A garth token directory shared by several processes, e.g. the workers of the HTTP transport.
+
+    Logins and token refreshes hold an exclusive file lock on the directory, so that only one process
+    sends them while the others wait and then reuse the saved tokens. Tokens are written to a
+    temporary directory and moved into place, so that readers never see partially written files.
+    Without `fcntl` (Windows) the directory is not locked.
+    """
+
+    def __init__(self, path: str, timeout: float = DEFAULT_LOCK_TIMEOUT):
+        self.path = os.path.expanduser(path)
+        self.timeout = timeout
+
+    @contextmanager
+    def lock(self):
+        """
+        Holds the exclusive lock of the token directory for the block.
+
+        Raises:
+            TimeoutError: If the lock is not acquired within the timeout
+        """
+        os.makedirs(self.path, exist_ok=True)
+        with open(os.path.join(self.path, LOCK_FILE), "a") as f:
+            if fcntl is not None:
+                deadline = time.monotonic() + self.timeout
+                while True:
+                    try:
+                        fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                        break
+                    except BlockingIOError:
+                        if time.monotonic() >= deadline:
+                            raise TimeoutError(f"Timed out waiting for the token lock of {self.path}")
+                        time.sleep(LOCK_POLL_INTERVAL)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def load(self, client: garth.Client) -> bool:
+        """
+        Loads the saved tokens into a client.
+
+        Returns:
+            True if the tokens were loaded, False if they are missing or invalid
+        """
+        try:
+            client.load(self.path)
+        except (OSError, ValueError, TypeError):
+            return False
+        return True
+
+    def save(self, client: garth.Client) -> None:
+        """
+        Atomically replaces the saved tokens with those of a client.
+        """
+        os.makedirs(self.path, exist_ok=True)
+        staging = tempfile.mkdtemp(prefix=".tokens-", dir=self.path)
+        try:
+            client.dump(staging)
+            for name in os.listdir(staging):
+                os.replace(os.path.join(staging, name), os.path.join(self.path, name))
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+
+    def attach(self, client: garth.Client) -> None:
+        """
+        Makes a client refresh its expired OAuth2 token through the store.
+
+        A refresh first reuses a valid token saved by another process or thread, and otherwise
+        refreshes the token and saves it, holding the lock.
+        """
+        # Replaces garth's own saving of refreshed tokens, which is neither locked nor atomic
+        client._garth_home = None
+        if getattr(client, "_token_store", None) is None:
+            client.refresh_oauth2 = _locked_refresh(client, client.refresh_oauth2)
+        client._token_store = self
+
+
+def _locked_refresh(client: garth.Client, refresh):
+    def refresh_oauth2():
+        store = client._token_store
+        with store.lock():
+            if _valid(client.oauth2_token):
+                return
+            stored = garth.Client()
+            if store.load(stored) and _valid(stored.oauth2_token):
+                logger.info("Reusing OAuth2 token refreshed by another process")
+                client.oauth1_token, client.oauth2_token = stored.oauth1_token, stored.oauth2_token
+                return
+            refresh()
+            store.save(client)
+    return refresh_oauth2
+
+
+def _valid(token) -> bool:
+    return isinstance(token, OAuth2Token) and not token.expired
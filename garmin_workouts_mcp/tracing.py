@@ -0,0 +1,191 @@
+import contextvars
+import json
+import logging
+import os
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+
+from fastmcp.server.middleware import Middleware
+
+
+logger = logging.getLogger(__name__)
+
+_current_span = contextvars.ContextVar("span", default=None)
+
+
+def trace_file() -> Optional[str]:
+    """
+    Returns the file finished spans are appended to.
+
+    Returns:
+        The expanded value of GARMIN_TRACE_FILE, or None (tracing disabled) if unset
+    """
+    path = os.environ.get("GARMIN_TRACE_FILE")
+    return os.path.expanduser(path) if path else None
+
+
+class Span:
+    """
+    A timed operation within a trace, e.g. a tool call or a Garmin Connect request.
+    """
+
+    def __init__(self, name: str, parent: Optional["Span"] = None, attributes: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.trace_id = parent.trace_id if parent else secrets.token_hex(8)
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent.span_id if parent else None
+        self.attributes = dict(attributes or {})
+        self.error = None
+        self.start = time.time()
+        self.duration = None
+        self._start = time.perf_counter()
+
+    def set(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def end(self) -> None:
+        self.duration = time.perf_counter() - self._start
+
+    def to_dict(self) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": self.start,
+            "duration_ms": round(self.duration * 1000, 3),
+            "thread": threading.current_thread().name,
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+class _NoopSpan:
+    """Stands in for spans while tracing is disabled."""
+
+    def set(self, key: str, value: Any) -> None:
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class JsonlExporter:
+    """
+    Appends finished spans as JSON lines to a file, which can be shared by several processes.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+        self._lock = threading.Lock()
+
+    def export(self, span: Span) -> None:
+        line = json.dumps(span.to_dict(), default=str) + "\n"
+        with self._lock:
+            try:
+                if self._file is None:
+                    os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                    self._file = open(self.path, "a", buffering=1, encoding="utf-8")
+                self._file.write(line)
+            except OSError as e:
+                logger.warning("Writing span to %s failed: %s", self.path, e)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+_exporter = None
+_exporter_lock = threading.Lock()
+
+
+def _get_exporter() -> Optional[JsonlExporter]:
+    global _exporter
+    path = trace_file()
+    if path is None:
+        return None
+    with _exporter_lock:
+        if _exporter is None or _exporter.path != path:
+            if _exporter is not None:
+                _exporter.close()
+            _exporter = JsonlExporter(path)
+        return _exporter
+
+
+def current_span():
+    """
+    Returns the innermost active span, or a no-op span if there is none.
+    """
+    return _current_span.get() or NOOP_SPAN
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """
+    Records a span nested in the current span, if tracing is enabled.
+
+    Args:
+        name: Name of the span, e.g. "validate" or "garmin.request"
+        **attributes: Initial attributes, more can be set on the yielded span
+
+    Yields:
+        The span, or a no-op span if tracing is disabled
+    """
+    exporter = _get_exporter()
+    if exporter is None:
+        yield NOOP_SPAN
+        return
+
+    current = Span(name, _current_span.get(), attributes)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        _current_span.reset(token)
+        current.end()
+        exporter.export(current)
+
+
+def record_response(response, *args, **kwargs):
+    """
+    requests response hook adding the status and size of a response to the current span.
+    """
+    current = current_span()
+    current.set("status", response.status_code)
+    length = response.headers.get("Content-Length")
+    if length is not None:
+        current.set("bytes", int(length))
+    elif not kwargs.get("stream"):
+        current.set("bytes", len(response.content))
+    return response
+
+
+def instrument(client) -> None:
+    """
+    Adds the status and size of the responses of a garth client to the spans of its requests.
+    """
+    hooks = client.sess.hooks.setdefault("response", [])
+    if record_response not in hooks:
+        hooks.append(record_response)
+
+
+class TracingMiddleware(Middleware):
+    """
+    Records a root span for every tool call.
+    """
+
+    async def on_call_tool(self, context, call_next):
+        arguments = context.message.arguments or {}
+        with span(f"tool.{context.message.name}", tool=context.message.name) as tool_span:
+            if arguments.get("athlete"):
+                tool_span.set("athlete", arguments["athlete"])
+            return await call_next(context)
@@ -0,0 +1,176 @@
+import heapq
+from typing import Optional, Tuple
+
+import numpy as np
+
+
+# Mean earth radius in meters, used to project positions onto a local plane
+EARTH_RADIUS = 6371008.8
+
+# Coordinates of encoded polylines are rounded to 5 decimal places (about 1 m)
+POLYLINE_PRECISION = 5
+
+
+def project(lat: np.ndarray, lon: np.ndarray) -> np.ndarray:
+    """
+    Projects positions in degrees onto a local equirectangular plane in meters.
+
+    Accurate enough for simplifying a single activity's track, which spans at most a few hundred kilometers.
+
+    Returns:
+        An (n, 2) array of x and y coordinates
+    """
+    lat_rad = np.radians(lat)
+    scale = np.cos(np.mean(lat_rad)) if len(lat_rad) else 1.0
+    return np.column_stack((EARTH_RADIUS * np.radians(lon) * scale, EARTH_RADIUS * lat_rad))
+
+
+def _farthest(x: np.ndarray, y: np.ndarray, first: int, last: int) -> Tuple[int, float]:
+    """
+    Returns the index and distance of the point between first and last farthest from the line through both.
+    """
+    dx, dy = x[last] - x[first], y[last] - y[first]
+    length = np.hypot(dx, dy)
+    interior_x = x[first + 1:last] - x[first]
+    interior_y = y[first + 1:last] - y[first]
+    if length == 0:
+        # A closed loop: distances to the common start and end point
+        distances = np.hypot(interior_x, interior_y)
+        worst = int(np.argmax(distances))
+        return first + 1 + worst, float(distances[worst])
+    cross = np.abs(dx * interior_y - dy * interior_x)
+    worst = int(np.argmax(cross))
+    return first + 1 + worst, float(cross[worst] / length)
+
+
+def simplify(points: np.ndarray, tolerance: Optional[float] = None,
+             max_points: Optional[int] = None) -> Tuple[np.ndarray, float]:
+    """
+    Simplifies a track with the Douglas-Peucker algorithm, refining the worst segment first.
+
+    Distances are measured perpendicular to the line through the ends of each segment, as in the
+    original algorithm.
+
+    Segments are kept in a heap ordered by the distance of their farthest point, and the worst
+    segment is split at that point until its distance is within the tolerance or the point budget
+    is used up. The distances of each segment are computed in one vectorized operation, so the
+    number of Python-level steps grows with the number of kept points, not with the track length.
+
+    Args:
+        points: An (n, 2) array of projected coordinates in meters
+        tolerance: Maximum distance in meters of a dropped point from the simplified track
+        max_points: Maximum number of points kept, at least 2
+
+    Returns:
+        The sorted indices of the kept points and the maximum distance of a dropped point
+
+    Raises:
+        ValueError: If neither a tolerance nor a point budget is given or the budget is below 2
+    """
+    if tolerance is None and max_points is None:
+        raise ValueError("Either a tolerance or a point budget is required")
+    if max_points is not None and max_points < 2:
+        raise ValueError(f"Point budget must be at least 2, got {max_points}")
+
+    count = len(points)
+    if count <= 2:
+        return np.arange(count), 0.0
+
+    limit = count if max_points is None else min(max_points, count)
+    tolerance = 0.0 if tolerance is None else tolerance
+    x, y = np.ascontiguousarray(points[:, 0]), np.ascontiguousarray(points[:, 1])
+    kept = [0, count - 1]
+    heap = []
+
+    def push(first: int, last: int) -> None:
+        if last - first < 2:
+            return
+        split, distance = _farthest(x, y, first, last)
+        heapq.heappush(heap, (-distance, first, last, split))
+
+    push(0, count - 1)
+    while heap and len(kept) < limit:
+        if -heap[0][0] <= tolerance:
+            break
+        _, first, last, split = heapq.heappop(heap)
+        kept.append(split)
+        push(first, split)
+        push(split, last)
+
+    error = -heap[0][0] if heap else 0.0
+    return np.sort(np.array(kept)), error
+
+
+def encode_polyline(lat: np.ndarray, lon: np.ndarray, precision: int = POLYLINE_PRECISION) -> str:
+    """
+    Encodes positions in degrees with the Google encoded polyline algorithm, vectorized.
+
+    Returns:
+        The encoded polyline
+    """
+    factor = 10 ** precision
+    coordinates = np.empty(2 * len(lat), dtype=np.int64)
+    coordinates[0::2] = np.round(np.asarray(lat) * factor)
+    coordinates[1::2] = np.round(np.asarray(lon) * factor)
+    deltas = np.diff(coordinates.reshape(-1, 2), axis=0, prepend=0).ravel()
+
+    values = np.where(deltas < 0, ~(deltas << 1), deltas << 1)
+    # Every value is split into 5-bit chunks, least significant first, at most 7 for 32-bit values
+    shifted = values[:, None] >> (5 * np.arange(7))
+    lengths = np.maximum(1, np.count_nonzero(shifted, axis=1))
+    positions = np.arange(7)
+    chunks = (shifted & 0x1F) | np.where(positions < (lengths - 1)[:, None], 0x20, 0)
+    return (chunks[positions < lengths[:, None]] + 63).astype(np.uint8).tobytes().decode("ascii")
+
+
+def decode_polyline(polyline: str, precision: int = POLYLINE_PRECISION) -> np.ndarray:
+    """
+    Decodes a Google encoded polyline.
+
+    Returns:
+        An (n, 2) array of latitudes and longitudes in degrees
+    """
+    values, value, shift = [], 0, 0
+    for char in polyline.encode("ascii"):
+        chunk = char - 63
+        value |= (chunk & 0x1F) << shift
+        shift += 5
+        if not chunk & 0x20:
+            values.append(~(value >> 1) if value & 1 else value >> 1)
+            value, shift = 0, 0
+    return np.cumsum(np.array(values, dtype=np.int64).reshape(-1, 2), axis=0) / 10 ** precision
+
+
+def simplify_track(lat, lon, tolerance: Optional[float] = None, max_points: Optional[int] = None) -> dict:
+    """
+    Simplifies a GPS track and encodes it as a polyline.
+
+    Args:
+        lat: Latitudes in degrees, NaN where a record has no position
+        lon: Longitudes in degrees, NaN where a record has no position
+        tolerance: Maximum distance in meters of a dropped point from the simplified track
+        max_points: Maximum number of points kept
+
+    Returns:
+        The encoded polyline, the number of kept and original points, the maximum distance
+        of a dropped point in meters and the bounds of the track
+    """
+    lat = np.asarray(lat, dtype=float)
+    lon = np.asarray(lon, dtype=float)
+    valid = ~(np.isnan(lat) | np.isnan(lon))
+    lat, lon = lat[valid], lon[valid]
+
+    if not len(lat):
+        return {"polyline": "", "points": 0, "originalPoints": 0, "maxError": 0.0, "bounds": None}
+
+    kept, error = simplify(project(lat, lon), tolerance, max_points)
+    return {
+        "polyline": encode_polyline(lat[kept], lon[kept]),
+        "points": len(kept),
+        "originalPoints": len(lat),
+        "maxError": round(error, 2),
+        "bounds": {
+            "south": float(lat.min()), "west": float(lon.min()),
+            "north": float(lat.max()), "east": float(lon.max()),
+        },
+    }
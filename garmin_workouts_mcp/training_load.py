@@ -0,0 +1,176 @@
+from datetime import date
+from typing import List, Optional
+
+import numpy as np
+
+
+# Rolling windows in days for acute (fatigue) and chronic (fitness) load
+ACUTE_LOAD_DAYS = 7
+CHRONIC_LOAD_DAYS = 28
+
+
+def activities_to_columns(activities: List[dict]) -> dict:
+    """
+    Converts activity summaries as returned by the activity list endpoint into columns.
+
+    Training load uses Garmin's `activityTrainingLoad` and falls back to the
+    duration in minutes for activities without one.
+
+    Args:
+        activities: The activity summaries
+
+    Returns:
+        A dictionary of equally long NumPy arrays: day, sport, duration (s), distance (m) and load
+    """
+    count = len(activities)
+    days = np.empty(count, dtype="datetime64[D]")
+    sports = np.empty(count, dtype=object)
+    duration = np.zeros(count)
+    distance = np.zeros(count)
+    load = np.full(count, np.nan)
+
+    for i, activity in enumerate(activities):
+        days[i] = (activity.get("startTimeLocal") or activity.get("startTimeGMT") or "")[:10] or "NaT"
+        sports[i] = (activity.get("activityType") or {}).get("typeKey", "other")
+        duration[i] = activity.get("duration") or 0
+        distance[i] = activity.get("distance") or 0
+        if activity.get("activityTrainingLoad") is not None:
+            load[i] = activity["activityTrainingLoad"]
+
+    load = np.where(np.isnan(load), duration / 60, load)
+    valid = ~np.isnat(days)
+    return {
+        "day": days[valid],
+        "sport": sports[valid].astype(str),
+        "duration": duration[valid],
+        "distance": distance[valid],
+        "load": load[valid],
+    }
+
+
+def aggregate_training(columns: dict, start_date: date, end_date: date, period: str = "week") -> dict:
+    """
+    Computes per-period totals, time per sport and rolling acute/chronic load.
+
+    Args:
+        columns: Activity columns as returned by `activities_to_columns`
+        start_date: First day of the aggregation range
+        end_date: Last day of the aggregation range
+        period: Either "week" (weeks starting on Monday) or "month"
+
+    Returns:
+        A dictionary with the period rows, totals per sport and the training load at end_date
+
+    Raises:
+        ValueError: If the period is not supported
+    """
+    if period not in ("week", "month"):
+        raise ValueError(f"Period must be 'week' or 'month', got {period}")
+
+    first = np.datetime64(start_date, "D")
+    last = np.datetime64(end_date, "D")
+
+    # Rolling load uses the daily series from CHRONIC_LOAD_DAYS before start_date, so
+    # that the chronic load is already warmed up on the first day of the range
+    load_first = first - np.timedelta64(CHRONIC_LOAD_DAYS - 1, "D")
+    in_load_range = (columns["day"] >= load_first) & (columns["day"] <= last)
+    day_index = (columns["day"][in_load_range] - load_first).astype(int)
+    daily_load = np.bincount(day_index, weights=columns["load"][in_load_range],
+                             minlength=int((last - load_first).astype(int)) + 1)
+    acute = _rolling_mean(daily_load, ACUTE_LOAD_DAYS)
+    chronic = _rolling_mean(daily_load, CHRONIC_LOAD_DAYS)
+
+    in_range = (columns["day"] >= first) & (columns["day"] <= last)
+    day = columns["day"][in_range]
+    sport = columns["sport"][in_range]
+    duration = columns["duration"][in_range]
+    distance = columns["distance"][in_range]
+    load = columns["load"][in_range]
+
+    sports, sport_index = np.unique(sport, return_inverse=True)
+
+    # Period buckets
+    if period == "week":
+        bucket_starts = day - ((day.astype(int) + 3) % 7).astype("timedelta64[D]")
+        first_bucket = first - np.timedelta64((int(first.astype(int)) + 3) % 7, "D")
+        all_buckets = np.arange(first_bucket, last + np.timedelta64(1, "D"), np.timedelta64(7, "D"))
+        bucket_ends = np.minimum(all_buckets + np.timedelta64(6, "D"), last)
+    else:
+        bucket_starts = day.astype("datetime64[M]")
+        one_month = np.timedelta64(1, "M")
+        all_buckets = np.arange(first.astype("datetime64[M]"), last.astype("datetime64[M]") + one_month, one_month)
+        bucket_ends = np.minimum((all_buckets + one_month).astype("datetime64[D]") - np.timedelta64(1, "D"), last)
+
+    bucket_index = np.searchsorted(all_buckets, bucket_starts)
+    bucket_count = len(all_buckets)
+    counts = np.bincount(bucket_index, minlength=bucket_count)
+    durations = np.bincount(bucket_index, weights=duration, minlength=bucket_count)
+    distances = np.bincount(bucket_index, weights=distance, minlength=bucket_count)
+    loads = np.bincount(bucket_index, weights=load, minlength=bucket_count)
+    sport_durations = np.bincount(
+        bucket_index * len(sports) + sport_index, weights=duration, minlength=bucket_count * len(sports)
+    ).reshape(bucket_count, len(sports))
+    end_index = (bucket_ends - load_first).astype(int)
+
+    rows = []
+    for i, bucket in enumerate(all_buckets):
+        rows.append({
+            period: str(bucket),
+            "count": int(counts[i]),
+            "hours": round(float(durations[i] / 3600), 2),
+            "km": round(float(distances[i] / 1000), 2),
+            "load": round(float(loads[i]), 1),
+            "hoursBySport": {
+                str(sports[j]): round(float(sport_durations[i, j] / 3600), 2)
+                for j in np.flatnonzero(sport_durations[i])
+            },
+            "acuteLoad": round(float(acute[end_index[i]]), 1),
+            "chronicLoad": round(float(chronic[end_index[i]]), 1),
+        })
+
+    sport_totals = np.bincount(sport_index, weights=duration, minlength=len(sports))
+    sport_distances = np.bincount(sport_index, weights=distance, minlength=len(sports))
+    sport_counts = np.bincount(sport_index, minlength=len(sports))
+
+    return {
+        "period": {"start": str(first), "end": str(last), "groupBy": period},
+        "totals": {
+            "count": int(len(day)),
+            "hours": round(float(duration.sum()) / 3600, 2),
+            "km": round(float(distance.sum()) / 1000, 2),
+            "load": round(float(load.sum()), 1),
+        },
+        "bySport": {
+            str(sports[j]): {
+                "count": int(sport_counts[j]),
+                "hours": round(float(sport_totals[j] / 3600), 2),
+                "km": round(float(sport_distances[j] / 1000), 2),
+            }
+            for j in range(len(sports))
+        },
+        "load": _load_status(acute[-1], chronic[-1]),
+        "rows": rows,
+    }
+
+
+def _rolling_mean(series: np.ndarray, window: int) -> np.ndarray:
+    """
+    Computes the trailing rolling mean of a daily series with a cumulative sum.
+    """
+    cumulative = np.concatenate(([0.0], np.cumsum(series)))
+    index = np.arange(1, len(series) + 1)
+    return (cumulative[index] - cumulative[np.maximum(index - window, 0)]) / window
+
+
+def _load_status(acute: float, chronic: float) -> dict:
+    """
+    Returns the acute and chronic load and their ratio.
+    """
+    ratio: Optional[float] = round(float(acute / chronic), 2) if chronic > 0 else None
+    return {
+        "acute": round(float(acute), 1),
+        "chronic": round(float(chronic), 1),
+        "acuteChronicRatio": ratio,
+        "acuteDays": ACUTE_LOAD_DAYS,
+        "chronicDays": CHRONIC_LOAD_DAYS,
+    }
@@ -0,0 +1,217 @@
+import copy
+from datetime import date, datetime, timedelta
+from typing import List, Optional
+
+
+WEEKDAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+
+# Step fields that can be progressed and how their values are rounded
+PROGRESSION_FIELDS = {
+    "stepDuration": lambda value: int(round(value)),
+    "stepDistance": lambda value: round(value, 2),
+    "numberOfIterations": lambda value: max(1, int(round(value))),
+}
+
+
+def expand_plan(plan: dict) -> List[dict]:
+    """
+    Expands a parametric training plan template into dated workouts.
+
+    Args:
+        plan: The plan template containing startDate, weeks, workouts and an optional deload rule
+
+    Returns:
+        A list of entries with the ISO date and the workout data for each scheduled workout,
+        ordered by date
+
+    Raises:
+        ValueError: If the plan template is invalid
+    """
+    start_date = parse_date(plan.get("startDate"), "startDate")
+
+    weeks = plan.get("weeks")
+    if not isinstance(weeks, int) or weeks <= 0:
+        raise ValueError("Invalid or missing weeks for plan.")
+
+    templates = plan.get("workouts")
+    if not isinstance(templates, list) or not templates:
+        raise ValueError("Plan must contain at least one workout.")
+
+    deload = plan.get("deload") or {}
+    deload_every = deload.get("every")
+    deload_factor = deload.get("factor", 1)
+    if deload and (not isinstance(deload_every, int) or deload_every <= 0):
+        raise ValueError("Invalid or missing every for plan deload.")
+
+    entries = []
+    for week in range(weeks):
+        week_start = start_date + timedelta(weeks=week)
+        is_deload = bool(deload_every) and (week + 1) % deload_every == 0
+        factor = deload_factor if is_deload else 1
+
+        for index, template in enumerate(templates):
+            if not isinstance(template.get("workout"), dict):
+                raise ValueError(f"Missing workout for plan workout {index + 1}.")
+
+            workout = progress_workout(template["workout"], template.get("progression") or {}, week, factor)
+            workout["name"] = workout_name(plan.get("name"), template["workout"].get("name", f"Workout {index + 1}"),
+                                           week, is_deload)
+            entries.append({
+                "date": (week_start + timedelta(days=day_offset(template.get("day", 0), start_date))).isoformat(),
+                "workout": workout,
+            })
+
+    entries.sort(key=lambda entry: entry["date"])
+    return entries
+
+
+def progress_workout(workout: dict, progression: dict, week: int, factor: float = 1) -> dict:
+    """
+    Applies progression rules for the given week to a copy of the workout.
+
+    Each rule is keyed by a step field (stepDuration, stepDistance or numberOfIterations) and
+    contains either "add" (absolute increase per progression) or "percent" (increase of the
+    base value in percent per progression). Optional keys are "every" (weeks per progression),
+    "max" (upper bound) and "stepTypes" (only progress steps of these types).
+
+    Args:
+        workout: The base workout data
+        progression: The progression rules
+        week: The zero-based week of the plan
+        factor: Multiplier applied to step durations and distances after progression,
+            e.g. for deload weeks
+
+    Returns:
+        The progressed workout data
+
+    Raises:
+        ValueError: If a progression rule is invalid
+    """
+    for field, rule in progression.items():
+        if field not in PROGRESSION_FIELDS:
+            raise ValueError(f"Unsupported progression field: {field}")
+        if not isinstance(rule, dict) or ("add" in rule) == ("percent" in rule):
+            raise ValueError(f"Progression for {field} must contain either add or percent.")
+        every = rule.get("every", 1)
+        if not isinstance(every, int) or every <= 0:
+            raise ValueError(f"Invalid every for progression of {field}.")
+
+    workout = copy.deepcopy(workout)
+    _progress_steps(workout.get("steps", []), progression, week, factor)
+    return workout
+
+
+def _progress_steps(steps: List[dict], progression: dict, week: int, factor: float) -> None:
+    for step in steps:
+        for field, round_value in PROGRESSION_FIELDS.items():
+            value = step.get(field)
+            if not isinstance(value, (int, float)) or isinstance(value, bool):
+                continue
+
+            rule = progression.get(field)
+            if rule and (not rule.get("stepTypes") or step.get("stepType") in rule["stepTypes"]):
+                increments = week // rule.get("every", 1)
+                if "add" in rule:
+                    value += rule["add"] * increments
+                else:
+                    value *= 1 + rule["percent"] / 100 * increments
+                if rule.get("max") is not None:
+                    value = min(value, rule["max"])
+
+            if field != "numberOfIterations":
+                value *= factor
+            step[field] = round_value(value)
+
+        if step.get("steps"):
+            _progress_steps(step["steps"], progression, week, factor)
+
+
+def workout_name(plan_name: Optional[str], name: str, week: int, is_deload: bool) -> str:
+    """
+    Builds the name of a plan workout, e.g. "Base W03 Tempo Run".
+    """
+    parts = [plan_name, f"W{week + 1:02d}", name, "(deload)" if is_deload else None]
+    return " ".join(part for part in parts if part)
+
+
+def day_offset(day, start_date: date) -> int:
+    """
+    Returns the offset in days from the start of a plan week for a workout day.
+
+    Args:
+        day: Either an offset in days (0-6) or a weekday name such as "tuesday"
+        start_date: The start date of the plan
+
+    Returns:
+        The offset in days
+
+    Raises:
+        ValueError: If the day is invalid
+    """
+    if isinstance(day, str):
+        if day.lower() not in WEEKDAYS:
+            raise ValueError(f"Invalid day: {day}")
+        return (WEEKDAYS.index(day.lower()) - start_date.weekday()) % 7
+    if not isinstance(day, int) or not 0 <= day <= 6:
+        raise ValueError(f"Invalid day: {day}")
+    return day
+
+
+def parse_date(value, name: str) -> date:
+    """
+    Parses an ISO date (YYYY-MM-DD).
+
+    Raises:
+        ValueError: If the date is missing or not in ISO format
+    """
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date()
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} must be in ISO format (YYYY-MM-DD)")
+
+
+def diff_schedule(desired: List[dict], scheduled: List[dict]) -> dict:
+    """
+    Computes the minimal changes that turn the scheduled workouts into the desired ones.
+
+    Entries are matched by date and workout name. A desired workout that is not scheduled
+    reuses a stale scheduled workout with the same name (moving it to the new date) before
+    falling back to uploading a new workout.
+
+    Args:
+        desired: The desired entries, each with at least "date" and "name"
+        scheduled: The scheduled workouts, each with "date", "name", "workoutId" and "scheduleId"
+
+    Returns:
+        A dictionary with the matched (desired, scheduled) pairs to "keep", the (desired, stale
+        scheduled) pairs to "move", the desired entries to "upload" and the scheduled workouts
+        to "unschedule"
+    """
+    by_key = {}
+    for item in scheduled:
+        by_key.setdefault((item["date"], item["name"]), []).append(item)
+
+    keep = []
+    missing = []
+    for entry in desired:
+        matches = by_key.get((entry["date"], entry["name"]))
+        if matches:
+            keep.append((entry, matches.pop()))
+        else:
+            missing.append(entry)
+
+    stale = [item for items in by_key.values() for item in items]
+    stale_by_name = {}
+    for item in stale:
+        stale_by_name.setdefault(item["name"], []).append(item)
+
+    move = []
+    upload = []
+    for entry in missing:
+        candidates = stale_by_name.get(entry["name"])
+        if candidates:
+            move.append((entry, candidates.pop()))
+        else:
+            upload.append(entry)
+
+    return {"keep": keep, "move": move, "upload": upload, "unschedule": stale}
@@ -0,0 +1,152 @@
+import os
+from contextlib import contextmanager
+from typing import Any, Iterator, List, Tuple
+
+from .garmin_workout import make_workout_data
+from .serialization import dumps, dumps_bytes, loads
+
+
+def export_dir() -> str:
+    """
+    Returns the directory relative export and import paths are resolved in.
+
+    Returns:
+        The value of GARMIN_EXPORT_DIR, or ~/.garmin-workouts-mcp/exports if unset
+    """
+    return os.path.expanduser(os.environ.get("GARMIN_EXPORT_DIR", "~/.garmin-workouts-mcp/exports"))
+
+
+# Fields of a workout returned by Garmin Connect that identify it or its owner, removed before it is uploaded again
+WORKOUT_ID_FIELDS = (
+    "workoutId", "ownerId", "author", "createdDate", "updatedDate", "uploadTimestamp", "shared",
+    "sharedWithUsers", "trainingPlanId", "atpPlanId", "consumer", "consumerName", "consumerImageURL",
+    "consumerWebsiteURL", "workoutProvider", "workoutSourceId",
+)
+
+# Fields of a workout step assigned by Garmin Connect
+STEP_ID_FIELDS = ("stepId",)
+
+
+class JsonlWriter:
+    """
+    Writes records to the temporary file of `open_jsonl_writer`, one record per call.
+    """
+
+    def __init__(self, f, partial_path: str):
+        self.partial_path = partial_path
+        self.complete = True
+        self._file = f
+
+    def __call__(self, record: Any) -> None:
+        self._file.write(dumps_bytes(record) + b"\n")
+
+    def abandon(self) -> None:
+        """
+        Keeps the file unchanged and the records written so far in the temporary file at `partial_path`.
+        """
+        self.complete = False
+
+
+@contextmanager
+def open_jsonl_writer(path: str):
+    """
+    Opens a JSON lines file for writing, one record per call of the writer.
+
+    Records are written to a temporary file next to the path, which replaces the file only when
+    the block completes, so that an interrupted export never leaves a partial file behind. If the
+    writer is abandoned, the file is kept and the temporary file is left for inspection.
+
+    Yields:
+        A JsonlWriter
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    partial_path = path + ".part"
+    writer = None
+    try:
+        with open(partial_path, "wb") as f:
+            writer = JsonlWriter(f, partial_path)
+            yield writer
+        if writer.complete:
+            os.replace(partial_path, path)
+    finally:
+        if (writer is None or writer.complete) and os.path.exists(partial_path):
+            os.remove(partial_path)
+
+
+def iter_jsonl(path: str) -> Iterator[Tuple[int, Any]]:
+    """
+    Reads a JSON lines file one line at a time, skipping blank lines.
+
+    Yields:
+        The line number, starting at 1, and the parsed record of every line
+
+    Raises:
+        ValueError: If a line is not valid JSON
+    """
+    with open(path, "rb") as f:
+        for number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                yield number, loads(line)
+            except ValueError as e:
+                raise ValueError(f"Invalid JSON on line {number} of {path}: {e}")
+
+
+def is_garmin_workout(record: Any) -> bool:
+    """
+    Returns whether an exported record is a workout in Garmin's full format rather than workout data.
+    """
+    return isinstance(record, dict) and "workoutSegments" in record
+
+
+def to_upload_payload(workout: dict) -> dict:
+    """
+    Returns a workout in Garmin's format without the IDs and ownership fields assigned by Garmin Connect,
+    to be uploaded as a new workout with all its other fields, e.g. its description and step notes.
+    """
+    payload = {key: value for key, value in workout.items() if key not in WORKOUT_ID_FIELDS}
+    payload["workoutSegments"] = [
+        {**segment, "workoutSteps": [_strip_step(step) for step in segment.get("workoutSteps") or []]}
+        for segment in workout.get("workoutSegments") or []
+    ]
+    return payload
+
+
+def _strip_step(step: dict) -> dict:
+    step = {key: value for key, value in step.items() if key not in STEP_ID_FIELDS}
+    # Steps of repeat groups
+    if isinstance(step.get("workoutSteps"), list):
+        step["workoutSteps"] = [_strip_step(child) for child in step["workoutSteps"]]
+    return step
+
+
+def validate_garmin_workout(workout: dict) -> List[str]:
+    """
+    Checks the structure of a workout in Garmin's format that is uploaded as it is.
+
+    Returns:
+        The errors, empty if the workout can be uploaded
+    """
+    errors = []
+    if not workout.get("workoutName"):
+        errors.append("Missing workoutName")
+    if not isinstance(workout.get("sportType"), dict):
+        errors.append("Missing sportType")
+    segments = workout.get("workoutSegments")
+    if not isinstance(segments, list) or not segments:
+        errors.append("Missing workoutSegments")
+    elif not all(isinstance(segment, dict) and isinstance(segment.get("workoutSteps"), list)
+                 and all(isinstance(step, dict) for step in segment["workoutSteps"]) for segment in segments):
+        errors.append("Every workout segment must have a list of workoutSteps")
+    return errors
+
+
+def workout_fingerprint(payload: dict) -> str:
+    """
+    Returns a key identifying a workout by its name, sport and steps, ignoring IDs and metadata.
+
+    Args:
+        payload: The workout in Garmin's format, as compiled or returned by Garmin Connect
+    """
+    return dumps(make_workout_data(payload))
@@ -0,0 +1,443 @@
+import contextvars
+import hashlib
+import logging
+import os
+import secrets
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from typing import Any, Callable, Dict, List, Optional
+
+from .deadlines import DeadlineExceeded, tool_timeout, use_deadline
+from .resilience import CircuitOpenError, is_degraded
+from .serialization import dumps_bytes, loads
+from .sessions import use_athlete
+from .tracing import span
+
+
+logger = logging.getLogger(__name__)
+
+# Default number of queued operations sent to Garmin Connect concurrently by each process
+DEFAULT_WRITE_CONCURRENCY = 2
+
+# Default number of attempts before a queued operation fails
+DEFAULT_WRITE_ATTEMPTS = 8
+
+# Seconds before the first retry, doubled for every further attempt up to MAX_RETRY_DELAY
+RETRY_DELAY = 2.0
+MAX_RETRY_DELAY = 300.0
+
+# Seconds after which an operation claimed by a flusher that did not finish it, e.g. because its
+# process was killed, is claimed again
+LEASE_SECONDS = 600.0
+
+# Seconds an idle flusher waits before looking for operations enqueued by other processes
+POLL_INTERVAL = 5.0
+
+TICKET_PREFIX = "wq-"
+
+STATUSES = ("queued", "running", "done", "failed")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS operations (
+    ticket TEXT PRIMARY KEY,
+    idempotency_key TEXT NOT NULL UNIQUE,
+    athlete TEXT,
+    operation TEXT NOT NULL,
+    payload BLOB NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    result BLOB,
+    error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    -- When a queued operation is due, or when the lease of a running operation expires
+    next_attempt_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS operations_due ON operations (status, next_attempt_at);
+"""
+
+
+def write_queue_path() -> Optional[str]:
+    """
+    Returns the SQLite database of the write-ahead queue.
+
+    Returns:
+        The expanded value of GARMIN_WRITE_QUEUE, or None (queue disabled) if unset
+    """
+    path = os.environ.get("GARMIN_WRITE_QUEUE")
+    return os.path.expanduser(path) if path else None
+
+
+def create_write_queue() -> "WriteQueue":
+    """
+    Creates the write-ahead queue configured by the environment.
+
+    GARMIN_WRITE_CONCURRENCY sets the number of operations sent concurrently by each process,
+    GARMIN_WRITE_ATTEMPTS the number of attempts before an operation fails.
+    """
+    return WriteQueue(
+        write_queue_path(),
+        concurrency=max(1, int(os.environ.get("GARMIN_WRITE_CONCURRENCY", DEFAULT_WRITE_CONCURRENCY))),
+        max_attempts=max(1, int(os.environ.get("GARMIN_WRITE_ATTEMPTS", DEFAULT_WRITE_ATTEMPTS))),
+    )
+
+
+def is_retryable(error: Exception) -> bool:
+    """
+    Returns whether a failed operation is retried, i.e. Garmin Connect was unavailable rather than
+    rejecting the request.
+    """
+    return isinstance(error, (DeadlineExceeded, CircuitOpenError)) or is_degraded(error)
+
+
+class PendingDependency(Exception):
+    """Raised by a handler whose operation depends on a queued operation that has not completed."""
+
+
+class WriteQueue:
+    """
+    Persistent write-ahead queue of mutating Garmin Connect operations, flushed in the background.
+
+    Operations are stored in a SQLite database, which can be shared by several worker processes,
+    before the enqueuing call returns. Flusher threads claim due operations one at a time in a
+    transaction and apply them with their registered handler. Operations that fail because
+    Garmin Connect is unavailable are retried with exponential backoff.
+
+    Every operation has an idempotency key and is applied at most once per key. Before an
+    operation is retried, its reconcile function checks whether an earlier attempt took effect
+    after all, e.g. if the response was lost, so that it is not applied twice.
+
+    A queue without a path is disabled and cannot enqueue operations.
+    """
+
+    def __init__(self, path: Optional[str], concurrency: int = DEFAULT_WRITE_CONCURRENCY,
+                 max_attempts: int = DEFAULT_WRITE_ATTEMPTS):
+        self.path = path
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+        self._handlers: Dict[str, tuple] = {}
+        self._threads: List[threading.Thread] = []
+        self._initialized = False
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition()
+        # Incremented on every wakeup, so that flushers do not miss one while looking for operations
+        self._generation = 0
+        self._stopped = threading.Event()
+
+    @property
+    def enabled(self) -> bool:
+        return self.path is not None
+
+    def register(self, operation: str, apply: Callable[[dict], dict],
+                 reconcile: Optional[Callable[[dict, float], Optional[dict]]] = None) -> None:
+        """
+        Registers the handler of an operation.
+
+        Args:
+            operation: Name of the operation, e.g. "upload_workout"
+            apply: Sends the operation with its payload and returns the result
+            reconcile: Called with the payload and enqueue time before a retry. Returns the result
+                if an earlier attempt took effect, or None to apply the operation again.
+        """
+        self._handlers[operation] = (apply, reconcile)
+
+    def _connect(self) -> sqlite3.Connection:
+        if not self._initialized:
+            # SQLite creates the database file but not its directory
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        db.row_factory = sqlite3.Row
+        if not self._initialized:
+            with self._lock:
+                if not self._initialized:
+                    db.execute("PRAGMA journal_mode=WAL")
+                    db.executescript(_SCHEMA)
+                    self._initialized = True
+        return db
+
+    def enqueue(self, operation: str, payload: dict, athlete: Optional[str] = None,
+                idempotency_key: Optional[str] = None) -> dict:
+        """
+        Stores an operation and wakes up the flushers.
+
+        Without an idempotency key, a key is derived from the operation and payload, so that
+        repeating a call while the earlier one is pending returns the earlier ticket.
+
+        Args:
+            operation: Name of a registered operation
+            payload: The JSON payload passed to the handler
+            athlete: The athlete whose account is used, None for the default account
+            idempotency_key: Key identifying the operation across retries of the caller
+
+        Returns:
+            The ticket of the operation, see `get`
+
+        Raises:
+            ValueError: If the queue is disabled or the operation is unknown
+        """
+        if not self.enabled:
+            raise ValueError("The write queue requires GARMIN_WRITE_QUEUE to be set.")
+        if operation not in self._handlers:
+            raise ValueError(f"Unknown queued operation: {operation}")
+
+        data = dumps_bytes(payload)
+        explicit = idempotency_key is not None
+        if not explicit:
+            idempotency_key = f"{operation}:{hashlib.sha256(data).hexdigest()}"
+        key = f"{athlete or ''}:{idempotency_key}"
+        now = time.time()
+
+        with closing(self._connect()) as db:
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                row = db.execute("SELECT * FROM operations WHERE idempotency_key = ?", (key,)).fetchone()
+                if row is not None and row["status"] == "failed":
+                    # Failed operations are queued again with the new payload
+                    db.execute(
+                        "UPDATE operations SET payload = ?, status = 'queued', attempts = 0, error = NULL, "
+                        "updated_at = ?, next_attempt_at = ? WHERE ticket = ?",
+                        (data, now, now, row["ticket"]),
+                    )
+                    ticket = row["ticket"]
+                elif row is not None and (explicit or row["status"] != "done"):
+                    db.execute("COMMIT")
+                    return self._to_dict(row)
+                else:
+                    if row is not None:
+                        # A derived key only deduplicates pending operations, keep the completed one under another key
+                        db.execute("UPDATE operations SET idempotency_key = ? WHERE ticket = ?",
+                                   (f"{key}:{row['ticket']}", row["ticket"]))
+                    ticket = TICKET_PREFIX + secrets.token_hex(8)
+                    db.execute(
+                        "INSERT INTO operations (ticket, idempotency_key, athlete, operation, payload, status, "
+                        "created_at, updated_at, next_attempt_at) VALUES (?, ?, ?, ?, ?, 'queued', ?, ?, ?)",
+                        (ticket, key, athlete, operation, data, now, now, now),
+                    )
+                db.execute("COMMIT")
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+
+        logger.info("Queued %s as %s", operation, ticket)
+        self.start()
+        self._notify()
+        return self.get(ticket, athlete)
+
+    def get(self, ticket: str, athlete: Optional[str] = None) -> Optional[dict]:
+        """
+        Returns the status of an operation.
+
+        Args:
+            ticket: The ticket returned by `enqueue`
+            athlete: Only return operations of this athlete, None for the default account
+
+        Returns:
+            The ticket, operation, status ("queued", "running", "done" or "failed"), number of
+            attempts, result and last error, or None if the ticket is unknown
+        """
+        if not self.enabled:
+            return None
+        with closing(self._connect()) as db:
+            row = db.execute("SELECT * FROM operations WHERE ticket = ?", (ticket,)).fetchone()
+        if row is None or row["athlete"] != athlete:
+            return None
+        return self._to_dict(row)
+
+    def summary(self, athlete: Optional[str] = None, limit: int = 20) -> dict:
+        """
+        Returns the number of operations of an athlete per status and the most recent unfinished operations.
+        """
+        counts = {status: 0 for status in STATUSES}
+        if not self.enabled:
+            return {"counts": counts, "operations": []}
+        with closing(self._connect()) as db:
+            for row in db.execute("SELECT status, COUNT(*) AS count FROM operations WHERE athlete IS ? "
+                                  "GROUP BY status", (athlete,)):
+                counts[row["status"]] = row["count"]
+            rows = db.execute("SELECT * FROM operations WHERE athlete IS ? AND status != 'done' "
+                              "ORDER BY created_at DESC LIMIT ?", (athlete, limit)).fetchall()
+        return {"counts": counts, "operations": [self._to_dict(row) for row in rows]}
+
+    def resolve(self, value: str, field: str) -> str:
+        """
+        Resolves a ticket used in place of an ID to a field of the ticket's result.
+
+        Args:
+            value: An ID, or the ticket of a queued operation
+            field: The result field holding the ID, e.g. "workoutId"
+
+        Returns:
+            The ID
+
+        Raises:
+            PendingDependency: If the operation of the ticket has not completed
+            ValueError: If the ticket is unknown or its operation failed
+        """
+        if not str(value).startswith(TICKET_PREFIX):
+            return value
+        with closing(self._connect()) as db:
+            row = db.execute("SELECT * FROM operations WHERE ticket = ?", (value,)).fetchone()
+        if row is None:
+            raise ValueError(f"Unknown ticket: {value}")
+        if row["status"] == "failed":
+            raise ValueError(f"Operation {value} failed: {row['error']}")
+        if row["status"] != "done":
+            raise PendingDependency(f"Operation {value} has not completed")
+        return str(loads(row["result"])[field])
+
+    def completed_results(self, operation: str, athlete: Optional[str] = None) -> List[dict]:
+        """
+        Returns the results of the completed operations of an athlete, e.g. to tell which workouts
+        were created by other queued uploads.
+        """
+        if not self.enabled:
+            return []
+        with closing(self._connect()) as db:
+            rows = db.execute("SELECT result FROM operations WHERE operation = ? AND athlete IS ? "
+                              "AND status = 'done'", (operation, athlete)).fetchall()
+        return [loads(row["result"]) for row in rows if row["result"] is not None]
+
+    @staticmethod
+    def _to_dict(row: sqlite3.Row) -> dict:
+        return {
+            "ticket": row["ticket"],
+            "operation": row["operation"],
+            "status": row["status"],
+            "attempts": row["attempts"],
+            "result": loads(row["result"]) if row["result"] is not None else None,
+            "error": row["error"],
+            "createdAt": row["created_at"],
+            "updatedAt": row["updated_at"],
+        }
+
+    def start(self) -> None:
+        """
+        Starts the flusher threads of this process, if the queue is enabled and they are not running.
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            if self._threads:
+                return
+            self._stopped.clear()
+            for index in range(self.concurrency):
+                # Flushers start without the context of the enqueuing tool call, e.g. its deadline
+                thread = threading.Thread(target=contextvars.Context().run, args=(self._run,),
+                                          name=f"write-queue-{index}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """
+        Stops the flusher threads after their current operations.
+        """
+        self._stopped.set()
+        self._notify()
+        with self._lock:
+            threads, self._threads = self._threads, []
+        for thread in threads:
+            thread.join(timeout)
+
+    def _notify(self) -> None:
+        with self._wakeup:
+            self._generation += 1
+            self._wakeup.notify_all()
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            generation = self._generation
+            try:
+                operation = self._claim()
+            except sqlite3.Error as e:
+                logger.warning("Reading the write queue %s failed: %s", self.path, e)
+                operation = None
+            if operation is None:
+                with self._wakeup:
+                    if self._generation == generation:
+                        self._wakeup.wait(POLL_INTERVAL)
+                continue
+            self._process(operation)
+
+    def flush(self) -> int:
+        """
+        Applies all due operations in the calling thread.
+
+        Returns:
+            The number of processed operations
+        """
+        processed = 0
+        while self.enabled:
+            operation = self._claim()
+            if operation is None:
+                break
+            self._process(operation)
+            processed += 1
+        return processed
+
+    def _claim(self) -> Optional[sqlite3.Row]:
+        now = time.time()
+        with closing(self._connect()) as db:
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                row = db.execute(
+                    "SELECT * FROM operations WHERE status IN ('queued', 'running') AND next_attempt_at <= ? "
+                    "ORDER BY created_at LIMIT 1", (now,)
+                ).fetchone()
+                if row is not None:
+                    db.execute(
+                        "UPDATE operations SET status = 'running', attempts = attempts + 1, updated_at = ?, "
+                        "next_attempt_at = ? WHERE ticket = ?",
+                        (now, now + LEASE_SECONDS, row["ticket"]),
+                    )
+                    row = db.execute("SELECT * FROM operations WHERE ticket = ?", (row["ticket"],)).fetchone()
+                db.execute("COMMIT")
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+        return row
+
+    def _process(self, row: sqlite3.Row) -> None:
+        ticket, operation, attempts = row["ticket"], row["operation"], row["attempts"]
+        apply, reconcile = self._handlers.get(operation, (None, None))
+        payload = loads(row["payload"])
+
+        try:
+            if apply is None:
+                raise ValueError(f"Unknown queued operation: {operation}")
+            with use_athlete(row["athlete"]), use_deadline(tool_timeout(operation)), \
+                    span("write_queue.flush", operation=operation, ticket=ticket, attempt=attempts):
+                result = None
+                if attempts > 1 and reconcile is not None:
+                    # The previous attempt may have taken effect even though it failed or never finished
+                    result = reconcile(payload, row["created_at"])
+                    if result is not None:
+                        logger.info("Queued %s %s had already been applied", operation, ticket)
+                if result is None:
+                    result = apply(payload)
+        except PendingDependency as e:
+            self._update(ticket, attempts, "queued", attempts=attempts - 1, error=str(e),
+                         next_attempt_at=time.time() + RETRY_DELAY)
+        except Exception as e:
+            if is_retryable(e) and attempts < self.max_attempts:
+                delay = min(MAX_RETRY_DELAY, RETRY_DELAY * 2 ** (attempts - 1))
+                logger.info("Queued %s %s failed, retrying in %.0f seconds: %s", operation, ticket, delay, e)
+                self._update(ticket, attempts, "queued", error=str(e), next_attempt_at=time.time() + delay)
+            else:
+                logger.error("Queued %s %s failed: %s", operation, ticket, e)
+                self._update(ticket, attempts, "failed", error=str(e))
+        else:
+            logger.info("Queued %s %s completed: %s", operation, ticket, result)
+            self._update(ticket, attempts, "done", result=dumps_bytes(result), error=None)
+
+    def _update(self, ticket: str, claimed_attempts: int, status: str, **fields: Any) -> None:
+        fields = {"status": status, "updated_at": time.time(), **fields}
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        try:
+            with closing(self._connect()) as db:
+                # Only the flusher holding the claim updates the operation, not one whose lease expired
+                db.execute(f"UPDATE operations SET {assignments} WHERE ticket = ? AND status = 'running' "
+                           "AND attempts = ?", (*fields.values(), ticket, claimed_attempts))
+        except sqlite3.Error as e:
+            logger.warning("Updating %s in the write queue %s failed: %s", ticket, self.path, e)
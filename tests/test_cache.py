@@ -0,0 +1,77 @@
+import time
+
+from garmin_workouts_mcp.cache import DiskCache, ResponseCache, cache_ttl, create_cache
+
+
+def test_response_cache_disabled_by_default(monkeypatch):
+    monkeypatch.delenv("GARMIN_CACHE_TTL", raising=False)
+    cache = ResponseCache(cache_ttl())
+
+    cache.set("key", {"value": 1})
+
+    assert not cache.enabled
+    assert cache.get("key") is None
+
+def test_response_cache_expires_entries():
+    cache = ResponseCache(ttl=0.01)
+
+    cache.set("key", {"value": 1})
+    assert cache.get("key") == {"value": 1}
+
+    time.sleep(0.02)
+    assert cache.get("key", "missing") == "missing"
+    assert len(cache) == 0
+
+def test_response_cache_evicts_least_recently_used():
+    cache = ResponseCache(ttl=60, max_entries=2)
+
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+
+def test_response_cache_invalidate():
+    cache = ResponseCache(ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+
+    cache.invalidate("a")
+    assert cache.get("a") is None
+    assert cache.get("b") == 2
+
+    cache.invalidate()
+    assert len(cache) == 0
+
+def test_disk_cache_is_shared_between_instances(tmp_path):
+    writer = DiskCache(str(tmp_path), ttl=60)
+    reader = DiskCache(str(tmp_path), ttl=60)
+
+    writer.set("/workout-service/workout/1", {"workoutId": 1})
+
+    assert reader.get("/workout-service/workout/1") == {"workoutId": 1}
+    reader.invalidate("/workout-service/workout/1")
+    assert writer.get("/workout-service/workout/1") is None
+
+def test_disk_cache_expires_and_prunes_entries(tmp_path):
+    cache = DiskCache(str(tmp_path), ttl=0.01, max_entries=2)
+
+    for key in ("a", "b", "c"):
+        cache.set(key, key)
+    assert len(cache) == 2
+
+    time.sleep(0.02)
+    assert cache.get("c") is None
+
+def test_create_cache_uses_cache_dir(monkeypatch, tmp_path):
+    monkeypatch.setenv("GARMIN_CACHE_DIR", str(tmp_path))
+    monkeypatch.setenv("GARMIN_CACHE_TTL", "30")
+
+    cache = create_cache()
+
+    assert isinstance(cache, DiskCache)
+    assert cache.directory == str(tmp_path)
+    assert cache.ttl == 30
@@ -0,0 +1,90 @@
+import threading
+import time
+
+from garmin_workouts_mcp.concurrency import run_concurrently
+from garmin_workouts_mcp.deadlines import DeadlineExceeded, use_deadline
+from garmin_workouts_mcp.progress import Progress, use_progress
+
+
+def test_run_concurrently_preserves_order_and_errors():
+    def fn(item):
+        if item == 2:
+            raise ValueError("bad item")
+        return item * 10
+
+    results = run_concurrently(fn, [1, 2, 3])
+
+    assert results[0] == (10, None)
+    assert results[1][0] is None
+    assert str(results[1][1]) == "bad item"
+    assert results[2] == (30, None)
+
+def test_run_concurrently_bounds_workers():
+    active = []
+    peak = []
+    lock = threading.Lock()
+
+    def fn(item):
+        with lock:
+            active.append(item)
+            peak.append(len(active))
+        time.sleep(0.01)
+        with lock:
+            active.remove(item)
+
+    run_concurrently(fn, range(10), max_workers=3)
+
+    assert max(peak) <= 3
+
+def test_run_concurrently_empty():
+    assert run_concurrently(lambda item: item, []) == []
+
+def test_run_concurrently_gives_up_at_deadline():
+    release = threading.Event()
+
+    def fn(item):
+        if item == 1:
+            release.wait(5)
+        return item
+
+    with use_deadline(0.1):
+        start = time.monotonic()
+        results = run_concurrently(fn, [1, 2, 3], max_workers=1)
+        elapsed = time.monotonic() - start
+    release.set()
+
+    assert elapsed < 1
+    # The stalled call and the calls queued behind it are reported as exceeding the deadline
+    assert all(result is None and isinstance(error, DeadlineExceeded) for result, error in results)
+
+def test_run_concurrently_waits_for_sent_writes(monkeypatch):
+    from garmin_workouts_mcp.sessions import connectapi
+
+    def slow_connectapi(path, method="GET", **kwargs):
+        time.sleep(0.2)
+        return {"workoutId": path}
+    monkeypatch.setattr("garth.connectapi", slow_connectapi)
+
+    def fn(item):
+        if item == "write":
+            return connectapi("/workout-service/workout", method="POST")
+        return connectapi("/workout-service/workouts")
+
+    with use_deadline(0.05):
+        results = run_concurrently(fn, ["write", "read"])
+
+    # The write completed after the deadline and its outcome is reported, the read gave up
+    assert results[0] == ({"workoutId": "/workout-service/workout"}, None)
+    assert isinstance(results[1][1], DeadlineExceeded)
+
+def test_run_concurrently_reports_progress():
+    def fn(item):
+        if item == 2:
+            raise ValueError("Not found")
+        return item
+
+    with use_progress(Progress()) as progress:
+        run_concurrently(fn, [1, 2, 3])
+        run_concurrently(fn, [4])
+
+    assert progress.snapshot() == {"completed": 3, "failed": 1, "total": 4, "results": []}
@@ -0,0 +1,108 @@
+import threading
+import time
+
+import pytest
+
+from garmin_workouts_mcp.deadlines import (
+    DEFAULT_TOOL_TIMEOUT,
+    Cancelled,
+    DeadlineExceeded,
+    call_with_deadline,
+    check,
+    iter_until_deadline,
+    remaining,
+    tool_timeout,
+    use_cancellation,
+    use_deadline,
+    with_deadline,
+)
+from garmin_workouts_mcp.sessions import connectapi
+
+
+def test_tool_timeout(monkeypatch):
+    monkeypatch.delenv("GARMIN_TOOL_TIMEOUT", raising=False)
+    assert tool_timeout("get_activity") == DEFAULT_TOOL_TIMEOUT
+    assert tool_timeout("sync_plan") == 120
+
+    monkeypatch.setenv("GARMIN_TOOL_TIMEOUT", "10")
+    monkeypatch.setenv("GARMIN_TOOL_TIMEOUT_SYNC_PLAN", "300")
+    monkeypatch.setenv("GARMIN_TOOL_TIMEOUT_GET_CALENDAR", "0")
+    assert tool_timeout("get_activity") == 10
+    assert tool_timeout("sync_plan") == 300
+    assert tool_timeout("get_calendar") is None
+    assert tool_timeout("export_workouts") == 300
+
+    monkeypatch.setenv("GARMIN_TOOL_TIMEOUT", "0")
+    assert tool_timeout("get_activity") is None
+    assert tool_timeout("get_activity_track") is None
+    assert tool_timeout("sync_plan") == 300
+
+def test_use_deadline_keeps_earlier_deadline():
+    assert remaining() is None
+    with use_deadline(1):
+        with use_deadline(60):
+            assert remaining() <= 1
+        with use_deadline(None):
+            assert remaining() <= 1
+    assert remaining() is None
+
+def test_with_deadline_uses_tool_budget(monkeypatch):
+    monkeypatch.setenv("GARMIN_TOOL_TIMEOUT_GET_ACTIVITY", "5")
+
+    @with_deadline
+    def get_activity():
+        return remaining()
+
+    assert 4 < get_activity() <= 5
+
+def test_call_with_deadline_gives_up_waiting():
+    release = threading.Event()
+
+    with use_deadline(0.05):
+        with pytest.raises(DeadlineExceeded):
+            call_with_deadline(lambda: release.wait(5))
+    release.set()
+
+    with use_deadline(5):
+        assert call_with_deadline(lambda: remaining() is not None)
+    assert call_with_deadline(lambda: 1) == 1
+
+def test_iter_until_deadline():
+    with use_deadline(0.05):
+        chunks = iter_until_deadline(iter([b"a", b"b"]))
+        assert next(chunks) == b"a"
+        time.sleep(0.06)
+        with pytest.raises(DeadlineExceeded):
+            next(chunks)
+
+def test_connectapi_is_not_sent_after_deadline(monkeypatch):
+    calls = []
+    monkeypatch.setattr("garth.connectapi", lambda *args, **kwargs: calls.append(args))
+
+    with use_deadline(-1):
+        with pytest.raises(DeadlineExceeded):
+            connectapi("/workout-service/workouts")
+    assert calls == []
+
+def test_connectapi_completes_sent_writes_after_deadline(monkeypatch):
+    def slow_connectapi(path, method="GET", **kwargs):
+        time.sleep(0.1)
+        return {"method": method}
+    monkeypatch.setattr("garth.connectapi", slow_connectapi)
+
+    with use_deadline(0.02):
+        # A created workout is returned instead of being reported as failed and created again
+        assert connectapi("/workout-service/workout", method="POST") == {"method": "POST"}
+    with use_deadline(0.02):
+        with pytest.raises(DeadlineExceeded):
+            connectapi("/workout-service/workouts")
+
+def test_check_raises_after_cancellation():
+    event = threading.Event()
+
+    with use_cancellation(event):
+        check()
+        event.set()
+        with pytest.raises(Cancelled):
+            check()
+    check()
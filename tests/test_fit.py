@@ -0,0 +1,101 @@
+import io
+import math
+import struct
+import zipfile
+
+import pytest
+from garmin_workouts_mcp.fit import (
+    FIT_EPOCH_OFFSET,
+    parse_fit,
+    parse_fit_file,
+    save_fit_stream,
+)
+
+
+def build_fit(records, laps=()):
+    """Builds a minimal FIT file with record (timestamp, heart_rate, speed) and lap messages."""
+    data = bytearray()
+
+    # Definition for local type 0: record with timestamp (uint32), heart_rate (uint8), speed (uint16)
+    data += struct.pack("<BBBHB", 0x40, 0, 0, 20, 3)
+    data += bytes([253, 4, 0x86, 3, 1, 0x02, 6, 2, 0x84])
+
+    # Definition for local type 1: lap with total_elapsed_time (uint32) and an unknown field
+    data += struct.pack("<BBBHB", 0x41, 0, 0, 19, 2)
+    data += bytes([7, 4, 0x86, 200, 2, 0x84])
+
+    for index, (timestamp, heart_rate, speed) in enumerate(records):
+        if timestamp is None and index:
+            # Compressed timestamp header for local type 0, one second after the previous record
+            previous = records[index - 1][0] or 0
+            data += bytes([0x80 | ((previous + 1) & 0x1F)])
+            data += struct.pack("<IBH", 0xFFFFFFFF, heart_rate, speed)
+        else:
+            data += bytes([0x00])
+            data += struct.pack("<IBH", timestamp, heart_rate, speed)
+
+    for elapsed in laps:
+        data += bytes([0x01])
+        data += struct.pack("<IH", elapsed, 0)
+
+    header = struct.pack("<BBHI4s", 12, 0x10, 2100, len(data), b".FIT")
+    return header + bytes(data) + b"\x00\x00"
+
+
+def test_parse_fit_records_and_laps():
+    fit = build_fit([(1000, 140, 3000), (1001, 150, 3500), (1002, 0xFF, 4000)], laps=[600000])
+    messages = parse_fit(memoryview(fit))
+
+    records = messages["record"]
+    assert len(records) == 3
+    assert list(records.columns["timestamp"]) == [1000 + FIT_EPOCH_OFFSET, 1001 + FIT_EPOCH_OFFSET, 1002 + FIT_EPOCH_OFFSET]
+    assert list(records.columns["speed"]) == [3.0, 3.5, 4.0]
+    assert math.isnan(records.columns["heart_rate"][2])
+    assert math.isnan(records.columns["power"][0])
+
+    laps = messages["lap"]
+    assert len(laps) == 1
+    assert laps.columns["total_elapsed_time"][0] == 600
+
+def test_parse_fit_compressed_timestamp():
+    fit = build_fit([(1000, 140, 3000), (None, 141, 3000)])
+    records = parse_fit(fit)["record"]
+    assert list(records.columns["timestamp"]) == [1000 + FIT_EPOCH_OFFSET, 1001 + FIT_EPOCH_OFFSET]
+
+def test_parse_fit_invalid_signature():
+    with pytest.raises(ValueError, match="missing .FIT signature"):
+        parse_fit(b"\x0c" + b"\x00" * 11)
+
+def test_summary_and_slice():
+    fit = build_fit([(1000, 140, 3000), (1001, 150, 3500), (1002, 0xFF, 4000)])
+    records = parse_fit(fit)["record"]
+
+    summary = records.summary(["heart_rate", "speed"])
+    assert summary["heart_rate"] == {"count": 2, "min": 140, "max": 150, "mean": 145}
+    assert summary["speed"]["mean"] == pytest.approx(3.5)
+
+    assert records.slice(1, 3, fields=["heart_rate"]) == {"heart_rate": [150, None]}
+    assert records.slice(step=2, fields=["speed"]) == {"speed": [3.0, 4.0]}
+
+def test_summary_unknown_field():
+    records = parse_fit(build_fit([(1000, 140, 3000)]))["record"]
+    with pytest.raises(ValueError, match="Unknown record fields: foo"):
+        records.summary(["foo"])
+
+def test_save_fit_stream_extracts_zip(tmp_path):
+    fit = build_fit([(1000, 140, 3000)])
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w") as zf:
+        zf.writestr("123_ACTIVITY.fit", fit)
+    content = archive.getvalue()
+    chunks = [content[i:i + 16] for i in range(0, len(content), 16)]
+
+    path = save_fit_stream(chunks, str(tmp_path / "123.fit"))
+
+    assert len(parse_fit_file(path)["record"]) == 1
+    assert not (tmp_path / "123.fit.part").exists()
+
+def test_save_fit_stream_plain_fit(tmp_path):
+    fit = build_fit([(1000, 140, 3000), (1001, 141, 3000)])
+    path = save_fit_stream([fit], str(tmp_path / "456.fit"))
+    assert len(parse_fit_file(path)["record"]) == 2
@@ -13,6 +13,9 @@ from garmin_workouts_mcp.garmin_workout import (
     convert_value_to_unit,
     estimate_step_duration,
     calculate_steps_duration,
+    validate_workout_data,
+    make_workout_data,
+    infer_distance_unit,
     DEFAULT_PACE
 )
 
@@ -349,4 +352,190 @@ def test_make_payload_structured_easy_run():
     assert cooldown_step["targetType"]["workoutTargetTypeKey"] == "pace.zone"
     # targetValueOne should be the faster pace (6.37 min/km), targetValueTwo the slower (6.83 min/km)
     assert cooldown_step["targetValueOne"] == pytest.approx(1000 / (6.37 * 60))
-    assert cooldown_step["targetValueTwo"] == pytest.approx(1000 / (6.83 * 60))
\ No newline at end of file
+    assert cooldown_step["targetValueTwo"] == pytest.approx(1000 / (6.83 * 60))
+
+def test_validate_workout_data_valid():
+    workout_data = {
+        "name": "Intervals",
+        "type": "running",
+        "steps": [
+            {"stepType": "warmup", "stepDuration": 600},
+            {
+                "stepType": "repeat",
+                "numberOfIterations": 5,
+                "steps": [
+                    {"stepType": "interval", "endConditionType": "distance", "stepDistance": 1, "distanceUnit": "km",
+                     "target": {"type": "pace", "value": [4.4, 4.6], "unit": "min_per_km"}},
+                    {"stepType": "recovery", "stepDuration": 120},
+                ],
+            },
+        ],
+    }
+    assert validate_workout_data(workout_data) == {"valid": True, "errors": [], "warnings": []}
+    make_payload(workout_data)
+
+def test_validate_workout_data_reports_all_errors():
+    workout_data = {
+        "name": "Broken",
+        "type": "rowing",
+        "steps": [
+            {"stepName": "Warmup"},
+            {"stepType": "interval", "stepDuration": 0},
+            {
+                "stepType": "repeat",
+                "numberOfIterations": 2,
+                "steps": [
+                    {"stepType": "interval", "endConditionType": "distance", "stepDistance": 400, "distanceUnit": "yd"},
+                    {"stepType": "recovery", "stepDuration": 60, "target": {"type": "heart_rate_zone"}},
+                ],
+            },
+        ],
+    }
+
+    result = validate_workout_data(workout_data)
+
+    assert result["valid"] is False
+    assert result["errors"] == [
+        "Unsupported sport type: rowing",
+        "steps[0]: Missing stepType for step: Warmup",
+        "steps[1]: Invalid or missing stepDuration for step: Unnamed Step",
+        "steps[2].steps[0]: Unsupported distance unit: yd",
+        "steps[2].steps[1]: Unsupported target type: heart_rate_zone",
+    ]
+
+def test_validate_workout_data_warnings():
+    workout_data = {
+        "name": "Warnings",
+        "type": "running",
+        "steps": [
+            {"stepType": "run", "stepDuration": 600, "target": {"type": "pace", "value": 3.2}},
+            {"stepType": "interval", "endConditionType": "distance", "stepDuration": 300},
+        ],
+    }
+
+    result = validate_workout_data(workout_data)
+
+    assert result["valid"] is True
+    assert result["warnings"] == [
+        "steps[0]: Unknown stepType 'run' for step: Unnamed Step, using interval",
+        "steps[0]: Pace target without unit min_per_km is interpreted as m/s",
+        "steps[1]: Missing stepDistance or distanceUnit for step: Unnamed Step, using stepDuration",
+    ]
+
+def test_validate_workout_data_invalid_targets_and_repeats():
+    workout_data = {
+        "name": "Invalid",
+        "type": "cycling",
+        "steps": [
+            {"stepType": "interval", "stepDuration": 60, "target": {"type": "power", "value": [150]}},
+            {"stepType": "interval", "stepDuration": 60, "target": {"type": "pace", "value": 0.5, "unit": "min_per_km"}},
+            {"stepType": "interval", "stepDuration": 60, "target": {"type": "pace", "value": [-1, 5], "unit": "min_per_km"}},
+            {"stepType": "repeat", "numberOfIterations": 3},
+            {"stepType": "repeat", "numberOfIterations": 1.5, "steps": [{"stepType": "interval", "stepDuration": 60}]},
+        ],
+    }
+
+    result = validate_workout_data(workout_data)
+
+    assert result["errors"] == [
+        "steps[0]: Target value must be a number or a list of two numbers",
+        "steps[2]: Pace values must be positive",
+        "steps[3]: Repeat step requires numberOfIterations and steps: Unnamed Step",
+        "steps[4]: Invalid or missing numberOfIterations for repeat step.",
+    ]
+
+def test_validate_workout_data_not_an_object():
+    assert validate_workout_data([])["errors"] == ["Workout must be an object"]
+    assert validate_workout_data({"name": "x", "type": "running"})["errors"] == ["Missing steps for workout"]
+
+def test_make_workout_data_round_trip():
+    workout_data = {
+        "name": "Intervals",
+        "type": "running",
+        "steps": [
+            {"stepType": "warmup", "endConditionType": "time", "stepDuration": 600,
+             "target": {"type": "heart rate", "value": [120, 140], "unit": "bpm"}},
+            {"stepType": "repeat", "numberOfIterations": 4, "steps": [
+                {"stepType": "interval", "endConditionType": "distance", "stepDistance": 1, "distanceUnit": "km",
+                 "target": {"type": "pace", "value": [4.5, 4.75], "unit": "min_per_km"}},
+                {"stepType": "recovery", "endConditionType": "distance", "stepDistance": 400, "distanceUnit": "m"},
+            ]},
+            {"stepType": "cooldown", "stepDescription": "Easy", "endConditionType": "distance",
+             "stepDistance": 1.5, "distanceUnit": "mile"},
+        ],
+    }
+
+    result = make_workout_data(make_payload(workout_data))
+
+    assert result == workout_data
+    assert make_payload(result) == make_payload(workout_data)
+
+def test_make_workout_data_garmin_response():
+    payload = {
+        "workoutId": 1,
+        "workoutName": "Strength",
+        "sportType": {"sportTypeId": 5, "sportTypeKey": "strength_training"},
+        "workoutSegments": [{"workoutSteps": [
+            {"type": "ExecutableStepDTO", "stepOrder": 2, "stepType": {"stepTypeKey": "other"},
+             "endCondition": {"conditionTypeKey": "lap.button"}, "endConditionValue": None,
+             "targetType": {"workoutTargetTypeKey": "no.target"}},
+            {"type": "ExecutableStepDTO", "stepOrder": 1, "stepType": {"stepTypeKey": "warmup"},
+             "endCondition": {"conditionTypeKey": "distance"}, "endConditionValue": 1500.0,
+             "preferredEndConditionUnit": {"unitKey": "kilometer"},
+             "targetType": {"workoutTargetTypeKey": "heart.rate.zone"}, "zoneNumber": 2},
+        ]}],
+    }
+
+    assert make_workout_data(payload) == {
+        "name": "Strength",
+        "type": "strength",
+        "steps": [
+            {"stepType": "warmup", "endConditionType": "distance", "stepDistance": 1.5, "distanceUnit": "km",
+             "target": {"type": "heart rate", "zone": 2}},
+            {"stepType": "other", "endConditionType": "lap.button"},
+        ],
+    }
+
+def test_lap_button_and_zone_targets_round_trip():
+    workout_data = {
+        "name": "Easy Run",
+        "type": "running",
+        "steps": [
+            {"stepType": "warmup", "endConditionType": "lap.button",
+             "target": {"type": "heart rate", "zone": 1}},
+            {"stepType": "interval", "endConditionType": "time", "stepDuration": 1800,
+             "target": {"type": "heart rate", "zone": 2}},
+        ],
+    }
+
+    assert validate_workout_data(workout_data)["valid"]
+    payload = make_payload(workout_data)
+    warmup = payload["workoutSegments"][0]["workoutSteps"][0]
+
+    assert warmup["endCondition"]["conditionTypeKey"] == "lap.button"
+    assert warmup["endConditionValue"] is None
+    assert warmup["zoneNumber"] == 1
+    assert payload["estimatedDurationInSecs"] == 1800
+    assert make_workout_data(payload) == workout_data
+
+def test_validate_workout_data_invalid_zone_and_end_condition():
+    result = validate_workout_data({
+        "name": "Run",
+        "type": "running",
+        "steps": [
+            {"stepType": "interval", "endConditionType": "lap.button", "target": {"type": "power", "zone": 0}},
+            {"stepType": "interval", "endConditionType": "calories"},
+        ],
+    })
+
+    assert result["errors"] == [
+        "steps[0]: Target zone must be a positive integer",
+        "steps[1]: Invalid or missing stepDuration for step: Unnamed Step",
+    ]
+
+def test_infer_distance_unit():
+    assert infer_distance_unit(5000) == "km"
+    assert infer_distance_unit(1500) == "m"
+    assert infer_distance_unit(400) == "m"
+    assert infer_distance_unit(1609.344) == "mile"
+    assert infer_distance_unit(3.1 * 1609.344) == "mile"
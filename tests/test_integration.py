@@ -1,6 +1,6 @@
 import pytest
 from unittest.mock import patch
-from garmin_workouts_mcp.main import mcp, login
+from garmin_workouts_mcp.main import mcp, login, main
 
 
 class TestMCPIntegration:
@@ -19,10 +19,25 @@ class TestMCPIntegration:
             "get_activity",
             "list_activities",
             "get_activity_weather",
+            "get_activity_fit",
+            "get_activity_track",
+            "get_activities",
+            "get_training_summary",
             "get_calendar",
             "schedule_workout",
             "delete_workout",
             "upload_workout",
+            "update_workout",
+            "create_training_plan",
+            "sync_plan",
+            "export_workouts",
+            "import_workouts",
+            "search",
+            "get_write_status",
+            "start_job",
+            "job_status",
+            "cancel_job",
+            "validate_workout",
             "generate_workout_data_prompt"
         }
 
@@ -42,29 +57,33 @@ class TestMCPIntegration:
         """Test that the MCP server has the correct name."""
         assert mcp.name == "GarminConnectWorkoutsServer"
 
+    @pytest.fixture
+    def garth_home(self, tmp_path):
+        return str(tmp_path / "garth")
+
     @patch('garmin_workouts_mcp.main.garth.resume')
-    @patch('garmin_workouts_mcp.main.garth.save')
     @patch('garmin_workouts_mcp.main.garth.login')
-    def test_login_integration_success(self, mock_garth_login, mock_save, mock_resume):
+    def test_login_integration_success(self, mock_garth_login, mock_resume, garth_home, monkeypatch):
         """Test successful login flow when resume works."""
         # Arrange
+        monkeypatch.setenv("GARTH_HOME", garth_home)
         mock_resume.return_value = None
 
         # Act
         login()
 
         # Assert
-        mock_resume.assert_called_once_with("~/.garth")
+        mock_resume.assert_called_once_with(garth_home)
         mock_garth_login.assert_not_called()
-        mock_save.assert_not_called()
 
     @patch('garmin_workouts_mcp.main.garth.resume')
-    @patch('garmin_workouts_mcp.main.garth.save')
     @patch('garmin_workouts_mcp.main.garth.login')
+    @patch('garmin_workouts_mcp.main.TokenStore.save')
     @patch.dict('os.environ', {"GARMIN_EMAIL": "test@example.com", "GARMIN_PASSWORD": "password123"})
-    def test_login_integration_new_login(self, mock_garth_login, mock_save, mock_resume):
+    def test_login_integration_new_login(self, mock_save, mock_garth_login, mock_resume, garth_home, monkeypatch):
         """Test login flow when resume fails and new login is required via environment variables."""
         # Arrange
+        monkeypatch.setenv("GARTH_HOME", garth_home)
         mock_resume.side_effect = Exception("No saved credentials")
         mock_garth_login.return_value = None
 
@@ -72,18 +91,39 @@ class TestMCPIntegration:
         login()
 
         # Assert
-        mock_resume.assert_called_once_with("~/.garth")
+        # Resumed again holding the token lock, in case another process logged in meanwhile
+        assert mock_resume.call_count == 2
+        mock_resume.assert_called_with(garth_home)
         mock_garth_login.assert_called_once_with("test@example.com", "password123")
-        mock_save.assert_called_once_with("~/.garth")
+        mock_save.assert_called_once()
+
+    @patch('garmin_workouts_mcp.main.garth.resume')
+    @patch('garmin_workouts_mcp.main.garth.login')
+    @patch.dict('os.environ', {"GARMIN_EMAIL": "test@example.com", "GARMIN_PASSWORD": "password123"})
+    def test_login_integration_resumes_login_of_other_process(self, mock_garth_login, mock_resume, garth_home,
+                                                               monkeypatch):
+        """Test that no login is sent if another process logged in while waiting for the token lock."""
+        # Arrange
+        monkeypatch.setenv("GARTH_HOME", garth_home)
+        mock_resume.side_effect = [Exception("No saved credentials"), None]
+
+        # Act
+        login()
+
+        # Assert
+        assert mock_resume.call_count == 2
+        mock_garth_login.assert_not_called()
 
     @patch('garmin_workouts_mcp.main.garth.resume')
     @patch('garmin_workouts_mcp.main.garth.login')
     @patch.dict('os.environ', {"GARMIN_EMAIL": "test@example.com", "GARMIN_PASSWORD": "password123"})
     @patch('garmin_workouts_mcp.main.sys.exit')
     @patch('garmin_workouts_mcp.main.logger')
-    def test_login_integration_login_failure(self, mock_logger, mock_exit, mock_garth_login, mock_resume):
+    def test_login_integration_login_failure(self, mock_logger, mock_exit, mock_garth_login, mock_resume,
+                                             garth_home, monkeypatch):
         """Test login flow when garth.login fails."""
         # Arrange
+        monkeypatch.setenv("GARTH_HOME", garth_home)
         mock_resume.side_effect = Exception("No saved credentials")
         mock_garth_login.side_effect = Exception("Invalid credentials")
 
@@ -91,20 +131,74 @@ class TestMCPIntegration:
         login()
 
         # Assert
-        mock_resume.assert_called_once_with("~/.garth")
+        mock_resume.assert_called_with(garth_home)
         mock_garth_login.assert_called_once_with("test@example.com", "password123")
         mock_logger.error.assert_called_once()
         mock_exit.assert_called_once_with(1)
 
+    @patch('garmin_workouts_mcp.main.garth.resume')
+    @patch('garmin_workouts_mcp.main.garth.login')
+    @patch.dict('os.environ', {"GARMIN_ATHLETES_DIR": "~/.garmin-athletes"}, clear=True)
+    def test_login_integration_athletes_without_default_account(self, mock_garth_login, mock_resume, garth_home,
+                                                                monkeypatch):
+        """Test login flow without a default account when athletes are configured."""
+        # Arrange
+        monkeypatch.setenv("GARTH_HOME", garth_home)
+        mock_resume.side_effect = Exception("No saved credentials")
+
+        # Act
+        login()
+
+        # Assert
+        mock_resume.assert_called_with(garth_home)
+        mock_garth_login.assert_not_called()
+
     @patch('garmin_workouts_mcp.main.garth.resume')
     @patch.dict('os.environ', {}, clear=True)
-    def test_login_integration_no_credentials_raises_error(self, mock_resume):
+    def test_login_integration_no_credentials_raises_error(self, mock_resume, garth_home, monkeypatch):
         """Test login flow when no credentials are provided via env vars."""
         # Arrange
+        monkeypatch.setenv("GARTH_HOME", garth_home)
         mock_resume.side_effect = Exception("No saved credentials")
 
         # Act & Assert
         with pytest.raises(ValueError, match=r"Garmin email and password must be provided via environment variables \(GARMIN_EMAIL, GARMIN_PASSWORD\)."):
             login()
 
-        mock_resume.assert_called_once_with("~/.garth")
+        mock_resume.assert_called_with(garth_home)
+
+    @patch('garmin_workouts_mcp.main.mcp.run')
+    @patch('garmin_workouts_mcp.main.uvicorn.run')
+    @patch('garmin_workouts_mcp.main.login')
+    @patch.dict('os.environ', {"GARMIN_MCP_TRANSPORT": "http", "GARMIN_MCP_PORT": "9000",
+                               "GARMIN_MCP_WORKERS": "4"}, clear=True)
+    def test_main_http_transport_with_workers(self, mock_login, mock_uvicorn_run, mock_mcp_run):
+        """Test that multiple workers are started with the app factory."""
+        # Act
+        main()
+
+        # Assert
+        mock_login.assert_called_once()
+        mock_mcp_run.assert_not_called()
+        mock_uvicorn_run.assert_called_once_with("garmin_workouts_mcp.main:create_app", factory=True,
+                                                 host="127.0.0.1", port=9000, workers=4)
+
+    @patch('garmin_workouts_mcp.main.login')
+    @patch.dict('os.environ', {"GARMIN_MCP_TRANSPORT": "sse", "GARMIN_MCP_WORKERS": "2"}, clear=True)
+    def test_main_sse_transport_rejects_workers(self, mock_login):
+        """Test that the SSE transport cannot be used with multiple workers."""
+        with pytest.raises(ValueError, match="SSE transport does not support multiple workers"):
+            main()
+        mock_login.assert_not_called()
+
+    @patch('garmin_workouts_mcp.main.mcp.run')
+    @patch('garmin_workouts_mcp.main.login')
+    @patch.dict('os.environ', {}, clear=True)
+    def test_main_stdio_transport(self, mock_login, mock_mcp_run):
+        """Test that the stdio transport is used by default."""
+        # Act
+        main()
+
+        # Assert
+        mock_login.assert_called_once()
+        mock_mcp_run.assert_called_once_with()
@@ -0,0 +1,135 @@
+import threading
+import time
+
+from garmin_workouts_mcp.concurrency import run_concurrently
+from garmin_workouts_mcp.deadlines import check, remaining
+from garmin_workouts_mcp.jobs import JobManager, create_job_manager
+from garmin_workouts_mcp.progress import report_result
+from garmin_workouts_mcp.sessions import current_athlete
+
+
+def wait_for(job, status, timeout=5):
+    deadline = time.monotonic() + timeout
+    while job.status != status and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert job.status == status
+
+def test_job_runs_in_background():
+    manager = JobManager()
+    release = threading.Event()
+
+    def fn(count):
+        release.wait(5)
+        return {"count": count, "athlete": current_athlete()}
+
+    job = manager.start("tool", fn, {"count": 3}, "alice")
+    assert job.to_dict()["status"] in ("pending", "running")
+    assert "result" not in job.to_dict()
+    release.set()
+    manager.join(5)
+
+    status = job.to_dict()
+    assert status["status"] == "done"
+    assert status["result"] == {"count": 3, "athlete": "alice"}
+    assert status["error"] is None
+
+def test_job_progress_and_partial_results():
+    manager = JobManager()
+
+    def fn():
+        def upload(item):
+            report_result({"item": item})
+            return item
+        return run_concurrently(upload, [1, 2, 3])
+
+    job = manager.start("tool", fn, {})
+    manager.join(5)
+
+    status = job.to_dict()
+    assert status["progress"] == {"completed": 3, "failed": 0, "total": 3}
+    assert sorted(result["item"] for result in status["partialResults"]) == [1, 2, 3]
+    assert len(job.to_dict(offset=2)["partialResults"]) == 1
+
+def test_job_failure():
+    manager = JobManager()
+
+    def fn():
+        raise ValueError("Invalid plan")
+
+    job = manager.start("tool", fn, {})
+    manager.join(5)
+
+    assert job.status == "failed"
+    assert job.error == "Invalid plan"
+
+def test_job_has_its_own_deadline():
+    manager = JobManager(timeout=600)
+    job = manager.start("tool", remaining, {})
+    manager.join(5)
+    assert 590 < job.result <= 600
+
+    manager = JobManager(timeout=None)
+    job = manager.start("tool", remaining, {})
+    manager.join(5)
+    assert job.result is None
+
+def test_cancel_running_job_stops_before_next_request():
+    manager = JobManager()
+    started = threading.Event()
+    release = threading.Event()
+
+    def fn():
+        started.set()
+        release.wait(5)
+        check()
+        return "sent"
+
+    job = manager.start("tool", fn, {})
+    started.wait(5)
+    manager.cancel(job.id)
+    release.set()
+    wait_for(job, "cancelled")
+
+    assert job.result is None
+    assert job.error == "The job was cancelled"
+
+def test_cancel_pending_job():
+    manager = JobManager(max_workers=1)
+    release = threading.Event()
+    first = manager.start("tool", lambda: release.wait(5), {})
+    second = manager.start("tool", lambda: "ran", {})
+
+    manager.cancel(second.id)
+    release.set()
+    manager.join(5)
+
+    assert first.status == "done"
+    assert second.status == "cancelled"
+    assert second.result is None
+    assert second.started is None
+
+def test_jobs_are_scoped_to_athlete():
+    manager = JobManager()
+    job = manager.start("tool", lambda: None, {}, "alice")
+    manager.join(5)
+
+    assert manager.get(job.id) is None
+    assert manager.get(job.id, "alice") is job
+    assert manager.cancel(job.id, "bob") is None
+    assert manager.list("alice") == [job]
+    assert manager.list() == []
+
+def test_finished_jobs_are_evicted(monkeypatch):
+    monkeypatch.setattr("garmin_workouts_mcp.jobs.MAX_FINISHED_JOBS", 2)
+    manager = JobManager(max_workers=1)
+    jobs = [manager.start("tool", lambda: None, {}) for _ in range(4)]
+    manager.join(5)
+
+    assert manager.list() == jobs[2:]
+
+def test_create_job_manager(monkeypatch):
+    monkeypatch.setenv("GARMIN_MAX_JOBS", "3")
+    monkeypatch.setenv("GARMIN_JOB_TIMEOUT", "0")
+    manager = create_job_manager()
+    assert manager.max_workers == 3
+    assert manager.timeout is None
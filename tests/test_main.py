@@ -1,5 +1,6 @@
 import pytest
 from unittest.mock import patch
+from garmin_workouts_mcp.serialization import dumps, dumps_bytes, loads
 
 
 class TestListWorkouts:
@@ -151,6 +152,53 @@ class TestGetWorkout:
         with pytest.raises(Exception, match="API Error"):
             get_workout_func(workout_id)
 
+    @patch('garmin_workouts_mcp.main.garth.connectapi')
+    def test_get_workout_for_athlete(self, mock_connectapi, tmp_path):
+        """Test get_workout with the account of a selected athlete."""
+        from unittest.mock import MagicMock
+        import garmin_workouts_mcp.main as main_module
+        from garmin_workouts_mcp.sessions import SessionPool
+        get_workout_func = main_module.get_workout.fn
+
+        # Arrange
+        (tmp_path / "alice").mkdir()
+        pool = SessionPool(str(tmp_path), client_factory=MagicMock)
+        pool.get("alice").client.connectapi.return_value = {"workoutId": 1}
+
+        # Act
+        with patch('garmin_workouts_mcp.sessions.session_pool', pool):
+            result = get_workout_func("1", athlete="alice")
+
+        # Assert
+        assert result == {"workout": {"workoutId": 1}}
+        pool.get("alice").client.connectapi.assert_called_once_with("/workout-service/workout/1")
+        mock_connectapi.assert_not_called()
+
+    @patch('garmin_workouts_mcp.main.garth.connectapi')
+    def test_get_workout_compact(self, mock_connectapi):
+        """Test get_workout returning the compact workout data format."""
+        import garmin_workouts_mcp.main as main_module
+        from garmin_workouts_mcp.garmin_workout import make_payload
+        get_workout_func = main_module.get_workout.fn
+
+        # Arrange
+        workout_data = {
+            "name": "Tempo",
+            "type": "running",
+            "steps": [
+                {"stepType": "interval", "endConditionType": "distance", "stepDistance": 5, "distanceUnit": "km",
+                 "target": {"type": "pace", "value": [4.5, 4.75], "unit": "min_per_km"}},
+            ],
+        }
+        mock_connectapi.return_value = {"workoutId": 12345, **make_payload(workout_data)}
+
+        # Act
+        result = get_workout_func("12345", compact=True)
+
+        # Assert
+        mock_connectapi.assert_called_once_with("/workout-service/workout/12345")
+        assert result == {"workout": workout_data}
+
 
 class TestScheduleWorkout:
     """Test cases for the schedule_workout tool."""
@@ -175,7 +223,8 @@ class TestScheduleWorkout:
         mock_connectapi.assert_called_once_with(
             f"/workout-service/schedule/{workout_id}",
             method="POST",
-            json={"date": date}
+            data=dumps_bytes({"date": date}),
+            headers={"Content-Type": "application/json"}
         )
         assert result == {"workoutScheduleId": "schedule_456"}
 
@@ -318,6 +367,31 @@ class TestGetActivity:
 
         mock_connectapi.assert_called_once_with(f"/activity-service/activity/{activity_id}")
 
+    @patch('garmin_workouts_mcp.main.garth.connectapi')
+    def test_get_activity_serves_stale_response_while_degraded(self, mock_connectapi):
+        """Test that the last good response is served while the circuit breaker is open."""
+        import requests
+        import garmin_workouts_mcp.main as main_module
+        from garmin_workouts_mcp.resilience import ResilientGetter
+        get_activity_func = main_module.get_activity.fn
+
+        # Arrange
+        response = requests.Response()
+        response.status_code = 503
+        expected_activity = {"activityId": "1", "activityName": "Morning Run"}
+        mock_connectapi.side_effect = [expected_activity, requests.HTTPError(response=response)]
+
+        with patch.object(main_module, "getter", ResilientGetter(breaker=True, failure_threshold=1)):
+            # Act
+            first = get_activity_func("1")
+            second = get_activity_func("1")
+            third = get_activity_func("1")
+
+        # Assert
+        assert first == second == third == expected_activity
+        # The circuit opened after the failure, so the third call sent no request
+        assert mock_connectapi.call_count == 2
+
 
 class TestListActivities:
     """Test cases for the list_activities tool."""
@@ -506,6 +580,131 @@ class TestListActivities:
             params={"limit": 20, "start": 0}
         )
 
+    @patch('garmin_workouts_mcp.main.garth.client')
+    def test_list_activities_streams_large_lists(self, mock_client):
+        """Test that large lists are parsed from the response stream with projection and filters."""
+        import json
+        import garmin_workouts_mcp.main as main_module
+        list_activities_func = main_module.list_activities.fn
+
+        # Arrange
+        activities = [
+            {"activityId": i, "activityName": f"Run {i}", "distance": 1000.0 * i, "duration": 300.0 * i}
+            for i in range(1, 11)
+        ]
+        document = json.dumps(activities).encode()
+        response = mock_client.get.return_value
+        response.iter_content.return_value = [document[i:i + 50] for i in range(0, len(document), 50)]
+
+        # Act
+        result = list_activities_func(limit=500, fields=["activityId", "distance"], min_distance=8000)
+
+        # Assert
+        mock_client.get.assert_called_once_with(
+            "connectapi", "/activitylist-service/activities/search/activities",
+            api=True, stream=True, params={"limit": 500, "start": 0}
+        )
+        response.close.assert_called_once()
+        assert result == {"activities": [
+            {"activityId": 8, "distance": 8000.0},
+            {"activityId": 9, "distance": 9000.0},
+            {"activityId": 10, "distance": 10000.0},
+        ]}
+
+    @patch('garmin_workouts_mcp.main.garth.connectapi')
+    def test_list_activities_filters_small_lists(self, mock_connectapi):
+        """Test that projection and filters also apply to lists below the streaming threshold."""
+        import garmin_workouts_mcp.main as main_module
+        list_activities_func = main_module.list_activities.fn
+
+        # Arrange
+        mock_connectapi.return_value = [
+            {"activityId": 1, "activityName": "Short", "duration": 600.0},
+            {"activityId": 2, "activityName": "Long", "duration": 5400.0},
+        ]
+
+        # Act
+        result = list_activities_func(fields=["activityName"], min_duration=3600)
+
+        # Assert
+        assert result == {"activities": [{"activityName": "Long"}]}
+
+
+class TestGetTrainingSummary:
+    """Test cases for the get_training_summary tool."""
+
+    @patch('garmin_workouts_mcp.main.ACTIVITY_PAGE_SIZE', 2)
+    @patch('garmin_workouts_mcp.main.garth.connectapi')
+    def test_get_training_summary_pages_activities(self, mock_connectapi):
+        """Test that all pages are fetched and aggregated."""
+        # Import the actual function, not the FunctionTool wrapper
+        import garmin_workouts_mcp.main as main_module
+        get_training_summary_func = main_module.get_training_summary.fn
+
+        # Arrange
+        def activity(day):
+            return {"startTimeLocal": f"2024-01-{day:02d} 07:00:00", "duration": 3600, "distance": 10000,
+                    "activityType": {"typeKey": "running"}}
+        mock_connectapi.side_effect = [[activity(1), activity(2)], [activity(9)]]
+
+        # Act
+        result = get_training_summary_func("2024-01-01", "2024-01-14")
+
+        # Assert
+        assert mock_connectapi.call_count == 2
+        mock_connectapi.assert_any_call(
+            "/activitylist-service/activities/search/activities",
+            "GET",
+            params={"startDate": "2023-12-05", "endDate": "2024-01-14", "limit": 2, "start": 0}
+        )
+        mock_connectapi.assert_any_call(
+            "/activitylist-service/activities/search/activities",
+            "GET",
+            params={"startDate": "2023-12-05", "endDate": "2024-01-14", "limit": 2, "start": 2}
+        )
+        assert [row["count"] for row in result["rows"]] == [2, 1]
+        assert result["bySport"]["running"]["km"] == 30.0
+
+    @patch('garmin_workouts_mcp.main.ACTIVITY_PAGE_SIZE', 2)
+    @patch('garmin_workouts_mcp.main.garth.connectapi')
+    def test_get_training_summary_uses_response_cache(self, mock_connectapi):
+        """Test that repeated summaries over the same range reuse the cached activity pages."""
+        import garmin_workouts_mcp.main as main_module
+        from garmin_workouts_mcp.cache import ResponseCache
+
+        # Arrange
+        activity = {"startTimeLocal": "2024-01-02 07:00:00", "duration": 3600, "distance": 10000,
+                    "activityType": {"typeKey": "running"}}
+        mock_connectapi.side_effect = [[activity, activity], [activity]]
+
+        # Act
+        with patch.object(main_module, "response_cache", ResponseCache(ttl=60)):
+            first = main_module.get_training_summary.fn("2024-01-01", "2024-01-14")
+            second = main_module.get_training_summary.fn("2024-01-01", "2024-01-14")
+
+        # Assert
+        assert mock_connectapi.call_count == 2
+        assert first == second
+        assert first["bySport"]["running"]["km"] == 30.0
+
+    def test_get_training_summary_invalid_date(self):
+        """Test get_training_summary with an invalid date format."""
+        # Import the actual function, not the FunctionTool wrapper
+        import garmin_workouts_mcp.main as main_module
+        get_training_summary_func = main_module.get_training_summary.fn
+
+        with pytest.raises(ValueError, match=r"Dates must be in ISO format \(YYYY-MM-DD\)"):
+            get_training_summary_func("01/01/2024")
+
+    def test_get_training_summary_invalid_range(self):
+        """Test get_training_summary with start_date after end_date."""
+        # Import the actual function, not the FunctionTool wrapper
+        import garmin_workouts_mcp.main as main_module
+        get_training_summary_func = main_module.get_training_summary.fn
+
+        with pytest.raises(ValueError, match="start_date must not be after end_date"):
+            get_training_summary_func("2024-02-01", "2024-01-01")
+
 
 class TestGetActivityWeather:
     """Test cases for the get_activity_weather tool."""
@@ -593,6 +792,260 @@ class TestGetActivityWeather:
         assert result == {}
 
 
+class TestGetActivities:
+    """Test cases for the get_activities tool."""
+
+    @patch('garmin_workouts_mcp.main.garth.connectapi')
+    def test_get_activities_success(self, mock_connectapi):
+        """Test that details and weather are joined per activity."""
+        # Import the actual function, not the FunctionTool wrapper
+        import garmin_workouts_mcp.main as main_module
+        get_activities_func = main_module.get_activities.fn
+
+        # Arrange
+        def connectapi(endpoint):
+            activity_id = endpoint.split("/")[3]
+            if endpoint.endswith("/weather"):
+                return {"temp": int(activity_id)}
+            return {"activityId": activity_id, "activityName": f"Run {activity_id}"}
+        mock_connectapi.side_effect = connectapi
+
+        # Act
+        result = get_activities_func(["1", "2"])
+
+        # Assert
+        assert mock_connectapi.call_count == 4
+        assert result == {"activities": [
+            {"activityId": "1", "activity": {"activityId": "1", "activityName": "Run 1"}, "weather": {"temp": 1}},
+            {"activityId": "2", "activity": {"activityId": "2", "activityName": "Run 2"}, "weather": {"temp": 2}},
+        ]}
+
+    @patch('garmin_workouts_mcp.main.garth.connectapi')
+    def test_get_activities_projection_without_weather(self, mock_connectapi):
+        """Test field projection with nested fields and without weather."""
+        # Import the actual function, not the FunctionTool wrapper
+        import garmin_workouts_mcp.main as main_module
+        get_activities_func = main_module.get_activities.fn
+
+        # Arrange
+        mock_connectapi.return_value = {
+            "activityName": "Long Run",
+            "summaryDTO": {"distance": 21097.5, "duration": 6000},
+            "metadataDTO": {"lapCount": 21},
+        }
+
+        # Act
+        result = get_activities_func(["1"], fields=["activityName", "summaryDTO.distance"], include_weather=False)
+
+        # Assert
+        mock_connectapi.assert_called_once_with("/activity-service/activity/1")
+        assert result["activities"][0]["activity"] == {
+            "activityName": "Long Run",
+            "summaryDTO": {"distance": 21097.5},
+        }
+
+    @patch('garmin_workouts_mcp.main.garth.connectapi')
+    def test_get_activities_partial_errors(self, mock_connectapi):
+        """Test that a failing request is reported per ID without failing the batch."""
+        # Import the actual function, not the FunctionTool wrapper
+        import garmin_workouts_mcp.main as main_module
+        get_activities_func = main_module.get_activities.fn
+
+        # Arrange
+        def connectapi(endpoint):
+            if endpoint == "/activity-service/activity/2/weather":
+                raise Exception("Weather unavailable")
+            return {"ok": True}
+        mock_connectapi.side_effect = connectapi
+
+        # Act
+        result = get_activities_func(["1", "2"])
+
+        # Assert
+        assert "errors" not in result["activities"][0]
+        assert result["activities"][1]["activity"] == {"ok": True}
+        assert result["activities"][1]["errors"] == {"weather": "Weather unavailable"}
+        assert "weather" not in result["activities"][1]
+
+    @patch.dict('os.environ', {"GARMIN_TOOL_TIMEOUT_GET_ACTIVITIES": "0.2"})
+    @patch('garmin_workouts_mcp.main.garth.connectapi')
+    def test_get_activities_returns_partial_results_at_deadline(self, mock_connectapi):
+        """Test that a stalled request does not block the batch beyond its time budget."""
+        import threading
+        import time
+        import garmin_workouts_mcp.main as main_module
+        get_activities_func = main_module.get_activities.fn
+
+        # Arrange
+        release = threading.Event()
+        def connectapi(endpoint):
+            if endpoint == "/activity-service/activity/2":
+                release.wait(5)
+            return {"ok": True}
+        mock_connectapi.side_effect = connectapi
+
+        # Act
+        start = time.monotonic()
+        result = get_activities_func(["1", "2"], include_weather=False)
+        elapsed = time.monotonic() - start
+        release.set()
+
+        # Assert
+        assert elapsed < 1
+        assert result["incomplete"] is True
+        assert result["activities"][0]["activity"] == {"ok": True}
+        assert "Deadline" in result["activities"][1]["errors"]["activity"]
+
+
+class TestGetActivityFit:
+    """Test cases for the get_activity_fit tool."""
+
+    @patch('garmin_workouts_mcp.main.garth.client')
+    def test_get_activity_fit_downloads_and_summarizes(self, mock_client, tmp_path, monkeypatch):
+        """Test that the FIT file is streamed into the archive and summarized."""
+        from tests.test_fit import build_fit
+        import garmin_workouts_mcp.main as main_module
+        get_activity_fit_func = main_module.get_activity_fit.fn
+
+        # Arrange
+        monkeypatch.setenv("GARMIN_ARCHIVE_DIR", str(tmp_path))
+        fit = build_fit([(1000, 140, 3000), (1001, 150, 3500), (1002, 160, 4000)])
+        mock_client.get.return_value.iter_content.return_value = [fit[:20], fit[20:]]
+
+        # Act
+        result = get_activity_fit_func("123", fields=["heart_rate"], start=0, stop=2)
+
+        # Assert
+        mock_client.get.assert_called_once_with(
+            "connectapi", "/download-service/files/activity/123", api=True, stream=True
+        )
+        assert result["file"] == str(tmp_path / "123.fit")
+        assert result["counts"]["record"] == 3
+        assert result["summary"]["heart_rate"]["max"] == 160
+        assert result["slice"] == {"heart_rate": [140, 150]}
+
+    @patch('garmin_workouts_mcp.main.garth.client')
+    def test_get_activity_fit_uses_archive(self, mock_client, tmp_path, monkeypatch):
+        """Test that an archived FIT file is not downloaded again."""
+        from tests.test_fit import build_fit
+        import garmin_workouts_mcp.main as main_module
+        get_activity_fit_func = main_module.get_activity_fit.fn
+
+        # Arrange
+        monkeypatch.setenv("GARMIN_ARCHIVE_DIR", str(tmp_path))
+        (tmp_path / "123.fit").write_bytes(build_fit([(1000, 140, 3000)], laps=[60000]))
+
+        # Act
+        result = get_activity_fit_func("123", message="lap")
+
+        # Assert
+        mock_client.get.assert_not_called()
+        assert result["summary"]["total_elapsed_time"]["max"] == 60
+        assert "slice" not in result
+
+    def test_get_activity_fit_invalid_step(self):
+        """Test that a non-positive step is rejected."""
+        import garmin_workouts_mcp.main as main_module
+        get_activity_fit_func = main_module.get_activity_fit.fn
+
+        with pytest.raises(ValueError, match="Step must be at least 1, got 0"):
+            get_activity_fit_func("123", step=0)
+
+    @patch('garmin_workouts_mcp.main.garth.client')
+    def test_get_activity_fit_invalid_activity_id(self, mock_client, tmp_path, monkeypatch):
+        """Test that activity IDs that could escape the archive directory are rejected."""
+        import garmin_workouts_mcp.main as main_module
+
+        monkeypatch.setenv("GARMIN_ARCHIVE_DIR", str(tmp_path))
+
+        with pytest.raises(ValueError, match="Invalid activity ID: ../../x"):
+            main_module.get_activity_fit.fn("../../x")
+        mock_client.get.assert_not_called()
+
+
+    @patch('garmin_workouts_mcp.main.garth.client')
+    def test_get_activity_fit_invalid_athlete(self, mock_client, tmp_path, monkeypatch):
+        """Test that an athlete name leading outside the archive directory is rejected before the archive is read."""
+        from tests.test_fit import build_fit
+        import garmin_workouts_mcp.main as main_module
+
+        # Arrange
+        archive_dir = tmp_path / "activities"
+        archive_dir.mkdir()
+        monkeypatch.setenv("GARMIN_ARCHIVE_DIR", str(archive_dir))
+        (tmp_path / "123.fit").write_bytes(build_fit([(1000, 140, 3000)], laps=[60000]))
+
+        # Act & Assert
+        with pytest.raises(ValueError, match="Invalid athlete name: .."):
+            main_module.get_activity_fit.fn("123", athlete="..")
+        mock_client.get.assert_not_called()
+
+class TestGetActivityTrack:
+    """Test cases for the get_activity_track tool."""
+
+    @staticmethod
+    def records(lat, lon):
+        from array import array
+        from garmin_workouts_mcp.fit import FitMessages
+        records = FitMessages("record", ["timestamp", "position_lat", "position_long"])
+        records.columns["position_lat"] = array("d", lat)
+        records.columns["position_long"] = array("d", lon)
+        return {"record": records}
+
+    @patch('garmin_workouts_mcp.main.parse_fit_file')
+    @patch('garmin_workouts_mcp.main.download_activity_fit')
+    def test_get_activity_track_simplifies(self, mock_download, mock_parse):
+        """Test that the FIT positions are simplified to the point budget and encoded."""
+        from garmin_workouts_mcp.track import decode_polyline
+        import garmin_workouts_mcp.main as main_module
+        get_activity_track_func = main_module.get_activity_track.fn
+
+        # Arrange: an L-shaped track with a gap in the GPS data
+        lat = [47.0 + 0.0001 * i for i in range(100)] + [47.0099] * 100
+        lon = [8.0] * 100 + [8.0 + 0.0001 * i for i in range(100)]
+        lat[50] = float("nan")
+        mock_download.return_value = "/archive/123.fit"
+        mock_parse.return_value = self.records(lat, lon)
+
+        # Act
+        result = get_activity_track_func("123", max_points=3)
+
+        # Assert
+        mock_download.assert_called_once_with("123")
+        mock_parse.assert_called_once_with("/archive/123.fit")
+        assert result["activityId"] == "123"
+        assert result["points"] == 3
+        assert result["originalPoints"] == 199
+        assert result["maxError"] < 1
+        assert result["bounds"] == {"south": 47.0, "west": 8.0, "north": 47.0099, "east": 8.0099}
+        assert decode_polyline(result["polyline"]).tolist() == [[47.0, 8.0], [47.0099, 8.0], [47.0099, 8.0099]]
+
+    @patch('garmin_workouts_mcp.main.parse_fit_file')
+    @patch('garmin_workouts_mcp.main.download_activity_fit')
+    def test_get_activity_track_without_gps(self, mock_download, mock_parse):
+        """Test that an activity without positions returns an empty track."""
+        import garmin_workouts_mcp.main as main_module
+        get_activity_track_func = main_module.get_activity_track.fn
+
+        mock_parse.return_value = self.records([], [])
+
+        result = get_activity_track_func("123", tolerance=5)
+
+        assert result["polyline"] == ""
+        assert result["points"] == 0
+        assert result["bounds"] is None
+
+    def test_get_activity_track_invalid_limits(self):
+        """Test that invalid tolerances and point budgets are rejected."""
+        import garmin_workouts_mcp.main as main_module
+        get_activity_track_func = main_module.get_activity_track.fn
+
+        with pytest.raises(ValueError, match="Tolerance must not be negative, got -1"):
+            get_activity_track_func("123", tolerance=-1)
+        with pytest.raises(ValueError, match="Point budget must be between 2 and 5000, got 1"):
+            get_activity_track_func("123", max_points=1)
+
+
 class TestGenerateWorkoutDataPrompt:
     """Test cases for the generate_workout_data_prompt tool."""
 
@@ -646,7 +1099,8 @@ class TestUploadWorkout:
         mock_connectapi.assert_called_once_with(
             "/workout-service/workout",
             method="POST",
-            json=mock_payload
+            data=dumps_bytes(mock_payload),
+            headers={"Content-Type": "application/json"}
         )
 
     @patch('garmin_workouts_mcp.main.make_payload')
@@ -667,114 +1121,572 @@ class TestUploadWorkout:
             upload_workout_func(workout_data)
 
 
+class TestUpdateWorkout:
+    """Test cases for the update_workout tool."""
 
-class TestGetCalendar:
-    """Test cases for the get_calendar tool."""
+    workout_data = {
+        "name": "Tempo",
+        "type": "running",
+        "steps": [
+            {"stepType": "warmup", "endConditionType": "time", "stepDuration": 600},
+            {"stepType": "interval", "endConditionType": "distance", "stepDistance": 5, "distanceUnit": "km",
+             "target": {"type": "pace", "value": [4.5, 4.75], "unit": "min_per_km"}},
+        ],
+    }
+
+    def current_workout(self):
+        from garmin_workouts_mcp.garmin_workout import make_payload
+        return {"workoutId": 12345, "ownerId": 1, **make_payload(self.workout_data)}
 
     @patch('garmin_workouts_mcp.main.garth.connectapi')
-    def test_get_calendar_monthly_success(self, mock_connectapi):
-        """Test successful retrieval of monthly calendar data."""
-        # Import the actual function, not the FunctionTool wrapper
+    def test_update_workout_unchanged(self, mock_connectapi):
+        """Test update_workout skips the update when nothing changed."""
         import garmin_workouts_mcp.main as main_module
-        get_calendar_func = main_module.get_calendar.fn
+        update_workout_func = main_module.update_workout.fn
 
         # Arrange
-        year, month = 2025, 6
-        expected_calendar = {
-            "calendarItems": [
-                {
-                    "date": "2025-06-01",
-                    "workouts": [],
-                    "activities": []
-                }
-            ]
-        }
-        mock_connectapi.return_value = expected_calendar
+        mock_connectapi.return_value = self.current_workout()
 
         # Act
-        result = get_calendar_func(year, month)
+        result = update_workout_func("12345", self.workout_data)
 
         # Assert
-        mock_connectapi.assert_called_once_with("/calendar-service/year/2025/month/5")
-        assert result["calendar"] == expected_calendar
-        assert result["view_type"] == "month"
-        assert result["period"]["year"] == year
-        assert result["period"]["month"] == month
-        assert result["period"]["day"] is None
-        assert result["period"]["start"] is None
+        assert result == {"workoutId": "12345", "updated": False}
+        mock_connectapi.assert_called_once_with("/workout-service/workout/12345")
 
     @patch('garmin_workouts_mcp.main.garth.connectapi')
-    def test_get_calendar_weekly_success(self, mock_connectapi):
-        """Test successful retrieval of weekly calendar data."""
-        # Import the actual function, not the FunctionTool wrapper
+    def test_update_workout_changed(self, mock_connectapi):
+        """Test update_workout sends the merged workout with PUT."""
         import garmin_workouts_mcp.main as main_module
-        get_calendar_func = main_module.get_calendar.fn
+        from garmin_workouts_mcp.garmin_workout import make_payload
+        update_workout_func = main_module.update_workout.fn
 
         # Arrange
-        year, month, day = 2025, 6, 10
-        expected_calendar = {
-            "calendarItems": [
-                {
-                    "date": "2025-06-10",
-                    "workouts": [{"workoutId": "123", "workoutName": "Morning Run"}],
-                    "activities": []
-                }
-            ]
-        }
-        mock_connectapi.return_value = expected_calendar
+        workout_data = {**self.workout_data, "steps": self.workout_data["steps"][:1]}
+        mock_connectapi.side_effect = [self.current_workout(), None]
 
         # Act
-        result = get_calendar_func(year, month, day)
+        result = update_workout_func("12345", workout_data)
 
         # Assert
-        mock_connectapi.assert_called_once_with("/calendar-service/year/2025/month/5/day/10/start/1")
-        assert result["calendar"] == expected_calendar
-        assert result["view_type"] == "week"
-        assert result["period"]["year"] == year
-        assert result["period"]["month"] == month
-        assert result["period"]["day"] == day
-        assert result["period"]["start"] == 1
+        assert result == {"workoutId": "12345", "updated": True}
+        assert mock_connectapi.call_count == 2
+        args, kwargs = mock_connectapi.call_args
+        assert args == ("/workout-service/workout/12345",)
+        assert kwargs["method"] == "PUT"
+        body = loads(kwargs["data"])
+        assert body["workoutId"] == 12345
+        assert body["ownerId"] == 1
+        assert body["workoutSegments"] == make_payload(workout_data)["workoutSegments"]
 
     @patch('garmin_workouts_mcp.main.garth.connectapi')
-    def test_get_calendar_weekly_custom_start(self, mock_connectapi):
-        """Test weekly calendar with custom start parameter."""
-        # Import the actual function, not the FunctionTool wrapper
+    def test_update_workout_uses_cached_workout(self, mock_connectapi):
+        """Test update_workout compares against the cached workout without fetching it."""
         import garmin_workouts_mcp.main as main_module
-        get_calendar_func = main_module.get_calendar.fn
+        from garmin_workouts_mcp.cache import ResponseCache
+        update_workout_func = main_module.update_workout.fn
 
         # Arrange
-        year, month, day, start = 2025, 6, 10, 2
-        mock_connectapi.return_value = {}
+        cache = ResponseCache(ttl=60)
+        cache.set("/workout-service/workout/12345", self.current_workout())
 
         # Act
-        result = get_calendar_func(year, month, day, start)
+        with patch.object(main_module, "response_cache", cache):
+            result = update_workout_func("12345", self.workout_data)
 
         # Assert
-        mock_connectapi.assert_called_once_with("/calendar-service/year/2025/month/5/day/10/start/2")
-        assert result["view_type"] == "week"
-        assert result["period"]["start"] == 2
+        assert result == {"workoutId": "12345", "updated": False}
+        mock_connectapi.assert_not_called()
 
-    def test_get_calendar_invalid_year(self):
-        """Test get_calendar with invalid year."""
-        # Import the actual function, not the FunctionTool wrapper
+    @patch('garmin_workouts_mcp.main.garth.connectapi')
+    def test_update_workout_not_found(self, mock_connectapi):
+        """Test update_workout when the workout does not exist."""
         import garmin_workouts_mcp.main as main_module
-        get_calendar_func = main_module.get_calendar.fn
+        update_workout_func = main_module.update_workout.fn
 
-        # Test year too low
-        with pytest.raises(ValueError, match="Year must be between 1900 and 2100, got 1899"):
-            get_calendar_func(1899, 6)
+        # Arrange
+        mock_connectapi.return_value = None
 
-        # Test year too high
-        with pytest.raises(ValueError, match="Year must be between 1900 and 2100, got 2101"):
-            get_calendar_func(2101, 6)
+        # Act & Assert
+        with pytest.raises(Exception, match="Failed to update workout on Garmin Connect: Workout 12345 not found"):
+            update_workout_func("12345", self.workout_data)
 
-    def test_get_calendar_invalid_month(self):
-        """Test get_calendar with invalid month."""
-        # Import the actual function, not the FunctionTool wrapper
+    @patch('garmin_workouts_mcp.main.garth.connectapi')
+    def test_update_workout_invalid_data(self, mock_connectapi):
+        """Test update_workout rejects invalid workout data before calling Garmin Connect."""
         import garmin_workouts_mcp.main as main_module
-        get_calendar_func = main_module.get_calendar.fn
+        update_workout_func = main_module.update_workout.fn
 
-        # Test month too low
+        # Act & Assert
+        with pytest.raises(Exception, match="Invalid workout data: Unsupported sport type: rowing"):
+            update_workout_func("12345", {"name": "Row", "type": "rowing", "steps": []})
+        mock_connectapi.assert_not_called()
+
+
+class TestValidateWorkout:
+    """Test cases for the validate_workout tool."""
+
+    @patch('garmin_workouts_mcp.main.garth.connectapi')
+    def test_validate_workout_valid(self, mock_connectapi):
+        """Test that a valid workout reports its estimated duration without any request."""
+        # Import the actual function, not the FunctionTool wrapper
+        import garmin_workouts_mcp.main as main_module
+        validate_workout_func = main_module.validate_workout.fn
+
+        # Act
+        result = validate_workout_func({"name": "Easy", "type": "running",
+                                        "steps": [{"stepType": "interval", "stepDuration": 1800}]})
+
+        # Assert
+        mock_connectapi.assert_not_called()
+        assert result == {"valid": True, "errors": [], "warnings": [], "estimatedDurationInSecs": 1800}
+
+    def test_validate_workout_invalid(self):
+        """Test that all errors of an invalid workout are returned."""
+        # Import the actual function, not the FunctionTool wrapper
+        import garmin_workouts_mcp.main as main_module
+        validate_workout_func = main_module.validate_workout.fn
+
+        # Act
+        result = validate_workout_func({"name": "Bad", "type": "running",
+                                        "steps": [{"stepDuration": 60}, {"stepType": "rest"}]})
+
+        # Assert
+        assert result["valid"] is False
+        assert len(result["errors"]) == 2
+        assert "estimatedDurationInSecs" not in result
+
+
+class TestCreateTrainingPlan:
+    """Test cases for the create_training_plan tool."""
+
+    PLAN = {
+        "startDate": "2025-01-06",
+        "weeks": 2,
+        "workouts": [
+            {"day": "tuesday", "workout": {"name": "Easy", "type": "running",
+                                           "steps": [{"stepType": "interval", "stepDuration": 1800}]},
+             "progression": {"stepDuration": {"add": 300}}},
+        ],
+    }
+
+    @patch('garmin_workouts_mcp.main.garth.connectapi')
+    def test_create_training_plan_dry_run(self, mock_connectapi):
+        """Test that a dry run compiles the plan without any request."""
+        # Import the actual function, not the FunctionTool wrapper
+        import garmin_workouts_mcp.main as main_module
+        create_training_plan_func = main_module.create_training_plan.fn
+
+        # Act
+        result = create_training_plan_func(self.PLAN, dry_run=True)
+
+        # Assert
+        mock_connectapi.assert_not_called()
+        assert result == {"workouts": [
+            {"date": "2025-01-07", "workoutName": "W01 Easy", "estimatedDurationInSecs": 1800},
+            {"date": "2025-01-14", "workoutName": "W02 Easy", "estimatedDurationInSecs": 2100},
+        ]}
+
+    @patch('garmin_workouts_mcp.main.garth.connectapi')
+    def test_create_training_plan_uploads_and_schedules(self, mock_connectapi):
+        """Test that every workout is uploaded and scheduled on its date."""
+        # Import the actual function, not the FunctionTool wrapper
+        import garmin_workouts_mcp.main as main_module
+        create_training_plan_func = main_module.create_training_plan.fn
+
+        # Arrange
+        def connectapi(endpoint, method="GET", data=None, headers=None):
+            json = loads(data)
+            if endpoint == "/workout-service/workout":
+                return {"workoutId": json["workoutName"][:3]}
+            return {"workoutScheduleId": f"{endpoint.rsplit('/', 1)[1]}@{json['date']}"}
+        mock_connectapi.side_effect = connectapi
+
+        # Act
+        result = create_training_plan_func(self.PLAN)
+
+        # Assert
+        assert mock_connectapi.call_count == 4
+        assert [(w["workoutId"], w["workoutScheduleId"]) for w in result["workouts"]] == [
+            ("W01", "W01@2025-01-07"),
+            ("W02", "W02@2025-01-14"),
+        ]
+
+    @patch('garmin_workouts_mcp.main.garth.connectapi')
+    def test_create_training_plan_reports_upload_errors(self, mock_connectapi):
+        """Test that a failed upload is reported for that workout only."""
+        # Import the actual function, not the FunctionTool wrapper
+        import garmin_workouts_mcp.main as main_module
+        create_training_plan_func = main_module.create_training_plan.fn
+
+        # Arrange
+        def connectapi(endpoint, method="GET", data=None, headers=None):
+            json = loads(data)
+            if endpoint == "/workout-service/workout":
+                if json["workoutName"] == "W02 Easy":
+                    raise Exception("Too many requests")
+                return {"workoutId": "1"}
+            return {"workoutScheduleId": "2"}
+        mock_connectapi.side_effect = connectapi
+
+        # Act
+        result = create_training_plan_func(self.PLAN)
+
+        # Assert
+        assert result["workouts"][0]["workoutScheduleId"] == "2"
+        assert result["workouts"][1]["error"] == "Too many requests"
+
+    @patch('garmin_workouts_mcp.main.garth.connectapi')
+    def test_create_training_plan_invalid_workout(self, mock_connectapi):
+        """Test that compile errors of all workouts are reported before any request."""
+        # Import the actual function, not the FunctionTool wrapper
+        import garmin_workouts_mcp.main as main_module
+        create_training_plan_func = main_module.create_training_plan.fn
+
+        # Arrange
+        plan = dict(self.PLAN, workouts=[{"workout": {"name": "Bad", "type": "rowing", "steps": []}}])
+
+        # Act & Assert
+        with pytest.raises(ValueError, match="(?s)2025-01-06 W01 Bad: Unsupported sport type: rowing.*2025-01-13 W02 Bad"):
+            create_training_plan_func(plan)
+        mock_connectapi.assert_not_called()
+
+    @patch('garmin_workouts_mcp.main.garth.connectapi')
+    def test_upload_workout_invalid_data(self, mock_connectapi):
+        """Test that invalid workout data is rejected with all errors before any request."""
+        # Import the actual function, not the FunctionTool wrapper
+        import garmin_workouts_mcp.main as main_module
+        upload_workout_func = main_module.upload_workout.fn
+
+        # Arrange
+        workout_data = {"name": "Test Workout", "type": "rowing", "steps": [{"stepType": "interval"}]}
+
+        # Act & Assert
+        with pytest.raises(Exception, match="Unsupported sport type: rowing; steps\\[0\\]: Invalid or missing stepDuration"):
+            upload_workout_func(workout_data)
+        mock_connectapi.assert_not_called()
+
+
+
+class TestSyncPlan:
+    """Test cases for the sync_plan tool."""
+
+    PLAN = {
+        "name": "Base",
+        "startDate": "2025-01-20",
+        "weeks": 3,
+        "workouts": [
+            {"day": "tuesday", "workout": {"name": "Easy", "type": "running",
+                                           "steps": [{"stepType": "interval", "stepDuration": 1800}]},
+             "progression": {"stepDuration": {"add": 300}}},
+        ],
+    }
+
+    def make_backend(self, calendar_items, workouts):
+        """Returns a fake connectapi serving calendar months and workouts and recording writes."""
+        requests = []
+
+        def connectapi(endpoint, method="GET", data=None, headers=None):
+            requests.append((method, endpoint))
+            if endpoint.startswith("/calendar-service/"):
+                month = int(endpoint.rsplit("/", 1)[1]) + 1
+                return {"calendarItems": [item for item in calendar_items if int(item["date"][5:7]) == month]}
+            if method == "GET":
+                return workouts[endpoint.rsplit("/", 1)[1]]
+            if endpoint == "/workout-service/workout":
+                return {"workoutId": "new"}
+            if method == "POST":
+                return {"workoutScheduleId": "scheduled"}
+            return None
+
+        return connectapi, requests
+
+    def scheduled_workout(self, workout_id, date, week, duration):
+        from garmin_workouts_mcp.garmin_workout import make_payload
+        name = f"Base W{week:02d} Easy"
+        item = {"id": f"s{workout_id}", "itemType": "workout", "workoutId": workout_id, "title": name, "date": date}
+        workout = {"workoutId": workout_id, **make_payload({
+            "name": name, "type": "running", "steps": [{"stepType": "interval", "stepDuration": duration}]})}
+        return item, workout
+
+    @patch('garmin_workouts_mcp.main.garth.connectapi')
+    def test_sync_plan_sends_minimal_operations(self, mock_connectapi):
+        """Test that only changed, moved, missing and stale workouts cause requests."""
+        import garmin_workouts_mcp.main as main_module
+        sync_plan_func = main_module.sync_plan.fn
+
+        # Arrange: W01 unchanged, W02 on the wrong day with old content, W03 missing, W04 after the plan
+        items, workouts = zip(
+            self.scheduled_workout(1, "2025-01-21", 1, 1800),
+            self.scheduled_workout(2, "2025-01-29", 2, 1800),
+            self.scheduled_workout(4, "2025-02-10", 4, 2700),
+        )
+        calendar_items = list(items) + [
+            {"id": "s9", "itemType": "workout", "workoutId": 9, "title": "Long Run", "date": "2025-01-26"},
+            {"id": "a1", "itemType": "activity", "title": "Base W01 Easy", "date": "2025-01-21"},
+        ]
+        connectapi, requests = self.make_backend(calendar_items, {str(w["workoutId"]): w for w in workouts})
+        mock_connectapi.side_effect = connectapi
+
+        # Act
+        result = sync_plan_func(plan=self.PLAN, end_date="2025-02-28")
+
+        # Assert
+        assert result["unchanged"] == 1
+        assert sorted((op["operation"], op["date"], op.get("error")) for op in result["operations"]) == [
+            ("schedule", "2025-01-28", None),
+            ("unschedule", "2025-01-29", None),
+            ("unschedule", "2025-02-10", None),
+            ("update", "2025-01-28", None),
+            ("upload", "2025-02-04", None),
+        ]
+        writes = sorted(request for request in requests if request[0] != "GET")
+        assert writes == [
+            ("DELETE", "/workout-service/schedule/s2"),
+            ("DELETE", "/workout-service/schedule/s4"),
+            ("POST", "/workout-service/schedule/2"),
+            ("POST", "/workout-service/schedule/new"),
+            ("POST", "/workout-service/workout"),
+            ("PUT", "/workout-service/workout/2"),
+        ]
+
+    @patch('garmin_workouts_mcp.main.garth.connectapi')
+    def test_sync_plan_dry_run_without_content_check(self, mock_connectapi):
+        """Test that a dry run only reads the calendar when the content check is disabled."""
+        import garmin_workouts_mcp.main as main_module
+        sync_plan_func = main_module.sync_plan.fn
+
+        # Arrange
+        item, workout = self.scheduled_workout(1, "2025-01-21", 1, 1800)
+        connectapi, requests = self.make_backend([item], {"1": workout})
+        mock_connectapi.side_effect = connectapi
+
+        # Act
+        result = sync_plan_func(entries=[{"date": "2025-01-21", "workout": {
+            "name": "Base W01 Easy", "type": "running", "steps": [{"stepType": "interval", "stepDuration": 1800}]}}],
+            check_content=False, dry_run=True)
+
+        # Assert
+        assert result == {"operations": [], "unchanged": 1}
+        assert requests == [("GET", "/calendar-service/year/2025/month/0")]
+
+    def test_sync_plan_requires_plan_or_entries(self):
+        """Test that exactly one of plan and entries must be given."""
+        import garmin_workouts_mcp.main as main_module
+        sync_plan_func = main_module.sync_plan.fn
+
+        with pytest.raises(ValueError, match="Either plan or entries must be provided."):
+            sync_plan_func()
+
+
+class TestWarmUp:
+    """Test cases for the startup cache warm-up."""
+
+    @patch.dict('os.environ', {"GARMIN_WARMUP": "1", "GARMIN_WARMUP_CALENDAR": "1"})
+    @patch('garmin_workouts_mcp.main.garth.connectapi')
+    def test_warm_up_serves_first_calls_from_cache(self, mock_connectapi):
+        """Test that the first list and calendar calls are served from the warmed up cache."""
+        import garmin_workouts_mcp.main as main_module
+        from datetime import datetime
+        from garmin_workouts_mcp.cache import ResponseCache
+        from garmin_workouts_mcp.prefetch import Prefetcher
+
+        # Arrange
+        cache = ResponseCache(ttl=60)
+        prefetcher = Prefetcher(cache)
+        today = datetime.now()
+
+        def connectapi(endpoint, method="GET", params=None):
+            return {"endpoint": endpoint, "params": params}
+        mock_connectapi.side_effect = connectapi
+
+        with patch.object(main_module, "response_cache", cache), patch.object(main_module, "prefetcher", prefetcher):
+            # Act
+            assert main_module.warm_up() == 3
+            prefetcher.join()
+            workouts = main_module.list_workouts.fn()
+            activities = main_module.list_activities.fn()
+            calendar = main_module.get_calendar.fn(today.year, today.month)
+
+        # Assert
+        assert mock_connectapi.call_count == 3
+        assert workouts["workouts"]["endpoint"] == "/workout-service/workouts"
+        assert activities["activities"]["params"] == {"limit": 20, "start": 0}
+        assert calendar["calendar"]["endpoint"] == f"/calendar-service/year/{today.year}/month/{today.month - 1}"
+
+    @patch.dict('os.environ', {}, clear=True)
+    @patch('garmin_workouts_mcp.main.garth.connectapi')
+    def test_warm_up_disabled(self, mock_connectapi):
+        """Test that nothing is prefetched unless the warm-up is enabled."""
+        import garmin_workouts_mcp.main as main_module
+
+        assert main_module.warm_up() == 0
+        mock_connectapi.assert_not_called()
+
+    @patch('garmin_workouts_mcp.main.garth.connectapi')
+    def test_schedule_workout_invalidates_cached_calendar(self, mock_connectapi):
+        """Test that scheduling a workout removes the cached calendar of its month."""
+        import garmin_workouts_mcp.main as main_module
+        from garmin_workouts_mcp.cache import ResponseCache
+
+        # Arrange
+        cache = ResponseCache(ttl=60)
+        cache.set("/calendar-service/year/2025/month/5", {"calendarItems": []})
+        cache.set("/calendar-service/year/2025/month/6", {"calendarItems": []})
+        mock_connectapi.return_value = {"workoutScheduleId": 1}
+
+        # Act
+        with patch.object(main_module, "response_cache", cache):
+            main_module.schedule_workout.fn("10", "2025-06-15")
+
+        # Assert
+        assert cache.get("/calendar-service/year/2025/month/5") is None
+        assert cache.get("/calendar-service/year/2025/month/6") == {"calendarItems": []}
+
+
+class TestGetCalendar:
+    """Test cases for the get_calendar tool."""
+
+    @patch('garmin_workouts_mcp.main.garth.connectapi')
+    def test_get_calendar_monthly_success(self, mock_connectapi):
+        """Test successful retrieval of monthly calendar data."""
+        # Import the actual function, not the FunctionTool wrapper
+        import garmin_workouts_mcp.main as main_module
+        get_calendar_func = main_module.get_calendar.fn
+
+        # Arrange
+        year, month = 2025, 6
+        expected_calendar = {
+            "calendarItems": [
+                {
+                    "date": "2025-06-01",
+                    "workouts": [],
+                    "activities": []
+                }
+            ]
+        }
+        mock_connectapi.return_value = expected_calendar
+
+        # Act
+        result = get_calendar_func(year, month)
+
+        # Assert
+        mock_connectapi.assert_called_once_with("/calendar-service/year/2025/month/5")
+        assert result["calendar"] == expected_calendar
+        assert result["view_type"] == "month"
+        assert result["period"]["year"] == year
+        assert result["period"]["month"] == month
+        assert result["period"]["day"] is None
+        assert result["period"]["start"] is None
+
+    @patch.dict('os.environ', {"GARMIN_PREFETCH": "1"})
+    @patch('garmin_workouts_mcp.main.garth.connectapi')
+    def test_get_calendar_prefetches_items(self, mock_connectapi):
+        """Test that workouts and activities of calendar items are prefetched into the cache."""
+        import garmin_workouts_mcp.main as main_module
+        from garmin_workouts_mcp.cache import ResponseCache
+        from garmin_workouts_mcp.prefetch import Prefetcher
+        get_calendar_func = main_module.get_calendar.fn
+
+        # Arrange
+        cache = ResponseCache(ttl=60)
+        prefetcher = Prefetcher(cache)
+        calendar = {"calendarItems": [
+            {"id": 1, "itemType": "workout", "workoutId": 10, "date": "2025-06-02"},
+            {"id": 2, "itemType": "activity", "date": "2025-06-03"},
+            {"id": 3, "itemType": "weight", "date": "2025-06-04"},
+        ]}
+        responses = {
+            "/calendar-service/year/2025/month/5": calendar,
+            "/workout-service/workout/10": {"workoutId": 10},
+            "/activity-service/activity/2": {"activityId": 2},
+        }
+        mock_connectapi.side_effect = lambda endpoint: responses[endpoint]
+
+        with patch.object(main_module, "response_cache", cache), patch.object(main_module, "prefetcher", prefetcher):
+            # Act
+            get_calendar_func(2025, 6)
+            prefetcher.join()
+            workout = main_module.get_workout.fn("10")
+            activity = main_module.get_activity.fn("2")
+
+        # Assert
+        assert workout == {"workout": {"workoutId": 10}}
+        assert activity == {"activityId": 2}
+        assert mock_connectapi.call_count == 3
+
+    @patch('garmin_workouts_mcp.main.garth.connectapi')
+    def test_get_calendar_weekly_success(self, mock_connectapi):
+        """Test successful retrieval of weekly calendar data."""
+        # Import the actual function, not the FunctionTool wrapper
+        import garmin_workouts_mcp.main as main_module
+        get_calendar_func = main_module.get_calendar.fn
+
+        # Arrange
+        year, month, day = 2025, 6, 10
+        expected_calendar = {
+            "calendarItems": [
+                {
+                    "date": "2025-06-10",
+                    "workouts": [{"workoutId": "123", "workoutName": "Morning Run"}],
+                    "activities": []
+                }
+            ]
+        }
+        mock_connectapi.return_value = expected_calendar
+
+        # Act
+        result = get_calendar_func(year, month, day)
+
+        # Assert
+        mock_connectapi.assert_called_once_with("/calendar-service/year/2025/month/5/day/10/start/1")
+        assert result["calendar"] == expected_calendar
+        assert result["view_type"] == "week"
+        assert result["period"]["year"] == year
+        assert result["period"]["month"] == month
+        assert result["period"]["day"] == day
+        assert result["period"]["start"] == 1
+
+    @patch('garmin_workouts_mcp.main.garth.connectapi')
+    def test_get_calendar_weekly_custom_start(self, mock_connectapi):
+        """Test weekly calendar with custom start parameter."""
+        # Import the actual function, not the FunctionTool wrapper
+        import garmin_workouts_mcp.main as main_module
+        get_calendar_func = main_module.get_calendar.fn
+
+        # Arrange
+        year, month, day, start = 2025, 6, 10, 2
+        mock_connectapi.return_value = {}
+
+        # Act
+        result = get_calendar_func(year, month, day, start)
+
+        # Assert
+        mock_connectapi.assert_called_once_with("/calendar-service/year/2025/month/5/day/10/start/2")
+        assert result["view_type"] == "week"
+        assert result["period"]["start"] == 2
+
+    def test_get_calendar_invalid_year(self):
+        """Test get_calendar with invalid year."""
+        # Import the actual function, not the FunctionTool wrapper
+        import garmin_workouts_mcp.main as main_module
+        get_calendar_func = main_module.get_calendar.fn
+
+        # Test year too low
+        with pytest.raises(ValueError, match="Year must be between 1900 and 2100, got 1899"):
+            get_calendar_func(1899, 6)
+
+        # Test year too high
+        with pytest.raises(ValueError, match="Year must be between 1900 and 2100, got 2101"):
+            get_calendar_func(2101, 6)
+
+    def test_get_calendar_invalid_month(self):
+        """Test get_calendar with invalid month."""
+        # Import the actual function, not the FunctionTool wrapper
+        import garmin_workouts_mcp.main as main_module
+        get_calendar_func = main_module.get_calendar.fn
+
+        # Test month too low
         with pytest.raises(ValueError, match="Month must be between 1 and 12, got 0"):
             get_calendar_func(2025, 0)
 
@@ -828,3 +1740,547 @@ class TestGetCalendar:
             get_calendar_func(2025, 6)
 
         mock_connectapi.assert_called_once_with("/calendar-service/year/2025/month/5")
+
+
+class TestSearch:
+    """Test cases for the search tool."""
+
+    @patch('garmin_workouts_mcp.main.garth.connectapi')
+    def test_search_indexes_responses(self, mock_connectapi):
+        """Test that listed activities and workouts are searchable without further requests."""
+        import garmin_workouts_mcp.main as main_module
+        from garmin_workouts_mcp.search_index import SearchIndexPool
+
+        # Arrange
+        def connectapi(endpoint, *args, **kwargs):
+            if endpoint == "/workout-service/workouts":
+                return [{"workoutId": 10, "workoutName": "Threshold Intervals", "sportType": {"sportTypeKey": "running"}}]
+            return [{"activityId": 1, "activityName": "Threshold Run", "activityType": {"typeKey": "running"},
+                     "startTimeLocal": "2024-05-01 07:00:00"}]
+        mock_connectapi.side_effect = connectapi
+
+        with patch.object(main_module, "search_indexes", SearchIndexPool(1)):
+            main_module.list_workouts.fn()
+            main_module.list_activities.fn()
+            calls = mock_connectapi.call_count
+
+            # Act
+            result = main_module.search.fn("thresh")
+            workouts = main_module.search.fn("threshold", kind="workout")
+
+            main_module.delete_workout.fn("10")
+            deleted = main_module.search.fn("intervals")
+
+        # Assert
+        assert mock_connectapi.call_count == calls + 1  # only the delete request
+        assert [(r["kind"], r["id"], r["name"]) for r in result["results"]] == [
+            ("activity", "1", "Threshold Run"), ("workout", "10", "Threshold Intervals"),
+        ]
+        assert result["indexed"] == {"activity": 1, "workout": 1}
+        assert [r["id"] for r in workouts["results"]] == ["10"]
+        assert deleted["results"] == []
+
+    def test_search_invalid_kind(self):
+        """Test that an invalid kind is rejected."""
+        import garmin_workouts_mcp.main as main_module
+
+        with pytest.raises(ValueError, match="Kind must be one of"):
+            main_module.search.fn("run", kind="route")
+
+
+class TestWriteQueue:
+    """Test cases for uploads and schedules through the write queue."""
+
+    @pytest.fixture
+    def queue(self, tmp_path):
+        import garmin_workouts_mcp.main as main_module
+        from garmin_workouts_mcp.write_queue import WriteQueue
+
+        queue = WriteQueue(str(tmp_path / "queue.db"))
+        queue._handlers = dict(main_module.write_queue._handlers)
+        # Operations are flushed explicitly by the tests
+        queue.start = lambda: None
+        with patch.object(main_module, "write_queue", queue):
+            yield queue
+
+    @patch('garmin_workouts_mcp.main.make_payload')
+    @patch('garmin_workouts_mcp.main.garth.connectapi')
+    def test_upload_and_schedule_are_queued(self, mock_connectapi, mock_make_payload, queue):
+        """Test that queued calls return tickets at once and a schedule waits for its upload."""
+        import garmin_workouts_mcp.main as main_module
+
+        # Arrange
+        mock_make_payload.return_value = {"workoutName": "Tempo Run"}
+        def connectapi(endpoint, *args, **kwargs):
+            if endpoint == "/workout-service/workout":
+                return {"workoutId": 42}
+            return {"workoutScheduleId": 7}
+        mock_connectapi.side_effect = connectapi
+
+        # Act
+        upload = main_module.upload_workout.fn({"name": "Tempo Run", "type": "running", "steps": []})
+        schedule = main_module.schedule_workout.fn(upload["ticket"], "2025-06-15")
+        repeated = main_module.schedule_workout.fn(upload["ticket"], "2025-06-15")
+        mock_connectapi.assert_not_called()
+        queue.flush()
+
+        # Assert
+        assert upload["status"] == "queued"
+        assert repeated["ticket"] == schedule["ticket"]
+        assert [call.args[0] for call in mock_connectapi.call_args_list] == [
+            "/workout-service/workout", "/workout-service/schedule/42",
+        ]
+        status = main_module.get_write_status.fn(schedule["ticket"])
+        assert status["status"] == "done"
+        assert status["result"] == {"workoutId": "42", "workoutScheduleId": "7"}
+
+    @patch('garmin_workouts_mcp.main.garth.connectapi')
+    def test_retried_upload_is_reconciled(self, mock_connectapi, queue):
+        """Test that an upload whose response was lost is not uploaded again."""
+        import sqlite3
+        from datetime import date
+        import requests
+        import garmin_workouts_mcp.main as main_module
+
+        # Arrange
+        today = date.today().isoformat()
+        steps = [{"stepOrder": 1, "type": "ExecutableStepDTO", "stepType": {"stepTypeKey": "interval"},
+                  "endCondition": {"conditionTypeKey": "time"}, "endConditionValue": 600}]
+        payload = {"workoutName": "Tempo Run", "workoutSegments": [{"workoutSteps": steps}]}
+        workouts = {
+            # Same name, other steps
+            41: {"workoutName": "Tempo Run", "workoutSegments": []},
+            # Created by another queued upload of the same workout
+            42: payload,
+            43: payload,
+        }
+        def connectapi(endpoint, *args, **kwargs):
+            if endpoint == "/workout-service/workouts":
+                return [{"workoutId": workout_id, "workoutName": "Tempo Run", "createdDate": f"{today}T07:00:00.0"}
+                        for workout_id in workouts]
+            if endpoint.startswith("/workout-service/workout/"):
+                return workouts[int(endpoint.rpartition("/")[2])]
+            if created:
+                raise requests.Timeout("Read timed out")
+            created.append(42)
+            return {"workoutId": 42}
+        created = []
+        mock_connectapi.side_effect = connectapi
+        queue.enqueue("upload_workout", payload, idempotency_key="earlier")
+        queue.flush()
+        mock_connectapi.reset_mock()
+        ticket = queue.enqueue("upload_workout", payload)["ticket"]
+
+        # Act
+        queue.flush()
+        with sqlite3.connect(queue.path) as db:
+            db.execute("UPDATE operations SET next_attempt_at = 0 WHERE status = 'queued'")
+        queue.flush()
+
+        # Assert
+        assert [call.args[0] for call in mock_connectapi.call_args_list] == [
+            "/workout-service/workout", "/workout-service/workouts",
+            "/workout-service/workout/41", "/workout-service/workout/43",
+        ]
+        assert main_module.get_write_status.fn(ticket)["result"] == {"workoutId": "43"}
+
+    def test_get_write_status_summary(self, queue):
+        """Test the summary of the queue and unknown tickets."""
+        import garmin_workouts_mcp.main as main_module
+
+        main_module.schedule_workout.fn("10", "2025-06-15")
+
+        assert main_module.get_write_status.fn()["counts"]["queued"] == 1
+        with pytest.raises(ValueError, match="Unknown ticket: wq-unknown"):
+            main_module.get_write_status.fn("wq-unknown")
+
+    def test_write_queue_disabled(self):
+        """Test that tickets and the status require the write queue."""
+        import garmin_workouts_mcp.main as main_module
+
+        with pytest.raises(ValueError, match="requires GARMIN_WRITE_QUEUE"):
+            main_module.get_write_status.fn()
+        with pytest.raises(ValueError, match="Tickets can only be scheduled with the write queue"):
+            main_module.schedule_workout.fn("wq-123", "2025-06-15")
+
+
+class TestJobs:
+    """Test cases for the start_job, job_status and cancel_job tools."""
+
+    @pytest.fixture
+    def manager(self):
+        import garmin_workouts_mcp.main as main_module
+        from garmin_workouts_mcp.jobs import JobManager
+
+        manager = JobManager()
+        with patch.object(main_module, "job_manager", manager):
+            yield manager
+
+    @patch('garmin_workouts_mcp.main.garth.connectapi')
+    def test_start_job_runs_tool(self, mock_connectapi, manager):
+        """Test that a batch tool runs as a job with progress and the tool's result."""
+        import garmin_workouts_mcp.main as main_module
+
+        # Arrange
+        mock_connectapi.side_effect = lambda endpoint, *args, **kwargs: {"endpoint": endpoint}
+
+        # Act
+        started = main_module.start_job.fn("get_activities", {"activity_ids": ["1", "2"], "include_weather": False})
+        manager.join(5)
+        status = main_module.job_status.fn(started["jobId"])
+
+        # Assert
+        assert started["status"] in ("pending", "running", "done")
+        assert status["status"] == "done"
+        assert status["progress"] == {"completed": 2, "failed": 0, "total": 2}
+        assert [entry["activityId"] for entry in status["result"]["activities"]] == ["1", "2"]
+        assert main_module.job_status.fn()["jobs"][0]["jobId"] == started["jobId"]
+        assert "result" not in main_module.job_status.fn()["jobs"][0]
+
+    @patch('garmin_workouts_mcp.main.garth.connectapi')
+    def test_training_plan_job_reports_uploaded_workouts(self, mock_connectapi, manager):
+        """Test that the workouts of a training plan job are reported as partial results."""
+        import garmin_workouts_mcp.main as main_module
+
+        # Arrange
+        def connectapi(endpoint, *args, **kwargs):
+            if endpoint == "/workout-service/workout":
+                return {"workoutId": 42}
+            return {"workoutScheduleId": 7}
+        mock_connectapi.side_effect = connectapi
+        plan = {
+            "name": "Base",
+            "startDate": "2025-06-02",
+            "weeks": 2,
+            "workouts": [{"day": "tuesday", "workout": {
+                "name": "Easy Run", "type": "running",
+                "steps": [{"stepName": "Run", "stepType": "interval", "endConditionType": "time", "stepDuration": 1800}],
+            }}],
+        }
+
+        # Act
+        job = main_module.start_job.fn("create_training_plan", {"plan": plan})
+        manager.join(5)
+        status = main_module.job_status.fn(job["jobId"], offset=1)
+
+        # Assert
+        assert status["status"] == "done"
+        assert len(status["result"]["workouts"]) == 2
+        assert len(status["partialResults"]) == 1
+        assert status["partialResults"][0]["workoutScheduleId"] == "7"
+
+    def test_cancel_job(self, manager):
+        """Test that a cancelled job stops and unknown jobs are rejected."""
+        import threading
+        import garmin_workouts_mcp.main as main_module
+
+        # Arrange
+        release = threading.Event()
+        with patch.object(main_module.JOB_TOOLS["get_calendar"], "fn", lambda year, month: release.wait(5)):
+            blocking = main_module.start_job.fn("get_calendar", {"year": 2025, "month": 6})
+            queued = [main_module.start_job.fn("get_calendar", {"year": 2025, "month": 6}) for _ in range(2)]
+
+            # Act
+            cancelled = main_module.cancel_job.fn(queued[-1]["jobId"])
+            release.set()
+            manager.join(5)
+
+        # Assert
+        assert cancelled["status"] == "cancelled"
+        assert main_module.job_status.fn(blocking["jobId"])["status"] == "done"
+        with pytest.raises(ValueError, match="Unknown job: job-unknown"):
+            main_module.cancel_job.fn("job-unknown")
+
+    def test_start_job_invalid(self, manager):
+        """Test that unsupported tools and mismatching arguments are rejected."""
+        import garmin_workouts_mcp.main as main_module
+
+        with pytest.raises(ValueError, match="Tool must be one of"):
+            main_module.start_job.fn("delete_workout", {"workout_id": "1"})
+        with pytest.raises(ValueError, match="Invalid arguments for get_activities"):
+            main_module.start_job.fn("get_activities", {"ids": ["1"]})
+        with pytest.raises(ValueError, match="Unknown job"):
+            main_module.job_status.fn("job-unknown")
+
+
+    @patch.dict('os.environ', {"GARMIN_RESPONSE_BUDGET": "1000"})
+    @patch('garmin_workouts_mcp.main.garth.connectapi')
+    def test_job_result_is_paged(self, mock_connectapi, manager):
+        """Test that the result of a job is truncated by the tool's budget and continues from the cursor."""
+        import garmin_workouts_mcp.main as main_module
+
+        # Arrange
+        activities = [{"activityId": index, "activityName": f"Run {index}"} for index in range(40)]
+        mock_connectapi.return_value = activities
+
+        # Act
+        started = main_module.start_job.fn("list_activities", {"limit": 40})
+        manager.join(5)
+        pages = [main_module.job_status.fn(started["jobId"])]
+        while "nextCursor" in pages[-1]:
+            pages.append(main_module.job_status.fn(started["jobId"], cursor=pages[-1]["nextCursor"]))
+
+        # Assert
+        assert len(pages) > 1
+        assert all(len(dumps_bytes(page)) <= 1000 for page in pages)
+        assert all(page["status"] == "done" for page in pages)
+        assert [activity for page in pages for activity in page["result"]["activities"]] == activities
+
+    def test_start_job_describes_job_tools(self):
+        """Test that the tool description lists every tool that can run as a job."""
+        import garmin_workouts_mcp.main as main_module
+
+        description = main_module.start_job.description
+        assert [tool for tool in main_module.JOB_TOOLS if f'"{tool}"' not in description] == []
+
+    @patch.dict('os.environ', {"GARMIN_MCP_TRANSPORT": "http", "GARMIN_MCP_WORKERS": "4"})
+    def test_start_job_requires_single_worker(self, manager):
+        """Test that jobs are refused when requests are spread over several worker processes."""
+        import garmin_workouts_mcp.main as main_module
+
+        with pytest.raises(ValueError, match="Jobs require a single worker process"):
+            main_module.start_job.fn("get_activities", {"activity_ids": ["1"]})
+        assert manager.list() == []
+
+class TestResponseBudget:
+    """Test cases for truncating tool results over the response size budget."""
+
+    @patch.dict('os.environ', {"GARMIN_RESPONSE_BUDGET": "1000"})
+    @patch('garmin_workouts_mcp.main.garth.connectapi')
+    def test_list_workouts_continues_with_cursor(self, mock_connectapi):
+        """Test that a truncated workout list continues from the cursor without refetching."""
+        import garmin_workouts_mcp.main as main_module
+
+        # Arrange
+        workouts = [{"workoutId": str(index), "workoutName": f"Workout {index}"} for index in range(100)]
+        mock_connectapi.return_value = workouts
+
+        # Act
+        pages = [main_module.list_workouts.fn()]
+        while "nextCursor" in pages[-1]:
+            pages.append(main_module.list_workouts.fn(cursor=pages[-1]["nextCursor"]))
+
+        # Assert
+        assert len(pages) > 1
+        assert all(len(dumps_bytes(page)) <= 1000 for page in pages)
+        assert [workout for page in pages for workout in page["workouts"]] == workouts
+        assert pages[0]["truncated"]["total"] == 100
+        mock_connectapi.assert_called_once()
+
+    @patch.dict('os.environ', {"GARMIN_RESPONSE_BUDGET_GET_CALENDAR": "600"})
+    @patch('garmin_workouts_mcp.main.garth.connectapi')
+    def test_get_calendar_truncates_items(self, mock_connectapi):
+        """Test that calendar items are truncated by the tool's own budget."""
+        import garmin_workouts_mcp.main as main_module
+
+        # Arrange
+        items = [{"id": index, "itemType": "activity", "title": f"Run {index}"} for index in range(30)]
+        mock_connectapi.return_value = {"year": 2025, "month": 5, "calendarItems": items}
+
+        # Act
+        result = main_module.get_calendar.fn(2025, 6)
+
+        # Assert
+        assert result["view_type"] == "month"
+        assert result["calendar"]["calendarItems"] == items[:result["truncated"]["returned"]]
+        assert "nextCursor" in result
+        with pytest.raises(ValueError, match="Cursor is invalid or has expired"):
+            main_module.get_calendar.fn(2025, 6, cursor="unknown.1")
+
+
+class TestWorkoutLibrary:
+    """Test cases for the export_workouts and import_workouts tools."""
+
+    WORKOUT = {
+        "name": "Easy Run",
+        "type": "running",
+        "steps": [{"stepType": "interval", "stepDuration": 1800}],
+    }
+
+    @pytest.fixture(autouse=True)
+    def export_dir(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("GARMIN_EXPORT_DIR", str(tmp_path))
+        return tmp_path
+
+    def library(self, workouts):
+        """Simulate a workout library on Garmin Connect, assigning IDs to created workouts."""
+        workouts = dict(workouts)
+
+        def connectapi(endpoint, method="GET", **kwargs):
+            if endpoint == "/workout-service/workouts":
+                return [{"workoutId": workout_id, "workoutName": workout["workoutName"]}
+                        for workout_id, workout in workouts.items()]
+            if method == "POST":
+                workout_id = str(1000 + len(workouts))
+                workouts[workout_id] = {**loads(kwargs["data"]), "workoutId": workout_id}
+                return {"workoutId": workout_id}
+            return workouts[endpoint.rsplit("/", 1)[1]]
+        return workouts, connectapi
+
+    @patch('garmin_workouts_mcp.main.garth.connectapi')
+    def test_export_workouts(self, mock_connectapi, export_dir):
+        """Test that all workouts are written to the file, optionally in the compact format."""
+        import garmin_workouts_mcp.main as main_module
+        from garmin_workouts_mcp.garmin_workout import make_payload
+
+        # Arrange
+        payload = make_payload(self.WORKOUT)
+        _, mock_connectapi.side_effect = self.library({
+            "1": {**payload, "workoutId": "1"},
+            "2": {**payload, "workoutName": "Long Run", "workoutId": "2"},
+        })
+
+        # Act
+        result = main_module.export_workouts.fn("backup.jsonl")
+        compact = main_module.export_workouts.fn("compact.jsonl", compact=True)
+
+        # Assert
+        assert result == {"path": str(export_dir / "backup.jsonl"), "exported": 2, "total": 2, "errors": []}
+        lines = (export_dir / "backup.jsonl").read_text().splitlines()
+        assert [loads(line)["workoutId"] for line in lines] == ["1", "2"]
+        assert compact["exported"] == 2
+        assert loads((export_dir / "compact.jsonl").read_text().splitlines()[0])["steps"] == [
+            {"stepType": "interval", "endConditionType": "time", "stepDuration": 1800}
+        ]
+
+    LAP_WORKOUT = {
+        "name": "Base Run",
+        "type": "running",
+        "steps": [
+            {"stepType": "warmup", "endConditionType": "lap.button", "target": {"type": "heart rate", "zone": 1}},
+            {"stepType": "interval", "endConditionType": "time", "stepDuration": 1800,
+             "target": {"type": "heart rate", "zone": 2}},
+        ],
+    }
+
+    @patch('garmin_workouts_mcp.main.garth.connectapi')
+    def test_export_and_import_round_trip(self, mock_connectapi, export_dir):
+        """Test that an exported library is imported into another account without losing details."""
+        import garmin_workouts_mcp.main as main_module
+        from garmin_workouts_mcp.garmin_workout import make_payload, make_workout_data
+
+        # Arrange
+        source = {**make_payload(self.LAP_WORKOUT), "workoutId": "1", "ownerId": 5, "description": "Zone 2 base"}
+        for step_id, step in enumerate(source["workoutSegments"][0]["workoutSteps"], 100):
+            step["stepId"] = step_id
+        _, mock_connectapi.side_effect = self.library({"1": source})
+        main_module.export_workouts.fn()
+        main_module.export_workouts.fn("compact.jsonl", compact=True)
+        target, mock_connectapi.side_effect = self.library({})
+
+        # Act
+        result = main_module.import_workouts.fn()
+        compact = main_module.import_workouts.fn("compact.jsonl", skip_duplicates=False)
+
+        # Assert
+        assert result == {
+            "workouts": [{"line": 1, "workoutName": "Base Run", "workoutId": "1000"}],
+            "imported": 1,
+            "skipped": 0,
+        }
+        imported = target["1000"]
+        steps = imported["workoutSegments"][0]["workoutSteps"]
+        assert "ownerId" not in imported
+        assert imported["description"] == "Zone 2 base"
+        assert not any("stepId" in step for step in steps)
+        assert steps == [{key: value for key, value in step.items() if key != "stepId"}
+                         for step in source["workoutSegments"][0]["workoutSteps"]]
+        assert compact["imported"] == 1
+        assert make_workout_data(target["1001"]) == make_workout_data(imported) == self.LAP_WORKOUT
+
+    @patch('garmin_workouts_mcp.main.garth.connectapi')
+    def test_export_keeps_previous_file_on_timeout(self, mock_connectapi, export_dir):
+        """Test that an export running out of time keeps the previous file and returns the partial one."""
+        import garmin_workouts_mcp.main as main_module
+        from garmin_workouts_mcp.deadlines import DeadlineExceeded
+        from garmin_workouts_mcp.garmin_workout import make_payload
+
+        # Arrange
+        (export_dir / "workouts.jsonl").write_text("previous\n")
+        workouts, connectapi = self.library({
+            "1": {**make_payload(self.WORKOUT), "workoutId": "1"},
+            "2": {**make_payload(self.WORKOUT), "workoutId": "2"},
+        })
+        def timing_out(endpoint, *args, **kwargs):
+            if endpoint.endswith("/2"):
+                raise DeadlineExceeded("Tool call timed out")
+            return connectapi(endpoint, *args, **kwargs)
+        mock_connectapi.side_effect = timing_out
+
+        # Act
+        result = main_module.export_workouts.fn()
+
+        # Assert
+        assert result["incomplete"] is True
+        assert result["path"] == str(export_dir / "workouts.jsonl.part")
+        assert (export_dir / "workouts.jsonl").read_text() == "previous\n"
+        assert [loads(line)["workoutId"] for line in (export_dir / "workouts.jsonl.part").read_text().splitlines()] == ["1"]
+
+    def test_library_paths_stay_in_export_dir(self, export_dir, tmp_path_factory):
+        """Test that absolute paths and paths leading outside the export directory are rejected."""
+        import garmin_workouts_mcp.main as main_module
+
+        outside = tmp_path_factory.mktemp("outside")
+        (export_dir / "link").symlink_to(outside, target_is_directory=True)
+
+        for path in (str(outside / "workouts.jsonl"), "../workouts.jsonl", "backups/../../workouts.jsonl",
+                     "link/workouts.jsonl"):
+            with pytest.raises(ValueError, match="Path must be"):
+                main_module.export_workouts.fn(path)
+        with pytest.raises(ValueError, match="Path must be"):
+            main_module.import_workouts.fn("../workouts.jsonl")
+        assert list(outside.iterdir()) == []
+
+    def test_library_paths_reject_athlete_outside_export_dir(self, export_dir, monkeypatch):
+        """Test that an athlete name cannot lead outside the export directory."""
+        import garmin_workouts_mcp.main as main_module
+
+        monkeypatch.setenv("GARMIN_EXPORT_DIR", str(export_dir / "exports"))
+        (export_dir / "secret.jsonl").write_text(dumps(self.WORKOUT) + "\n")
+
+        with pytest.raises(ValueError, match="Invalid athlete name: .."):
+            main_module.import_workouts.fn("secret.jsonl", athlete="..", dry_run=True, skip_duplicates=False)
+        # Even if the athlete was selected without validation
+        with patch.object(main_module, "current_athlete", return_value=".."):
+            with pytest.raises(ValueError, match="Path must be inside the export directory"):
+                main_module.import_workouts.fn("secret.jsonl", dry_run=True, skip_duplicates=False)
+
+    @patch('garmin_workouts_mcp.main.garth.connectapi')
+    def test_import_workouts_skips_duplicates(self, mock_connectapi, export_dir):
+        """Test that existing workouts and repeated lines are skipped, and changed workouts uploaded."""
+        import garmin_workouts_mcp.main as main_module
+        from garmin_workouts_mcp.garmin_workout import make_payload
+
+        # Arrange
+        changed = {**self.WORKOUT, "steps": [{"stepType": "interval", "stepDuration": 2400}]}
+        (export_dir / "workouts.jsonl").write_text("\n".join(dumps(workout) for workout in (
+            self.WORKOUT, changed, changed)) + "\n")
+        target, mock_connectapi.side_effect = self.library({"7": {**make_payload(self.WORKOUT), "workoutId": "7"}})
+
+        # Act
+        dry_run = main_module.import_workouts.fn(dry_run=True)
+        result = main_module.import_workouts.fn()
+
+        # Assert
+        assert dry_run["skipped"] == 2
+        assert "workoutId" not in dry_run["workouts"][1]
+        assert result["workouts"] == [
+            {"line": 1, "workoutName": "Easy Run", "skipped": "existing", "workoutId": "7"},
+            {"line": 2, "workoutName": "Easy Run", "workoutId": "1001"},
+            {"line": 3, "workoutName": "Easy Run", "skipped": "duplicate"},
+        ]
+        assert (result["imported"], result["skipped"]) == (1, 2)
+        assert len(target) == 2
+
+    @patch('garmin_workouts_mcp.main.garth.connectapi')
+    def test_import_workouts_invalid_file(self, mock_connectapi, export_dir):
+        """Test that invalid workouts are reported with their line before anything is uploaded."""
+        import garmin_workouts_mcp.main as main_module
+
+        # Arrange
+        (export_dir / "workouts.jsonl").write_text(dumps(self.WORKOUT) + "\n" + dumps({"name": "Broken"}) + "\n")
+
+        # Act & Assert
+        with pytest.raises(ValueError, match="line 2 Broken: Missing steps for workout"):
+            main_module.import_workouts.fn()
+        mock_connectapi.assert_not_called()
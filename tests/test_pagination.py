@@ -0,0 +1,138 @@
+import time
+
+import pytest
+from garmin_workouts_mcp.cache import ResponseCache
+from garmin_workouts_mcp.pagination import ResultPager, create_result_pager, paged, response_budget
+from garmin_workouts_mcp.serialization import dumps_bytes
+from garmin_workouts_mcp.sessions import use_athlete
+
+
+def make_workouts(count):
+    return {"workouts": [{"workoutId": str(index), "workoutName": f"Workout {index}"} for index in range(count)]}
+
+def read_all(pager, first, budget, scope=""):
+    pages = [first]
+    while "nextCursor" in pages[-1]:
+        pages.append(pager.resume(pages[-1]["nextCursor"], budget, scope))
+    return pages
+
+def test_result_under_budget_is_unchanged():
+    pager = ResultPager()
+    result = make_workouts(3)
+
+    assert pager.page(result, ("workouts",), 10_000) is result
+    assert pager.page(result, ("workouts",), None) is result
+    assert len(pager.results) == 0
+
+def test_list_is_split_into_pages_within_budget():
+    pager = ResultPager()
+    result = make_workouts(50)
+
+    pages = read_all(pager, pager.page(result, ("workouts",), 500), 500)
+
+    assert len(pages) > 1
+    assert all(len(dumps_bytes(page)) <= 500 for page in pages)
+    assert [workout for page in pages for workout in page["workouts"]] == result["workouts"]
+    assert pages[0]["truncated"] == {"returned": len(pages[0]["workouts"]), "offset": 0, "total": 50}
+    assert "nextCursor" not in pages[-1]
+
+def test_nested_path_keeps_other_fields():
+    pager = ResultPager()
+    result = {"calendar": {"year": 2024, "calendarItems": list(range(200))}, "view_type": "month"}
+
+    first = pager.page(result, ("calendar", "calendarItems"), 300)
+
+    assert first["view_type"] == "month"
+    assert first["calendar"]["year"] == 2024
+    assert first["calendar"]["calendarItems"] == list(range(len(first["calendar"]["calendarItems"])))
+    # The complete result is not modified
+    assert len(result["calendar"]["calendarItems"]) == 200
+
+def test_dict_is_split_at_field_boundaries():
+    pager = ResultPager()
+    result = {f"field{index}": "x" * 50 for index in range(20)}
+
+    pages = read_all(pager, pager.page(result, (), 400), 400)
+
+    assert len(pages) > 1
+    merged = {}
+    for page in pages:
+        merged.update({key: value for key, value in page.items() if key not in ("nextCursor", "truncated")})
+    assert merged == result
+
+def test_oversized_item_is_returned_alone():
+    pager = ResultPager()
+    result = {"workouts": ["x" * 1000, "y"]}
+
+    first = pager.page(result, ("workouts",), 200)
+
+    assert first["workouts"] == ["x" * 1000]
+    assert pager.resume(first["nextCursor"], 200)["workouts"] == ["y"]
+
+def test_invalid_and_expired_cursors_are_rejected():
+    pager = ResultPager(ttl=0.05)
+    cursor = pager.page(make_workouts(50), ("workouts",), 500)["nextCursor"]
+
+    with pytest.raises(ValueError, match="invalid or has expired"):
+        pager.resume("unknown.1", 500)
+    with pytest.raises(ValueError, match="invalid or has expired"):
+        pager.resume(cursor.rpartition(".")[0] + ".x", 500)
+
+    time.sleep(0.1)
+    with pytest.raises(ValueError, match="invalid or has expired"):
+        pager.resume(cursor, 500)
+
+def test_cursors_are_scoped():
+    pager = ResultPager()
+    cursor = pager.page(make_workouts(50), ("workouts",), 500, scope="alice")["nextCursor"]
+
+    assert pager.resume(cursor, 500, scope="alice")["workouts"]
+    with pytest.raises(ValueError):
+        pager.resume(cursor, 500, scope="bob")
+
+def test_cursors_are_shared_through_directory(tmp_path):
+    result = {"days": {f"day{index}": "x" * 50 for index in range(20)}}
+    first = ResultPager(directory=str(tmp_path)).page(result, ("days",), 400)
+
+    # Another worker process continues the cursor
+    pages = read_all(ResultPager(directory=str(tmp_path)), first, 400)
+
+    assert len(pages) > 1
+    assert {key: value for page in pages for key, value in page["days"].items()} == result["days"]
+
+def test_create_result_pager(monkeypatch, tmp_path):
+    monkeypatch.delenv("GARMIN_CACHE_DIR", raising=False)
+    assert isinstance(create_result_pager().results, ResponseCache)
+
+    monkeypatch.setenv("GARMIN_CACHE_DIR", str(tmp_path))
+    assert create_result_pager().results.directory == str(tmp_path / "cursors")
+
+def test_paged_decorator_adds_cursor_argument(monkeypatch):
+    calls = []
+
+    @paged("workouts")
+    def list_workouts(count: int) -> dict:
+        calls.append(count)
+        return make_workouts(count)
+
+    monkeypatch.setenv("GARMIN_RESPONSE_BUDGET", "500")
+    with use_athlete("alice"):
+        first = list_workouts(50)
+        second = list_workouts(50, cursor=first["nextCursor"])
+
+    assert calls == [50]
+    assert second["truncated"]["offset"] == len(first["workouts"])
+    with pytest.raises(ValueError):
+        list_workouts(50, cursor=first["nextCursor"])
+
+def test_response_budget(monkeypatch):
+    monkeypatch.delenv("GARMIN_RESPONSE_BUDGET", raising=False)
+    monkeypatch.delenv("GARMIN_RESPONSE_BUDGET_GET_CALENDAR", raising=False)
+    assert response_budget("get_calendar") is None
+
+    monkeypatch.setenv("GARMIN_RESPONSE_BUDGET", "20000")
+    assert response_budget("get_calendar") == 20000
+    monkeypatch.setenv("GARMIN_RESPONSE_BUDGET_GET_CALENDAR", "50000")
+    assert response_budget("get_calendar") == 50000
+    monkeypatch.setenv("GARMIN_RESPONSE_BUDGET_GET_CALENDAR", "0")
+    assert response_budget("get_calendar") is None
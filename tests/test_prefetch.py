@@ -0,0 +1,93 @@
+import threading
+
+from garmin_workouts_mcp.cache import ResponseCache
+from garmin_workouts_mcp.deadlines import remaining, use_deadline
+from garmin_workouts_mcp.prefetch import Prefetcher, prefetch_enabled
+from garmin_workouts_mcp.sessions import current_athlete, use_athlete
+
+
+def test_prefetcher_fetches_into_cache():
+    cache = ResponseCache(ttl=60)
+    prefetcher = Prefetcher(cache)
+
+    future = prefetcher.submit("key", lambda: {"value": 1})
+    future.result()
+
+    assert cache.get("key") == {"value": 1}
+    assert prefetcher.submit("key", lambda: {"value": 2}) is None
+
+def test_prefetcher_deduplicates_in_flight_fetches():
+    cache = ResponseCache(ttl=60)
+    prefetcher = Prefetcher(cache)
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return {"value": 1}
+
+    assert prefetcher.submit_all([("key", fetch), ("key", fetch)]) == 1
+    started.wait(5)
+    release.set()
+
+    assert prefetcher.wait("key") == {"value": 1}
+    assert calls == [1]
+
+def test_prefetcher_wait_ignores_failures():
+    prefetcher = Prefetcher(ResponseCache(ttl=60))
+
+    def fetch():
+        raise Exception("Too many requests")
+
+    prefetcher.submit("key", fetch)
+
+    assert prefetcher.wait("key") is None
+    assert prefetcher.wait("unknown") is None
+
+def test_prefetcher_wait_cancels_queued_fetches():
+    prefetcher = Prefetcher(ResponseCache(ttl=60), max_workers=1)
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def block():
+        started.set()
+        release.wait(5)
+        return {"value": 1}
+
+    prefetcher.submit("running", block)
+    queued = prefetcher.submit("queued", lambda: calls.append(1) or {"value": 2})
+    started.wait(5)
+
+    # The caller fetches a queued key itself instead of waiting behind the running fetch
+    assert prefetcher.wait("queued") is None
+    assert queued.cancelled()
+    # A running fetch is only waited for until the timeout
+    assert prefetcher.wait("running", timeout=0.01) is None
+    release.set()
+    assert prefetcher.wait("running") == {"value": 1}
+    assert calls == []
+    assert prefetcher.submit("queued", lambda: {"value": 2}) is not None
+
+def test_prefetcher_runs_without_caller_deadline():
+    prefetcher = Prefetcher(ResponseCache(ttl=60))
+
+    with use_deadline(0.001):
+        future = prefetcher.submit("key", remaining)
+
+    assert future.result(5) is None
+
+def test_prefetcher_keeps_selected_athlete():
+    prefetcher = Prefetcher(ResponseCache(ttl=60))
+
+    with use_athlete("alice"):
+        future = prefetcher.submit("key", current_athlete)
+
+    assert future.result() == "alice"
+
+def test_prefetch_enabled(monkeypatch):
+    monkeypatch.delenv("GARMIN_PREFETCH", raising=False)
+    assert not prefetch_enabled()
+    monkeypatch.setenv("GARMIN_PREFETCH", "true")
+    assert prefetch_enabled()
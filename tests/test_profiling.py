@@ -0,0 +1,66 @@
+import os
+import pstats
+
+import pytest
+from fastmcp import Client
+
+from garmin_workouts_mcp.garmin_workout import make_payload
+from garmin_workouts_mcp.profiling import profile_call, should_profile
+
+
+WORKOUT_DATA = {"name": "Easy Run", "type": "running", "steps": [{"stepType": "interval", "stepDuration": 1800}]}
+
+def test_should_profile(monkeypatch, tmp_path):
+    monkeypatch.delenv("GARMIN_PROFILE_TOOLS", raising=False)
+    monkeypatch.delenv("GARMIN_PROFILE_SAMPLE_RATE", raising=False)
+    monkeypatch.delenv("GARMIN_PROFILE_DIR", raising=False)
+    assert not should_profile("upload_workout")
+
+    monkeypatch.setenv("GARMIN_PROFILE_DIR", str(tmp_path))
+    assert should_profile("upload_workout")
+
+    monkeypatch.setenv("GARMIN_PROFILE_TOOLS", "upload_workout, sync_plan")
+    assert should_profile("sync_plan")
+    assert not should_profile("get_activity")
+
+    monkeypatch.setenv("GARMIN_PROFILE_SAMPLE_RATE", "1")
+    assert should_profile("get_activity")
+
+def test_profile_call_writes_stats_and_allocations(tmp_path):
+    with profile_call("upload_workout", str(tmp_path), top=5):
+        for _ in range(10):
+            make_payload(WORKOUT_DATA)
+
+    names = sorted(os.listdir(tmp_path))
+    assert len(names) == 2
+    allocations, stats = names
+    assert stats.startswith("upload_workout-") and stats.endswith(".pstats")
+    assert allocations == stats[:-len(".pstats")] + ".allocations.txt"
+
+    functions = {function for _, _, function in pstats.Stats(str(tmp_path / stats)).stats}
+    assert "make_payload" in functions
+    with open(tmp_path / allocations) as f:
+        lines = f.read().splitlines()
+    assert lines[0].startswith("Peak traced memory:")
+    assert 1 < len(lines) <= 7
+
+def test_nested_profile_call_is_skipped(tmp_path):
+    with profile_call("outer", str(tmp_path)):
+        with profile_call("inner", str(tmp_path)):
+            pass
+
+    assert all(name.startswith("outer-") for name in os.listdir(tmp_path))
+
+@pytest.mark.asyncio
+async def test_tool_calls_are_profiled(monkeypatch, tmp_path):
+    from garmin_workouts_mcp.main import mcp
+
+    monkeypatch.setenv("GARMIN_PROFILE_DIR", str(tmp_path))
+    monkeypatch.setenv("GARMIN_PROFILE_TOOLS", "validate_workout")
+    monkeypatch.setenv("GARMIN_PROFILE_SAMPLE_RATE", "0")
+
+    async with Client(mcp) as client:
+        await client.call_tool("validate_workout", {"workout_data": WORKOUT_DATA})
+        await client.call_tool("generate_workout_data_prompt", {"description": "Easy run"})
+
+    assert sorted(name.split("-")[0] for name in os.listdir(tmp_path)) == ["validate_workout", "validate_workout"]
@@ -0,0 +1,138 @@
+import threading
+import time
+
+import pytest
+import requests
+
+from garmin_workouts_mcp.resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    LatencyTracker,
+    ResilientGetter,
+    endpoint_group,
+    is_degraded,
+)
+from garmin_workouts_mcp.sessions import current_athlete, use_athlete
+
+
+def server_error(status=503):
+    response = requests.Response()
+    response.status_code = status
+    return requests.HTTPError(f"{status} Server Error", response=response)
+
+def test_endpoint_group_replaces_ids():
+    assert endpoint_group("/activity-service/activity/123") == "/activity-service/activity/{id}"
+    assert endpoint_group("/calendar-service/year/2025/month/5") == "/calendar-service/year/{id}/month/{id}"
+    assert endpoint_group("/workout-service/workouts?start=0") == "/workout-service/workouts"
+
+def test_is_degraded():
+    assert is_degraded(requests.ConnectionError())
+    assert is_degraded(requests.Timeout())
+    assert is_degraded(server_error(503))
+    assert is_degraded(server_error(429))
+    assert not is_degraded(server_error(404))
+    assert not is_degraded(ValueError("bad"))
+
+def test_latency_tracker_p95():
+    tracker = LatencyTracker(min_samples=20)
+    for i in range(19):
+        tracker.record("group", i / 100)
+    assert tracker.p95("group") is None
+
+    for i in range(19, 100):
+        tracker.record("group", i / 100)
+    assert tracker.p95("group") == 0.95
+
+def test_circuit_breaker_opens_and_half_opens():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert not breaker.allow()
+
+    time.sleep(0.06)
+    assert breaker.allow()
+    # Only a single trial request is let through
+    assert not breaker.allow()
+
+    breaker.record_failure()
+    assert not breaker.allow()
+
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.allow()
+    assert breaker.allow()
+
+def test_getter_without_options_sends_request():
+    getter = ResilientGetter()
+    assert getter.get("/activity-service/activity/1", "key", lambda: {"activityId": 1}) == {"activityId": 1}
+
+    with pytest.raises(requests.HTTPError):
+        getter.get("/activity-service/activity/1", "key", lambda: (_ for _ in ()).throw(server_error()))
+
+def test_getter_serves_stale_response_while_degraded():
+    getter = ResilientGetter(breaker=True, failure_threshold=2, reset_timeout=60)
+    endpoint = "/activity-service/activity/1"
+    calls = []
+
+    def failing():
+        calls.append(1)
+        raise server_error()
+
+    assert getter.get(endpoint, "key", lambda: {"activityId": 1}) == {"activityId": 1}
+
+    assert getter.get(endpoint, "key", failing) == {"activityId": 1}
+    assert getter.get(endpoint, "key", failing) == {"activityId": 1}
+    assert len(calls) == 2
+
+    # The circuit is open: no request is sent
+    assert getter.get(endpoint, "key", failing) == {"activityId": 1}
+    assert len(calls) == 2
+
+    # Other activities share the circuit but have no stale response
+    with pytest.raises(CircuitOpenError):
+        getter.get("/activity-service/activity/2", "other", failing)
+    assert len(calls) == 2
+
+def test_getter_ignores_client_errors():
+    getter = ResilientGetter(breaker=True, failure_threshold=1)
+
+    for _ in range(3):
+        with pytest.raises(requests.HTTPError):
+            getter.get("/activity-service/activity/1", "key", lambda: (_ for _ in ()).throw(server_error(404)))
+
+    assert getter.circuit("/activity-service/activity/{id}").allow()
+
+def test_getter_hedges_slow_requests():
+    getter = ResilientGetter(hedging=True)
+    group = "/activity-service/activity/{id}"
+    for _ in range(20):
+        getter.latency.record(group, 0.01)
+
+    release = threading.Event()
+    athletes = []
+
+    def fetch():
+        athletes.append(current_athlete())
+        if len(athletes) == 1:
+            # The first attempt stalls until the hedge has answered
+            release.wait(5)
+            return {"attempt": 1}
+        return {"attempt": 2}
+
+    with use_athlete("alice"):
+        result = getter.get("/activity-service/activity/1", "key", fetch)
+    release.set()
+
+    assert result == {"attempt": 2}
+    assert getter.hedges == 1
+    assert athletes == ["alice", "alice"]
+
+def test_getter_does_not_hedge_fast_requests():
+    getter = ResilientGetter(hedging=True)
+    for _ in range(20):
+        getter.latency.record("/workout-service/workouts", 1)
+
+    assert getter.get("/workout-service/workouts", "key", lambda: [1]) == [1]
+    assert getter.hedges == 0
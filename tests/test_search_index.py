@@ -0,0 +1,97 @@
+import time
+
+from garmin_workouts_mcp.search_index import SearchIndex, SearchIndexPool, activity_document, tokenize, workout_document
+
+
+ACTIVITIES = [
+    {"activityId": 1, "activityName": "Tempo Run 10km", "activityType": {"typeKey": "running"},
+     "startTimeLocal": "2024-05-01 07:00:00"},
+    {"activityId": 2, "activityName": "Easy Run", "description": "Recovery after tempo day",
+     "activityType": {"typeKey": "running"}, "startTimeLocal": "2024-05-02 07:00:00"},
+    {"activityId": 3, "activityName": "Tempo Ride", "activityType": {"typeKey": "road_biking"},
+     "startTimeLocal": "2024-05-03 07:00:00"},
+]
+
+WORKOUTS = [
+    {"workoutId": 10, "workoutName": "Tempo Intervals", "sportType": {"sportTypeKey": "running"},
+     "updatedDate": "2024-04-01T10:00:00.0"},
+]
+
+def make_index():
+    index = SearchIndex()
+    assert index.add_activities(ACTIVITIES) == 3
+    assert index.add_workouts(WORKOUTS) == 1
+    return index
+
+def test_tokenize():
+    assert tokenize("Lauf über 10km_Tempo!") == ["lauf", "uber", "10km", "tempo"]
+    assert tokenize(None) == []
+
+def test_documents():
+    assert activity_document({"activityId": 5, "activityName": "Run", "activityTypeDTO": {"typeKey": "running"},
+                              "summaryDTO": {"startTimeLocal": "2024-05-01T07:00:00.0"}}) == {
+        "id": "5", "name": "Run", "type": "running", "description": None, "date": "2024-05-01T07:00:00.0",
+    }
+    assert workout_document({"workoutName": "No ID"}) is None
+
+def test_search_ranks_names_before_descriptions_and_newest_first():
+    index = make_index()
+
+    results = index.search("tempo")
+
+    assert [(result["kind"], result["id"]) for result in results] == [
+        ("activity", "3"), ("activity", "1"), ("workout", "10"), ("activity", "2"),
+    ]
+    assert results[0]["score"] == 3.0
+    assert results[-1]["score"] == 1.0
+
+def test_search_matches_prefixes_and_all_tokens():
+    index = make_index()
+
+    assert [result["id"] for result in index.search("tem 10")] == ["1"]
+    assert index.search("tempo swim") == []
+    assert index.search("") == []
+
+def test_search_filters_kind_and_type():
+    index = make_index()
+
+    assert [result["id"] for result in index.search("tempo", kind="workout")] == ["10"]
+    assert [result["id"] for result in index.search("tempo", activity_type="road_biking")] == ["3"]
+    assert len(index.search("tempo", limit=2)) == 2
+
+def test_add_replaces_and_remove_unindexes():
+    index = make_index()
+
+    assert not index.add_activities(ACTIVITIES[:1])
+    assert index.add_activities([{**ACTIVITIES[0], "activityName": "Long Run"}]) == 1
+    assert [result["id"] for result in index.search("tempo", kind="activity")] == ["3", "2"]
+    assert [result["id"] for result in index.search("long")] == ["1"]
+
+    index.remove("workout", 10)
+    assert index.search("intervals") == []
+    assert index.counts() == {"activity": 3, "workout": 0}
+
+def test_search_is_fast_on_large_index():
+    index = SearchIndex()
+    index.add_activities({"activityId": i, "activityName": f"Run {i % 50} tempo {i % 7}",
+                          "activityType": {"typeKey": "running"}, "startTimeLocal": f"2024-01-01 {i:06d}"}
+                         for i in range(5000))
+
+    start = time.perf_counter()
+    results = index.search("run 4", limit=10)
+    elapsed = time.perf_counter() - start
+
+    assert len(results) == 10
+    assert elapsed < 0.1
+
+def test_index_pool_evicts_least_recently_used():
+    pool = SearchIndexPool(2)
+    alice = pool.get("alice")
+    pool.get(None)
+    assert pool.get("alice") is alice
+
+    pool.get("bob")
+
+    assert len(pool) == 2
+    assert "alice" in pool and "bob" in pool
+    assert None not in pool
@@ -0,0 +1,47 @@
+import pytest
+from garmin_workouts_mcp import serialization
+
+
+DATA = {"activities": [{"activityId": 1, "activityName": "Lauf über den Berg", "distance": 10000.5, "tags": None}]}
+
+def test_dumps_and_loads_roundtrip():
+    encoded = serialization.dumps(DATA)
+    assert isinstance(encoded, str)
+    assert serialization.loads(encoded) == DATA
+    assert serialization.loads(serialization.dumps_bytes(DATA)) == DATA
+    assert serialization.loads(memoryview(serialization.dumps_bytes(DATA))) == DATA
+
+@pytest.mark.parametrize("backend", ["orjson", "json"])
+def test_backends_produce_compact_json(backend, monkeypatch):
+    if backend == "json":
+        monkeypatch.setattr(serialization, "orjson", None)
+    elif serialization.orjson is None:
+        pytest.skip("orjson is not installed")
+
+    encoded = serialization.dumps_bytes({"a": [1, 2], "b": "ü"})
+
+    assert encoded == '{"a":[1,2],"b":"ü"}'.encode()
+    assert serialization.loads(memoryview(encoded)) == {"a": [1, 2], "b": "ü"}
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 64 * 1024])
+def test_iter_json_array_parses_chunks(chunk_size):
+    items = [{"activityId": i, "activityName": f"Lauf {i} über den Berg"} for i in range(20)] + [1, 2.5e-3, None, "x", 12345]
+    document = serialization.dumps_bytes(items)
+    chunks = (document[i:i + chunk_size] for i in range(0, len(document), chunk_size))
+
+    assert list(serialization.iter_json_array(chunks)) == items
+
+def test_iter_json_array_is_lazy():
+    def chunks():
+        yield b'[{"activityId": 1}, {"activityId": 2}'
+        raise AssertionError("read beyond the first element")
+
+    assert next(serialization.iter_json_array(chunks())) == {"activityId": 1}
+
+def test_iter_json_array_empty_and_invalid():
+    assert list(serialization.iter_json_array([])) == []
+    assert list(serialization.iter_json_array([b" [ ] "])) == []
+
+    for document in [b'{"activities": []}', b"[1,", b"[1 2]", b'[{"a":']:
+        with pytest.raises(ValueError):
+            list(serialization.iter_json_array([document]))
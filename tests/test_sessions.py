@@ -0,0 +1,109 @@
+import threading
+import time
+
+import pytest
+from unittest.mock import MagicMock, patch
+
+from garmin_workouts_mcp.concurrency import run_concurrently
+from garmin_workouts_mcp.deadlines import DeadlineExceeded, use_deadline
+from garmin_workouts_mcp.sessions import (
+    Session,
+    SessionPool,
+    cache_key,
+    connectapi,
+    current_athlete,
+    open_stream,
+    use_athlete,
+)
+
+
+@pytest.fixture
+def athletes(tmp_path):
+    for name in ("alice", "bob", "carol"):
+        (tmp_path / name).mkdir()
+    return tmp_path
+
+
+def test_session_pool_loads_tokens_lazily(athletes):
+    factory = MagicMock()
+    pool = SessionPool(str(athletes), client_factory=factory)
+
+    assert len(pool) == 0
+    session = pool.get("alice")
+
+    factory.return_value.load.assert_called_once_with(str(athletes / "alice"))
+    assert session.client is factory.return_value
+    assert pool.get("alice") is session
+    assert factory.call_count == 1
+
+def test_session_pool_evicts_least_recently_used(athletes):
+    pool = SessionPool(str(athletes), max_sessions=2, client_factory=MagicMock)
+
+    pool.get("alice")
+    pool.get("bob")
+    pool.get("alice")
+    pool.get("carol")
+
+    assert "alice" in pool
+    assert "bob" not in pool
+    assert "carol" in pool
+
+def test_session_pool_rejects_unknown_athletes(athletes):
+    pool = SessionPool(str(athletes), client_factory=MagicMock)
+
+    with pytest.raises(ValueError, match="Unknown athlete: dave"):
+        pool.get("dave")
+    with pytest.raises(ValueError, match="Invalid athlete name: ../alice"):
+        pool.get("../alice")
+    with pytest.raises(ValueError, match="requires GARMIN_ATHLETES_DIR"):
+        SessionPool(None).get("alice")
+
+def test_use_athlete_rejects_invalid_names():
+    for athlete in ("..", "../alice", "alice/bob", "/etc"):
+        with pytest.raises(ValueError, match="Invalid athlete name"):
+            with use_athlete(athlete):
+                pass
+    assert current_athlete() is None
+
+@patch('garmin_workouts_mcp.sessions.garth.connectapi')
+def test_connectapi_uses_selected_athlete(mock_connectapi, athletes):
+    pool = SessionPool(str(athletes), client_factory=MagicMock)
+
+    with patch('garmin_workouts_mcp.sessions.session_pool', pool):
+        connectapi("/default")
+        with use_athlete("alice"):
+            connectapi("/alice", "GET", params={"limit": 1})
+            assert cache_key("/alice") == "alice:/alice"
+        assert current_athlete() is None
+
+    mock_connectapi.assert_called_once_with("/default")
+    pool.get("alice").client.connectapi.assert_called_once_with("/alice", "GET", params={"limit": 1})
+    assert cache_key("/default") == "/default"
+
+def test_run_concurrently_keeps_selected_athlete():
+    with use_athlete("alice"):
+        results = run_concurrently(lambda item: current_athlete(), range(3))
+
+    assert results == [("alice", None)] * 3
+
+def test_open_stream_closes_late_response_and_holds_slot():
+    session = Session(MagicMock(), 1)
+    release = threading.Event()
+    response = MagicMock()
+    session.client.get.side_effect = lambda *args, **kwargs: release.wait(5) and response
+
+    with patch('garmin_workouts_mcp.sessions.default_session', session):
+        with use_deadline(0.05):
+            with pytest.raises(DeadlineExceeded):
+                with open_stream("/activities"):
+                    pass
+
+        # The abandoned request still occupies the slot until its response arrives
+        assert not session.semaphore.acquire(blocking=False)
+        release.set()
+        deadline = time.monotonic() + 5
+        while not response.close.called and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    response.close.assert_called_once()
+    assert session.semaphore.acquire(timeout=1)
@@ -0,0 +1,123 @@
+import multiprocessing
+import os
+import threading
+import time
+
+import garth
+import pytest
+from garth.auth_tokens import OAuth1Token, OAuth2Token
+from garmin_workouts_mcp.token_store import TokenStore, token_lock_timeout
+
+
+def make_client(access_token="access", expires_in=3600):
+    client = garth.Client()
+    client.configure(
+        oauth1_token=OAuth1Token(oauth_token="token", oauth_token_secret="secret", domain="garmin.com"),
+        oauth2_token=OAuth2Token(
+            scope="CONNECT_READ", jti="jti", token_type="Bearer", access_token=access_token,
+            refresh_token="refresh", expires_in=expires_in, expires_at=int(time.time()) + expires_in,
+            refresh_token_expires_in=86400, refresh_token_expires_at=int(time.time()) + 86400,
+        ),
+        domain="garmin.com",
+    )
+    return client
+
+def login_once(path, logins):
+    """Resumes the saved session or logs in, as every worker process does at startup."""
+    store = TokenStore(path)
+    client = garth.Client()
+    if store.load(client):
+        return
+    with store.lock():
+        if store.load(client):
+            return
+        with open(logins, "a") as f:
+            f.write("login\n")
+        # A slow SSO login
+        time.sleep(0.2)
+        store.save(make_client())
+
+def test_save_and_load(tmp_path):
+    store = TokenStore(str(tmp_path / "garth"))
+    client = garth.Client()
+
+    assert not store.load(client)
+    store.save(make_client("saved"))
+
+    assert store.load(client)
+    assert client.oauth2_token.access_token == "saved"
+    assert sorted(os.listdir(store.path)) == ["oauth1_token.json", "oauth2_token.json"]
+
+def test_lock_times_out(tmp_path):
+    path = str(tmp_path / "garth")
+    locked, release = threading.Event(), threading.Event()
+
+    def hold():
+        with TokenStore(path).lock():
+            locked.set()
+            release.wait(5)
+
+    holder = threading.Thread(target=hold)
+    holder.start()
+    try:
+        locked.wait(5)
+        with pytest.raises(TimeoutError, match="Timed out waiting for the token lock"):
+            with TokenStore(path, timeout=0.1).lock():
+                pass
+    finally:
+        release.set()
+        holder.join()
+
+    with TokenStore(path, timeout=0.1).lock():
+        pass
+
+def test_parallel_processes_log_in_once(tmp_path):
+    path, logins = str(tmp_path / "garth"), str(tmp_path / "logins")
+    context = multiprocessing.get_context("spawn")
+
+    processes = [context.Process(target=login_once, args=(path, logins)) for _ in range(3)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(30)
+
+    assert all(process.exitcode == 0 for process in processes)
+    with open(logins) as f:
+        assert f.read() == "login\n"
+
+def test_refresh_reuses_token_saved_by_other_process(tmp_path):
+    store = TokenStore(str(tmp_path / "garth"))
+    store.save(make_client("refreshed elsewhere"))
+    client = make_client("expired", expires_in=-60)
+    refresh = []
+    client.refresh_oauth2 = lambda: refresh.append(1)
+
+    store.attach(client)
+    client.refresh_oauth2()
+
+    assert refresh == []
+    assert client.oauth2_token.access_token == "refreshed elsewhere"
+
+def test_refresh_saves_refreshed_token(tmp_path):
+    store = TokenStore(str(tmp_path / "garth"))
+    store.save(make_client("expired", expires_in=-60))
+    client = make_client("expired", expires_in=-60)
+
+    def refresh():
+        client.oauth2_token = make_client("new").oauth2_token
+
+    client.refresh_oauth2 = refresh
+    store.attach(client)
+    store.attach(client)
+    client.refresh_oauth2()
+
+    assert client._garth_home is None
+    loaded = garth.Client()
+    store.load(loaded)
+    assert loaded.oauth2_token.access_token == "new"
+
+def test_token_lock_timeout(monkeypatch):
+    monkeypatch.delenv("GARMIN_TOKEN_LOCK_TIMEOUT", raising=False)
+    assert token_lock_timeout() == 120
+    monkeypatch.setenv("GARMIN_TOKEN_LOCK_TIMEOUT", "30")
+    assert token_lock_timeout() == 30
@@ -0,0 +1,70 @@
+import json
+from unittest.mock import patch
+
+import pytest
+import requests
+from fastmcp import Client
+
+from garmin_workouts_mcp.tracing import NOOP_SPAN, current_span, record_response, span
+
+
+def read_spans(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+def test_span_is_noop_without_trace_file(monkeypatch):
+    monkeypatch.delenv("GARMIN_TRACE_FILE", raising=False)
+    with span("tool.list_workouts") as tool_span:
+        assert tool_span is NOOP_SPAN
+        tool_span.set("ignored", True)
+
+def test_spans_are_nested_and_exported(monkeypatch, tmp_path):
+    path = tmp_path / "trace.jsonl"
+    monkeypatch.setenv("GARMIN_TRACE_FILE", str(path))
+
+    with span("tool.get_activity", tool="get_activity"):
+        with span("garmin.request", endpoint="/activity-service/activity/1") as request_span:
+            request_span.set("status", 200)
+        with pytest.raises(ValueError):
+            with span("compile"):
+                raise ValueError("bad step")
+
+    request, compile_, tool = read_spans(path)
+    assert tool["parent_id"] is None
+    assert request["parent_id"] == compile_["parent_id"] == tool["span_id"]
+    assert request["trace_id"] == compile_["trace_id"] == tool["trace_id"]
+    assert request["attributes"] == {"endpoint": "/activity-service/activity/1", "status": 200}
+    assert compile_["error"] == "ValueError: bad step"
+    assert tool["duration_ms"] >= request["duration_ms"]
+    assert current_span() is NOOP_SPAN
+
+def test_record_response_sets_status_and_bytes(monkeypatch, tmp_path):
+    monkeypatch.setenv("GARMIN_TRACE_FILE", str(tmp_path / "trace.jsonl"))
+    response = requests.Response()
+    response.status_code = 200
+    response._content = b'{"workoutId": 1}'
+
+    with span("garmin.request") as request_span:
+        record_response(response)
+
+    assert request_span.attributes == {"status": 200, "bytes": 16}
+
+@pytest.mark.asyncio
+@patch('garmin_workouts_mcp.main.garth.connectapi')
+async def test_upload_workout_is_traced(mock_connectapi, monkeypatch, tmp_path):
+    from garmin_workouts_mcp.main import mcp
+
+    path = tmp_path / "trace.jsonl"
+    monkeypatch.setenv("GARMIN_TRACE_FILE", str(path))
+    mock_connectapi.return_value = {"workoutId": 123}
+    workout_data = {"name": "Easy Run", "type": "running", "steps": [{"stepType": "interval", "stepDuration": 1800}]}
+
+    async with Client(mcp) as client:
+        await client.call_tool("upload_workout", {"workout_data": workout_data})
+
+    spans = {s["name"]: s for s in read_spans(path)}
+    tool = spans["tool.upload_workout"]
+    for name in ("validate", "compile", "encode", "garmin.request"):
+        assert spans[name]["parent_id"] == tool["span_id"]
+    assert spans["garmin.request"]["attributes"]["endpoint"] == "/workout-service/workout"
+    assert spans["garmin.request"]["attributes"]["request_bytes"] == spans["encode"]["attributes"]["bytes"]
@@ -0,0 +1,121 @@
+import math
+import time
+
+import numpy as np
+import pytest
+from garmin_workouts_mcp.track import (
+    decode_polyline,
+    encode_polyline,
+    project,
+    simplify,
+    simplify_track,
+)
+
+
+def make_track(count, seed=0):
+    """A wiggly loop of about 40 km around Zurich, sampled at count points."""
+    t = np.linspace(0, 2 * np.pi, count)
+    lat = 47.37 + 0.1 * np.sin(t) + 0.0005 * np.sin(t * 400)
+    lon = 8.54 + 0.15 * np.cos(t) + 0.0005 * np.cos(t * 300)
+    noise = np.random.default_rng(seed).normal(0, 2e-6, (2, count))
+    return lat + noise[0], lon + noise[1]
+
+def test_encode_polyline_reference_example():
+    lat = np.array([38.5, 40.7, 43.252])
+    lon = np.array([-120.2, -120.95, -126.453])
+    assert encode_polyline(lat, lon) == "_p~iF~ps|U_ulLnnqC_mqNvxq`@"
+
+def test_polyline_round_trip():
+    lat, lon = make_track(1000)
+    decoded = decode_polyline(encode_polyline(lat, lon))
+    assert decoded.shape == (1000, 2)
+    assert np.allclose(decoded[:, 0], lat, atol=0.6e-5)
+    assert np.allclose(decoded[:, 1], lon, atol=0.6e-5)
+    assert encode_polyline(np.array([]), np.array([])) == ""
+
+def test_project_distances():
+    points = project(np.array([47.0, 47.001, 47.0]), np.array([8.0, 8.0, 8.001]))
+    # 0.001 degrees are about 111 m north and about 76 m east at this latitude
+    assert math.isclose(np.hypot(*(points[1] - points[0])), 111.2, rel_tol=0.01)
+    assert math.isclose(np.hypot(*(points[2] - points[0])), 75.8, rel_tol=0.01)
+
+def test_simplify_straight_line_keeps_ends():
+    points = np.column_stack((np.arange(100.0), np.zeros(100)))
+    kept, error = simplify(points, tolerance=0.1)
+    assert list(kept) == [0, 99]
+    assert error == 0.0
+
+def test_simplify_keeps_corner():
+    points = np.array([[0.0, 0.0], [5.0, 0.1], [10.0, 0.0], [10.0, 10.0], [10.1, 20.0]])
+    kept, error = simplify(points, tolerance=1.0)
+    assert list(kept) == [0, 2, 4]
+    assert error <= 1.0
+
+def test_simplify_closed_loop():
+    points = np.array([[0.0, 0.0], [10.0, 0.0], [10.0, 10.0], [0.0, 10.0], [0.0, 0.0]])
+    kept, _ = simplify(points, max_points=3)
+    assert list(kept) == [0, 2, 4]
+
+def test_simplify_point_budget():
+    lat, lon = make_track(5000)
+    points = project(lat, lon)
+    kept, error = simplify(points, max_points=200)
+    assert len(kept) == 200
+    assert kept[0] == 0 and kept[-1] == 4999
+    assert np.all(np.diff(kept) > 0)
+
+    # A larger budget never makes the simplified track worse
+    _, finer_error = simplify(points, max_points=400)
+    assert finer_error <= error
+
+def test_simplify_tolerance_bounds_error():
+    lat, lon = make_track(5000)
+    points = project(lat, lon)
+    kept, error = simplify(points, tolerance=5.0)
+    assert error <= 5.0
+
+    # Every dropped point is within the tolerance of its simplified segment
+    for first, last in zip(kept[:-1], kept[1:]):
+        start, end = points[first], points[last]
+        direction = (end - start) / np.hypot(*(end - start))
+        offsets = points[first + 1:last] - start
+        distances = np.abs(offsets[:, 0] * direction[1] - offsets[:, 1] * direction[0])
+        assert np.all(distances <= 5.0 + 1e-9)
+
+def test_simplify_requires_limit():
+    points = np.zeros((10, 2))
+    with pytest.raises(ValueError, match="Either a tolerance or a point budget is required"):
+        simplify(points)
+    with pytest.raises(ValueError, match="Point budget must be at least 2, got 1"):
+        simplify(points, max_points=1)
+
+def test_simplify_short_tracks():
+    assert list(simplify(np.zeros((1, 2)), max_points=10)[0]) == [0]
+    assert list(simplify(np.zeros((2, 2)), max_points=10)[0]) == [0, 1]
+
+def test_simplify_track_skips_missing_positions():
+    lat, lon = make_track(1000)
+    lat[:10] = np.nan
+    lon[500] = np.nan
+    track = simplify_track(lat, lon, max_points=50)
+
+    assert track["originalPoints"] == 989
+    assert track["points"] == 50
+    decoded = decode_polyline(track["polyline"])
+    assert len(decoded) == 50
+    assert math.isclose(decoded[0, 0], lat[10], abs_tol=1e-5)
+    assert math.isclose(track["bounds"]["north"], np.nanmax(lat))
+
+def test_simplify_track_without_positions():
+    track = simplify_track([math.nan] * 3, [math.nan] * 3, max_points=50)
+    assert track == {"polyline": "", "points": 0, "originalPoints": 0, "maxError": 0.0, "bounds": None}
+
+def test_simplify_ultra_distance_track_is_fast():
+    lat, lon = make_track(100_000)
+    started = time.perf_counter()
+    track = simplify_track(lat, lon, max_points=500)
+    elapsed = time.perf_counter() - started
+
+    assert track["points"] == 500
+    # Tens of milliseconds on a laptop, generous for slow CI machines
+    assert elapsed < 1.0
@@ -0,0 +1,81 @@
+from datetime import date
+
+import pytest
+from garmin_workouts_mcp.training_load import (
+    activities_to_columns,
+    aggregate_training,
+)
+
+
+def make_activity(day, sport="running", duration=3600, distance=10000, load=None):
+    activity = {
+        "startTimeLocal": f"{day} 07:00:00",
+        "activityType": {"typeKey": sport},
+        "duration": duration,
+        "distance": distance,
+    }
+    if load is not None:
+        activity["activityTrainingLoad"] = load
+    return activity
+
+def test_activities_to_columns_load_fallback():
+    columns = activities_to_columns([
+        make_activity("2024-01-01", load=120),
+        make_activity("2024-01-02", duration=1800),
+        {"activityType": {"typeKey": "running"}},  # no start time, dropped
+    ])
+    assert list(columns["load"]) == [120, 30]
+    assert list(columns["sport"]) == ["running", "running"]
+    assert len(columns["day"]) == 2
+
+def test_aggregate_training_weekly_by_sport():
+    columns = activities_to_columns([
+        make_activity("2024-01-01"),                                    # Monday, week 1
+        make_activity("2024-01-07", sport="cycling", distance=40000),   # Sunday, week 1
+        make_activity("2024-01-08", duration=1800, distance=5000),     # Monday, week 2
+        make_activity("2023-12-20"),                                    # before range
+    ])
+
+    result = aggregate_training(columns, date(2024, 1, 1), date(2024, 1, 14))
+
+    assert [row["week"] for row in result["rows"]] == ["2024-01-01", "2024-01-08"]
+    assert result["rows"][0]["count"] == 2
+    assert result["rows"][0]["hoursBySport"] == {"cycling": 1.0, "running": 1.0}
+    assert result["rows"][0]["km"] == 50.0
+    assert result["rows"][1]["hours"] == 0.5
+    assert result["totals"]["count"] == 3
+    assert result["bySport"]["cycling"] == {"count": 1, "hours": 1.0, "km": 40.0}
+
+def test_aggregate_training_monthly():
+    columns = activities_to_columns([
+        make_activity("2024-01-15"),
+        make_activity("2024-03-01"),
+    ])
+
+    result = aggregate_training(columns, date(2024, 1, 10), date(2024, 3, 5), period="month")
+
+    assert [row["month"] for row in result["rows"]] == ["2024-01", "2024-02", "2024-03"]
+    assert [row["count"] for row in result["rows"]] == [1, 0, 1]
+
+def test_aggregate_training_rolling_load():
+    # 60 load every day for four weeks before the end of the range
+    activities = [make_activity(f"2024-01-{day:02d}", load=60) for day in range(1, 29)]
+    columns = activities_to_columns(activities)
+
+    result = aggregate_training(columns, date(2024, 1, 28), date(2024, 1, 28))
+
+    assert result["load"]["acute"] == 60
+    assert result["load"]["chronic"] == 60
+    assert result["load"]["acuteChronicRatio"] == 1.0
+    # History before start_date only contributes to the rolling load
+    assert result["totals"]["count"] == 1
+
+def test_aggregate_training_invalid_period():
+    with pytest.raises(ValueError, match="Period must be 'week' or 'month', got year"):
+        aggregate_training(activities_to_columns([]), date(2024, 1, 1), date(2024, 1, 2), period="year")
+
+def test_aggregate_training_empty():
+    result = aggregate_training(activities_to_columns([]), date(2024, 1, 1), date(2024, 1, 7))
+    assert result["totals"]["count"] == 0
+    assert result["load"]["acuteChronicRatio"] is None
+    assert len(result["rows"]) == 1
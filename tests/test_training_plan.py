@@ -0,0 +1,123 @@
+import pytest
+from garmin_workouts_mcp.training_plan import (
+    day_offset,
+    diff_schedule,
+    expand_plan,
+    progress_workout,
+)
+from datetime import date
+
+
+BASE_WORKOUT = {
+    "name": "Intervals",
+    "type": "running",
+    "steps": [
+        {"stepType": "warmup", "stepDuration": 600},
+        {
+            "stepType": "repeat",
+            "numberOfIterations": 4,
+            "steps": [
+                {"stepType": "interval", "endConditionType": "distance", "stepDistance": 1, "distanceUnit": "km"},
+                {"stepType": "recovery", "stepDuration": 120},
+            ],
+        },
+        {"stepType": "cooldown", "stepDuration": 600},
+    ],
+}
+
+def test_expand_plan_dates_and_names():
+    plan = {
+        "name": "Base",
+        "startDate": "2025-01-06",  # Monday
+        "weeks": 2,
+        "workouts": [
+            {"day": "thursday", "workout": BASE_WORKOUT},
+            {"day": 0, "workout": {"name": "Easy", "type": "running", "steps": [{"stepType": "interval", "stepDuration": 1800}]}},
+        ],
+    }
+
+    entries = expand_plan(plan)
+
+    assert [(entry["date"], entry["workout"]["name"]) for entry in entries] == [
+        ("2025-01-06", "Base W01 Easy"),
+        ("2025-01-09", "Base W01 Intervals"),
+        ("2025-01-13", "Base W02 Easy"),
+        ("2025-01-16", "Base W02 Intervals"),
+    ]
+    # The template itself is not modified
+    assert BASE_WORKOUT["name"] == "Intervals"
+
+def test_expand_plan_deload_week():
+    plan = {
+        "startDate": "2025-01-06",
+        "weeks": 4,
+        "deload": {"every": 2, "factor": 0.5},
+        "workouts": [{"workout": BASE_WORKOUT}],
+    }
+
+    entries = expand_plan(plan)
+
+    assert entries[1]["workout"]["name"] == "W02 Intervals (deload)"
+    assert entries[1]["workout"]["steps"][0]["stepDuration"] == 300
+    assert entries[1]["workout"]["steps"][1]["numberOfIterations"] == 4
+    assert entries[2]["workout"]["steps"][0]["stepDuration"] == 600
+
+def test_progress_workout_rules():
+    progression = {
+        "numberOfIterations": {"add": 1, "max": 5},
+        "stepDistance": {"percent": 10, "every": 2},
+        "stepDuration": {"add": 60, "stepTypes": ["recovery"]},
+    }
+
+    workout = progress_workout(BASE_WORKOUT, progression, week=3)
+
+    repeat = workout["steps"][1]
+    assert repeat["numberOfIterations"] == 5  # 4 + 3, capped at 5
+    assert repeat["steps"][0]["stepDistance"] == 1.1  # one progression every two weeks
+    assert repeat["steps"][1]["stepDuration"] == 300
+    assert workout["steps"][0]["stepDuration"] == 600  # warmup is not a recovery step
+
+def test_progress_workout_invalid_rule():
+    with pytest.raises(ValueError, match="Unsupported progression field: stepPace"):
+        progress_workout(BASE_WORKOUT, {"stepPace": {"add": 1}}, week=1)
+    with pytest.raises(ValueError, match="Progression for stepDuration must contain either add or percent."):
+        progress_workout(BASE_WORKOUT, {"stepDuration": {"add": 1, "percent": 5}}, week=1)
+    with pytest.raises(ValueError, match="Invalid every for progression of stepDuration."):
+        progress_workout(BASE_WORKOUT, {"stepDuration": {"add": 1, "every": 0}}, week=1)
+    with pytest.raises(ValueError, match="Invalid every for progression of numberOfIterations."):
+        progress_workout(BASE_WORKOUT, {"numberOfIterations": {"add": 1, "every": 1.5}}, week=1)
+
+def test_expand_plan_invalid_template():
+    with pytest.raises(ValueError, match=r"startDate must be in ISO format \(YYYY-MM-DD\)"):
+        expand_plan({"startDate": "06.01.2025", "weeks": 1, "workouts": [{"workout": BASE_WORKOUT}]})
+    with pytest.raises(ValueError, match="Invalid or missing weeks for plan."):
+        expand_plan({"startDate": "2025-01-06", "weeks": 0, "workouts": [{"workout": BASE_WORKOUT}]})
+    with pytest.raises(ValueError, match="Plan must contain at least one workout."):
+        expand_plan({"startDate": "2025-01-06", "weeks": 1, "workouts": []})
+
+def test_day_offset():
+    monday = date(2025, 1, 6)
+    assert day_offset("Monday", monday) == 0
+    assert day_offset("sunday", monday) == 6
+    assert day_offset("monday", date(2025, 1, 8)) == 5
+    with pytest.raises(ValueError, match="Invalid day: 7"):
+        day_offset(7, monday)
+
+def test_diff_schedule():
+    desired = [
+        {"date": "2025-01-07", "name": "W01 Easy"},
+        {"date": "2025-01-14", "name": "W02 Easy"},
+        {"date": "2025-01-21", "name": "W03 Easy"},
+    ]
+    scheduled = [
+        {"date": "2025-01-07", "name": "W01 Easy", "workoutId": "1", "scheduleId": "11"},
+        {"date": "2025-01-15", "name": "W02 Easy", "workoutId": "2", "scheduleId": "12"},
+        {"date": "2025-01-28", "name": "W04 Easy", "workoutId": "4", "scheduleId": "14"},
+    ]
+
+    diff = diff_schedule(desired, scheduled)
+
+    assert diff["keep"] == [(desired[0], scheduled[0])]
+    assert diff["move"] == [(desired[1], scheduled[1])]
+    assert diff["upload"] == [desired[2]]
+    assert diff["unschedule"] == [scheduled[1], scheduled[2]]
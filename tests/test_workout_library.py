@@ -0,0 +1,91 @@
+import pytest
+from garmin_workouts_mcp.garmin_workout import make_payload
+from garmin_workouts_mcp.workout_library import (
+    is_garmin_workout,
+    iter_jsonl,
+    open_jsonl_writer,
+    to_upload_payload,
+    validate_garmin_workout,
+    workout_fingerprint,
+)
+
+
+WORKOUT = {
+    "name": "Easy Run",
+    "type": "running",
+    "steps": [{"stepType": "interval", "stepDuration": 1800}],
+}
+
+def test_jsonl_round_trip(tmp_path):
+    path = str(tmp_path / "exports" / "workouts.jsonl")
+
+    with open_jsonl_writer(path) as write:
+        write({"name": "Run"})
+        write({"name": "Läufe"})
+
+    assert list(iter_jsonl(path)) == [(1, {"name": "Run"}), (2, {"name": "Läufe"})]
+
+def test_jsonl_writer_keeps_previous_file_on_error(tmp_path):
+    path = str(tmp_path / "workouts.jsonl")
+    with open_jsonl_writer(path) as write:
+        write({"name": "Run"})
+
+    with pytest.raises(RuntimeError):
+        with open_jsonl_writer(path) as write:
+            write({"name": "Ride"})
+            raise RuntimeError("Interrupted")
+
+    assert list(iter_jsonl(path)) == [(1, {"name": "Run"})]
+    assert not (tmp_path / "workouts.jsonl.part").exists()
+
+def test_iter_jsonl_skips_blank_lines_and_reports_invalid_lines(tmp_path):
+    path = tmp_path / "workouts.jsonl"
+    path.write_text('{"name": "Run"}\n\n{"name": \n')
+
+    records = iter_jsonl(str(path))
+
+    assert next(records) == (1, {"name": "Run"})
+    with pytest.raises(ValueError, match="Invalid JSON on line 3"):
+        next(records)
+
+def test_jsonl_writer_keeps_previous_file_when_abandoned(tmp_path):
+    path = str(tmp_path / "workouts.jsonl")
+    with open_jsonl_writer(path) as write:
+        write({"name": "Run"})
+
+    with open_jsonl_writer(path) as write:
+        write({"name": "Ride"})
+        write.abandon()
+
+    assert list(iter_jsonl(path)) == [(1, {"name": "Run"})]
+    assert list(iter_jsonl(write.partial_path)) == [(1, {"name": "Ride"})]
+
+def test_to_upload_payload_removes_ids():
+    payload = make_payload({**WORKOUT, "steps": [{"stepType": "repeat", "numberOfIterations": 2, "steps": WORKOUT["steps"]}]})
+    payload["workoutSegments"][0]["workoutSteps"][0]["stepId"] = 11
+    payload["workoutSegments"][0]["workoutSteps"][0]["workoutSteps"][0]["stepId"] = 12
+    workout = {**payload, "workoutId": 123, "ownerId": 1, "author": {"displayName": "me"},
+               "description": "Keep it easy"}
+
+    uploaded = to_upload_payload(workout)
+
+    assert is_garmin_workout(workout) and not is_garmin_workout(WORKOUT)
+    assert not {"workoutId", "ownerId", "author"} & set(uploaded)
+    assert uploaded["description"] == "Keep it easy"
+    repeat = uploaded["workoutSegments"][0]["workoutSteps"][0]
+    assert "stepId" not in repeat and "stepId" not in repeat["workoutSteps"][0]
+    assert workout["workoutSegments"][0]["workoutSteps"][0]["stepId"] == 11
+
+def test_validate_garmin_workout():
+    assert validate_garmin_workout(make_payload(WORKOUT)) == []
+    assert validate_garmin_workout({"workoutSegments": [{"workoutSteps": None}]}) == [
+        "Missing workoutName", "Missing sportType", "Every workout segment must have a list of workoutSteps",
+    ]
+
+def test_workout_fingerprint_ignores_ids_and_metadata():
+    payload = make_payload(WORKOUT)
+    uploaded = {**payload, "workoutId": 123, "ownerId": 1, "createdDate": "2025-01-01"}
+    changed = make_payload({**WORKOUT, "steps": [{"stepType": "interval", "stepDuration": 2400}]})
+
+    assert workout_fingerprint(uploaded) == workout_fingerprint(payload)
+    assert workout_fingerprint(changed) != workout_fingerprint(payload)
@@ -0,0 +1,269 @@
+import sqlite3
+import time
+from unittest.mock import Mock
+
+import pytest
+import requests
+from garmin_workouts_mcp.sessions import current_athlete
+from garmin_workouts_mcp.write_queue import (
+    TICKET_PREFIX,
+    PendingDependency,
+    WriteQueue,
+    create_write_queue,
+    is_retryable,
+)
+
+
+def http_error(status):
+    response = requests.Response()
+    response.status_code = status
+    return requests.HTTPError(f"{status} error", response=response)
+
+
+def make_queue(tmp_path, apply, reconcile=None, **kwargs):
+    queue = WriteQueue(str(tmp_path / "queue.db"), **kwargs)
+    queue.register("upload", apply, reconcile)
+    # Operations are flushed explicitly by the tests
+    queue.start = lambda: None
+    return queue
+
+
+def make_due(queue):
+    with sqlite3.connect(queue.path) as db:
+        db.execute("UPDATE operations SET next_attempt_at = 0 WHERE status = 'queued'")
+
+def test_enqueue_and_flush(tmp_path):
+    apply = Mock(return_value={"workoutId": "1"})
+    queue = make_queue(tmp_path, apply)
+
+    ticket = queue.enqueue("upload", {"name": "Run"})
+
+    assert ticket["ticket"].startswith(TICKET_PREFIX)
+    assert ticket["status"] == "queued"
+    assert queue.flush() == 1
+    apply.assert_called_once_with({"name": "Run"})
+    status = queue.get(ticket["ticket"])
+    assert status["status"] == "done"
+    assert status["attempts"] == 1
+    assert status["result"] == {"workoutId": "1"}
+    assert queue.flush() == 0
+
+def test_queue_creates_missing_directory(tmp_path):
+    apply = Mock(return_value={"workoutId": "1"})
+    queue = WriteQueue(str(tmp_path / "garmin" / "queues" / "write-queue.db"))
+    queue.register("upload", apply)
+    queue.start = lambda: None
+
+    ticket = queue.enqueue("upload", {"name": "Run"})["ticket"]
+
+    assert queue.flush() == 1
+    assert queue.get(ticket)["status"] == "done"
+
+def test_enqueue_survives_restart(tmp_path):
+    make_queue(tmp_path, Mock()).enqueue("upload", {"name": "Run"})
+
+    apply = Mock(return_value={"workoutId": "1"})
+    assert make_queue(tmp_path, apply).flush() == 1
+    apply.assert_called_once()
+
+def test_enqueue_deduplicates_pending_operations(tmp_path):
+    apply = Mock(return_value={"workoutId": "1"})
+    queue = make_queue(tmp_path, apply)
+
+    first = queue.enqueue("upload", {"name": "Run"})
+    assert queue.enqueue("upload", {"name": "Run"})["ticket"] == first["ticket"]
+    assert queue.enqueue("upload", {"name": "Ride"})["ticket"] != first["ticket"]
+    assert queue.flush() == 2
+
+    # Without an explicit key, a completed operation can be repeated
+    assert queue.enqueue("upload", {"name": "Run"})["ticket"] != first["ticket"]
+
+def test_explicit_idempotency_key_applies_once(tmp_path):
+    apply = Mock(return_value={"workoutId": "1"})
+    queue = make_queue(tmp_path, apply)
+
+    first = queue.enqueue("upload", {"name": "Run"}, idempotency_key="abc")
+    queue.flush()
+    repeated = queue.enqueue("upload", {"name": "Run"}, idempotency_key="abc")
+
+    assert repeated["ticket"] == first["ticket"]
+    assert repeated["status"] == "done"
+    assert queue.flush() == 0
+    apply.assert_called_once()
+
+    # Keys are scoped to the athlete
+    assert queue.enqueue("upload", {"name": "Run"}, "alice", "abc")["ticket"] != first["ticket"]
+
+def test_retryable_failure_is_retried_with_backoff(tmp_path):
+    apply = Mock(side_effect=[http_error(503), {"workoutId": "1"}])
+    queue = make_queue(tmp_path, apply)
+    ticket = queue.enqueue("upload", {"name": "Run"})["ticket"]
+
+    assert queue.flush() == 1
+    status = queue.get(ticket)
+    assert status["status"] == "queued"
+    assert "503" in status["error"]
+    # Not due before the backoff delay
+    assert queue.flush() == 0
+
+    make_due(queue)
+    assert queue.flush() == 1
+    assert queue.get(ticket)["status"] == "done"
+    assert queue.get(ticket)["attempts"] == 2
+
+def test_rejected_operation_fails_without_retry(tmp_path):
+    queue = make_queue(tmp_path, Mock(side_effect=http_error(400)))
+    ticket = queue.enqueue("upload", {"name": "Run"})["ticket"]
+
+    queue.flush()
+
+    status = queue.get(ticket)
+    assert status["status"] == "failed"
+    assert status["attempts"] == 1
+
+def test_operation_fails_after_max_attempts(tmp_path):
+    queue = make_queue(tmp_path, Mock(side_effect=http_error(429)), max_attempts=2)
+    ticket = queue.enqueue("upload", {"name": "Run"})["ticket"]
+
+    queue.flush()
+    make_due(queue)
+    queue.flush()
+
+    assert queue.get(ticket)["status"] == "failed"
+
+def test_failed_operation_is_queued_again(tmp_path):
+    apply = Mock(side_effect=[http_error(400), {"workoutId": "1"}])
+    queue = make_queue(tmp_path, apply)
+    ticket = queue.enqueue("upload", {"name": "Run"}, idempotency_key="abc")["ticket"]
+    queue.flush()
+
+    requeued = queue.enqueue("upload", {"name": "Run"}, idempotency_key="abc")
+    assert requeued["ticket"] == ticket
+    assert requeued["status"] == "queued"
+    queue.flush()
+    assert queue.get(ticket)["status"] == "done"
+
+def test_retry_reconciles_earlier_attempt(tmp_path):
+    apply = Mock(side_effect=requests.Timeout("Read timed out"))
+    reconcile = Mock(return_value={"workoutId": "1"})
+    queue = make_queue(tmp_path, apply, reconcile)
+    ticket = queue.enqueue("upload", {"name": "Run"})["ticket"]
+
+    queue.flush()
+    reconcile.assert_not_called()
+    make_due(queue)
+    queue.flush()
+
+    reconcile.assert_called_once()
+    assert reconcile.call_args.args[0] == {"name": "Run"}
+    apply.assert_called_once()
+    assert queue.get(ticket)["result"] == {"workoutId": "1"}
+
+def test_expired_lease_is_claimed_again(tmp_path):
+    apply = Mock(return_value={"workoutId": "1"})
+    reconcile = Mock(return_value=None)
+    queue = make_queue(tmp_path, apply, reconcile)
+    ticket = queue.enqueue("upload", {"name": "Run"})["ticket"]
+
+    # A flusher claims the operation and its process is killed
+    assert queue._claim() is not None
+    assert queue.flush() == 0
+    with sqlite3.connect(queue.path) as db:
+        db.execute("UPDATE operations SET next_attempt_at = 0")
+
+    assert queue.flush() == 1
+    reconcile.assert_called_once()
+    assert queue.get(ticket)["status"] == "done"
+
+def test_operations_run_as_their_athlete(tmp_path):
+    athletes = []
+    queue = make_queue(tmp_path, lambda payload: athletes.append(current_athlete()) or {})
+
+    queue.enqueue("upload", {"name": "Run"}, "alice")
+    queue.flush()
+
+    assert athletes == ["alice"]
+
+def test_get_and_summary_are_scoped_to_athlete(tmp_path):
+    queue = make_queue(tmp_path, Mock(side_effect=http_error(400)))
+    ticket = queue.enqueue("upload", {"name": "Run"}, "alice")["ticket"]
+    queue.enqueue("upload", {"name": "Ride"}, "alice")
+    queue.flush()
+    queue.enqueue("upload", {"name": "Swim"}, "alice")
+
+    assert queue.get(ticket) is None
+    assert queue.get(ticket, "alice")["status"] == "failed"
+    summary = queue.summary("alice")
+    assert summary["counts"] == {"queued": 1, "running": 0, "done": 0, "failed": 2}
+    assert len(summary["operations"]) == 3
+    assert queue.summary()["counts"]["failed"] == 0
+
+def test_resolve_ticket(tmp_path):
+    queue = make_queue(tmp_path, Mock(return_value={"workoutId": "42"}))
+    ticket = queue.enqueue("upload", {"name": "Run"})["ticket"]
+
+    assert queue.resolve("123", "workoutId") == "123"
+    with pytest.raises(PendingDependency):
+        queue.resolve(ticket, "workoutId")
+    queue.flush()
+    assert queue.resolve(ticket, "workoutId") == "42"
+    with pytest.raises(ValueError, match="Unknown ticket"):
+        queue.resolve(TICKET_PREFIX + "unknown", "workoutId")
+
+def test_completed_results(tmp_path):
+    queue = make_queue(tmp_path, Mock(return_value={"workoutId": "42"}))
+    queue.enqueue("upload", {"name": "Run"})
+    queue.enqueue("upload", {"name": "Ride"}, athlete="alice")
+    queue.flush()
+    queue.enqueue("upload", {"name": "Swim"})
+
+    assert queue.completed_results("upload") == [{"workoutId": "42"}]
+    assert queue.completed_results("upload", "alice") == [{"workoutId": "42"}]
+    assert queue.completed_results("schedule") == []
+
+def test_pending_dependency_is_deferred(tmp_path):
+    queue = make_queue(tmp_path, Mock(side_effect=PendingDependency("Operation has not completed")))
+    ticket = queue.enqueue("upload", {"name": "Run"})["ticket"]
+
+    queue.flush()
+
+    status = queue.get(ticket)
+    assert status["status"] == "queued"
+    assert status["attempts"] == 0
+
+def test_enqueue_rejects_unknown_operation_and_disabled_queue(tmp_path):
+    with pytest.raises(ValueError, match="Unknown queued operation: delete"):
+        make_queue(tmp_path, Mock()).enqueue("delete", {})
+    with pytest.raises(ValueError, match="requires GARMIN_WRITE_QUEUE"):
+        WriteQueue(None).enqueue("upload", {})
+
+def test_background_flushers_drain_queue(tmp_path):
+    applied = []
+    queue = WriteQueue(str(tmp_path / "queue.db"), concurrency=3)
+    queue.register("upload", lambda payload: applied.append(payload["index"]) or {"workoutId": payload["index"]})
+    try:
+        tickets = [queue.enqueue("upload", {"index": index})["ticket"] for index in range(20)]
+        deadline = time.monotonic() + 10
+        while len(applied) < 20 and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        queue.stop(5)
+
+    assert sorted(applied) == list(range(20))
+    assert all(queue.get(ticket)["status"] == "done" for ticket in tickets)
+
+def test_is_retryable():
+    assert is_retryable(http_error(503))
+    assert is_retryable(http_error(429))
+    assert is_retryable(requests.ConnectionError())
+    assert not is_retryable(http_error(400))
+    assert not is_retryable(ValueError("Invalid workout"))
+
+def test_create_write_queue(monkeypatch, tmp_path):
+    monkeypatch.delenv("GARMIN_WRITE_QUEUE", raising=False)
+    assert not create_write_queue().enabled
+    monkeypatch.setenv("GARMIN_WRITE_QUEUE", str(tmp_path / "queue.db"))
+    monkeypatch.setenv("GARMIN_WRITE_CONCURRENCY", "4")
+    queue = create_write_queue()
+    assert queue.enabled
+    assert queue.concurrency == 4